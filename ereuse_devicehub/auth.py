@@ -1,6 +1,7 @@
 from sqlalchemy.exc import DataError
 from werkzeug.exceptions import Unauthorized
 
+from ereuse_devicehub.resources import baked
 from ereuse_devicehub.resources.user.models import Session, User
 from ereuse_devicehub.teal.auth import TokenAuth
 from ereuse_devicehub.teal.db import ResourceNotFound
@@ -9,11 +10,11 @@ from ereuse_devicehub.teal.db import ResourceNotFound
 class Auth(TokenAuth):
     def authenticate(self, token: str, *args, **kw) -> User:
         try:
-            user = User.query.filter_by(token=token).first()
+            user = baked.user_by_token(token).first()
             if user:
                 return user
 
-            ses = Session.query.filter_by(token=token).one()
+            ses = baked.one(baked.session_by_token(token), Session)
             return ses.user
         except (ResourceNotFound, DataError):
             raise Unauthorized('Provide a suitable token.')
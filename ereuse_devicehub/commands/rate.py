@@ -0,0 +1,26 @@
+import click
+
+from ereuse_devicehub.db import db
+from ereuse_devicehub.resources.action.rate.batch import batch_rate_algorithm
+
+
+class Rates:
+    def __init__(self, app) -> None:
+        super().__init__()
+        self.app = app
+
+        @self.app.cli.group(short_help='Computer rates.')
+        def rate():
+            pass
+
+        rate.command('recompute', short_help='rate again all the computers.')(
+            self.recompute
+        )
+
+    def recompute(self):
+        """Adds a new RateComputer to every computer that has
+        benchmarks, using the current parameters of the rate.
+        """
+        total = batch_rate_algorithm.run()
+        db.session.commit()
+        click.echo('Rated {} computers.'.format(total))
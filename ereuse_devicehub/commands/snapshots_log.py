@@ -0,0 +1,36 @@
+import click
+
+from ereuse_devicehub.db import db
+from ereuse_devicehub.parser.models import SnapshotsLog
+
+
+class SnapshotsLogBackfill:
+    """Computes the values that the snapshot logs keep of their
+    snapshots, for the logs saved before they were stored.
+    """
+
+    def __init__(self, app) -> None:
+        super().__init__()
+        self.app = app
+        self.app.cli.command(
+            'snapshots_log_backfill', short_help='compute the values of the logs.'
+        )(self.run)
+
+    @click.option('--all', '-a', 'everything', is_flag=True, help='Compute every log.')
+    @click.option('--batch', '-b', default=500, help='Logs saved in each commit.')
+    def run(self, everything=False, batch=500):
+        query = SnapshotsLog.query.order_by(SnapshotsLog.id)
+        if not everything:
+            query = query.filter(SnapshotsLog.display_version.is_(None))
+        total = 0
+        last_id = 0
+        while True:
+            logs = query.filter(SnapshotsLog.id > last_id).limit(batch).all()
+            if not logs:
+                break
+            for log in logs:
+                log.denormalize()
+            last_id = logs[-1].id
+            total += len(logs)
+            db.session.commit()
+        click.echo('Computed {} snapshot logs.'.format(total))
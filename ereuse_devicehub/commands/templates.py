@@ -0,0 +1,23 @@
+import click
+
+
+class CompileTemplates:
+    """Compiles the templates into the bytecode cache, so the workers
+    do not compile them on the first requests after a deploy.
+    """
+
+    def __init__(self, app) -> None:
+        super().__init__()
+        self.app = app
+        self.app.cli.command(
+            'compile_templates', short_help='compile the templates beforehand.'
+        )(self.run)
+
+    def run(self):
+        if not self.app.config.get('JINJA_BYTECODE_CACHE'):
+            click.echo(
+                'JINJA_BYTECODE_CACHE is not set, there is nowhere to save them.'
+            )
+            return
+        names = self.app.jinja_env.compile_all()
+        click.echo('Compiled {} templates.'.format(len(names)))
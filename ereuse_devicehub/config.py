@@ -3,6 +3,7 @@ from itertools import chain
 
 from decouple import config
 
+from ereuse_devicehub.db import REPLICA
 from ereuse_devicehub.resources import (
     action,
     agent,
@@ -62,6 +63,36 @@ class DevicehubConfig(Config):
     SQLALCHEMY_TRACK_MODIFICATIONS = bool(config("SQLALCHEMY_TRACK_MODIFICATIONS", False))
     SQLALCHEMY_POOL_TIMEOUT = int(config("SQLALCHEMY_POOL_TIMEOUT", 0))
     SQLALCHEMY_POOL_RECYCLE = int(config("SQLALCHEMY_POOL_RECYCLE", 3600))
+    DB_REPLICA_HOST = config('DB_REPLICA_HOST', None)
+    """Host of a read replica of the database, with the same user,
+    password and database. Reports, exports and the lists of devices
+    read from it, leaving the primary to the writes.
+    """
+    SQLALCHEMY_BINDS = {}
+    if DB_REPLICA_HOST:
+        SQLALCHEMY_BINDS[REPLICA] = 'postgresql://{user}:{pw}@{host}/{db}'.format(
+            user=DB_USER,
+            pw=DB_PASSWORD,
+            host=DB_REPLICA_HOST,
+            db=DB_DATABASE,
+        )
+    REPLICA_MAX_LAG = int(config('REPLICA_MAX_LAG', 10))
+    """Seconds that a user reads from the primary after writing, as
+    the replica can be this late.
+    """
+
+    TAG_PROVIDER_TIMEOUT = int(config('TAG_PROVIDER_TIMEOUT', 15))
+    TAG_PROVIDER_RETRIES = int(config('TAG_PROVIDER_RETRIES', 3))
+    TAG_PROVIDER_CONNECTIONS = int(config('TAG_PROVIDER_CONNECTIONS', 4))
+    """Maximum of simultaneous calls to the tag provider per process."""
+    TAG_PROVIDER_POOL = int(config('TAG_PROVIDER_POOL', 0))
+    """Number of tag ids to reserve beforehand, 0 to get them when
+    creating the tags. Unused ids are lost when the process stops.
+    """
+    PUBLIC_PAGE_CACHE_SIZE = int(config('PUBLIC_PAGE_CACHE_SIZE', 0))
+    """Number of rendered public device pages to keep per process,
+    0 to render them every time they changed for the client.
+    """
 
     SCHEMA = config('SCHEMA', 'dbtest')
     HOST = config('HOST', 'localhost')
@@ -74,6 +105,38 @@ class DevicehubConfig(Config):
 
     TMP_SNAPSHOTS = config('TMP_SNAPSHOTS', '/tmp/snapshots')
     TMP_LIVES = config('TMP_LIVES', '/tmp/lives')
+    CERTIFICATES_PROCESSES = int(config('CERTIFICATES_PROCESSES', 2))
+    """Number of processes of each worker that render the certificates
+    of many lots, 0 to render them in the worker.
+    """
+    JINJA_BYTECODE_CACHE = config('JINJA_BYTECODE_CACHE', None)
+    """Directory where the workers keep the compiled templates,
+    empty to compile them in every worker. It must be owned by the
+    user of the workers and have mode 700; it is not used otherwise.
+    """
+    FUZZY_SEARCH_THRESHOLD = float(config('FUZZY_SEARCH_THRESHOLD', 0.5))
+    """Minimum similarity, from 0 to 1, of the devices that the fuzzy
+    search finds.
+    """
+    FUZZY_SEARCH_LIMIT = int(config('FUZZY_SEARCH_LIMIT', 50))
+    """Maximum number of devices that the fuzzy search returns."""
+    MANUFACTURERS_LIMIT = int(config('MANUFACTURERS_LIMIT', 10))
+    """Maximum number of manufacturers that the forms suggest."""
+    NORMALIZE_MANUFACTURERS = config('NORMALIZE_MANUFACTURERS', False, cast=bool)
+    """Whether to replace the manufacturers of the devices of the
+    snapshots by their normalized names, when there is one. The HID
+    of a device includes its manufacturer: enable it in new
+    inventories only, as the devices registered before would not be
+    found again.
+    """
+    MAX_CONTENT_LENGTH = int(config('MAX_CONTENT_LENGTH', 0)) or None
+    """Maximum size of a request in bytes, 0 for no limit. Bigger
+    uploads are rejected before being read.
+    """
+    SNAPSHOT_MAX_SIZE = int(config('SNAPSHOT_MAX_SIZE', 0))
+    """Maximum size in bytes of each snapshot uploaded from the
+    inventory, 0 for no limit.
+    """
     LICENCES = config('LICENCES', './licences.txt')
     """This var is for save a snapshots in json format when fail something"""
     API_DOC_CONFIG_TITLE = 'Devicehub'
@@ -1,14 +1,67 @@
+import time
+from contextlib import contextmanager
+from functools import wraps
+from itertools import chain
+
 import citext
-from sqlalchemy import event
+import flask
+from flask import g, has_request_context, request
+from sqlalchemy import BigInteger, any_, event
 from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.sql import expression
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.selectable import SelectBase
 from sqlalchemy_utils import view
 
 from ereuse_devicehub.teal.db import SchemaSession, SchemaSQLAlchemy
 
+REPLICA = 'replica'
+"""The bind of the read replica in ``SQLALCHEMY_BINDS``."""
+LAST_WRITE = 'last_write'
+"""The key of the time of the last write of the user in its session."""
+
 
 class DhSession(SchemaSession):
+    """Our session, which runs the selects of the views marked with
+    :func:`read_replica` in the replica, if there is one.
+
+    The session reads from the primary once it writes, and for
+    ``REPLICA_MAX_LAG`` seconds after the user committed a write, so
+    the user always sees what they just did. Only users logged in
+    through the cookie session are tracked; requests authenticated
+    with a token do not keep one.
+    """
+
+    def get_bind(self, mapper=None, clause=None):
+        if isinstance(clause, UpdateBase):
+            self.info['wrote'] = True
+        elif isinstance(clause, SelectBase) and self._reads_from_replica():
+            return self.db.get_engine(self.app, bind=REPLICA)
+        return super().get_bind(mapper, clause)
+
+    def _reads_from_replica(self) -> bool:
+        if REPLICA not in (self.app.config['SQLALCHEMY_BINDS'] or ()):
+            return False
+        if not has_request_context() or not g.get('replica'):
+            return False
+        if self._flushing or self.info.get('wrote') or self.info.get('primary'):
+            return False
+        last_write = flask.session.get(LAST_WRITE, 0)
+        return time.time() - last_write > self.app.config['REPLICA_MAX_LAG']
+
+    @contextmanager
+    def on_primary(self):
+        """Runs the selects of the block in the primary, for the
+        values that must not be older than others read there.
+        """
+        pinned = self.info.get('primary', False)
+        self.info['primary'] = True
+        try:
+            yield
+        finally:
+            self.info['primary'] = pinned
+
     def final_flush(self):
         """A regular flush that performs expensive final operations
         through Devicehub (like saving searches), so it is thought
@@ -49,6 +102,55 @@ class SQLAlchemy(SchemaSQLAlchemy):
     def create_session(self, options):
         return sessionmaker(class_=DhSession, db=self, **options)
 
+    def _execute_for_all_tables(self, app, bind, operation, skip_tables=False):
+        if bind != '__all__':
+            return super()._execute_for_all_tables(app, bind, operation, skip_tables)
+        # The replica copies the tables of the primary
+        binds = self.get_app(app).config['SQLALCHEMY_BINDS'] or ()
+        for bind in chain([None], (b for b in binds if b != REPLICA)):
+            super()._execute_for_all_tables(app, bind, operation, skip_tables)
+
+
+def read_replica(view):
+    """Decorates a view to read from the replica, if there is one,
+    in GET requests.
+    """
+
+    @wraps(view)
+    def decorated(*args, **kwargs):
+        if request.method in {'GET', 'HEAD'}:
+            g.replica = True
+        return view(*args, **kwargs)
+
+    return decorated
+
+
+@event.listens_for(DhSession, 'after_flush')
+def _wrote(session, flush_context):
+    session.info['wrote'] = True
+
+
+@event.listens_for(DhSession, 'after_begin')
+def _set_replica_search_path(session, transaction, connection):
+    app = session.app
+    if REPLICA in (app.config['SQLALCHEMY_BINDS'] or ()):
+        if connection.engine is session.db.get_engine(app, bind=REPLICA):
+            connection.execute('SET search_path TO {}, public'.format(app.schema))
+
+
+@event.listens_for(DhSession, 'after_commit')
+def _remember_write(session):
+    if session.info.pop('wrote', False) and has_request_context():
+        # Only for users of the cookie session (flask-login's key), so
+        # the responses to tokens do not set a cookie
+        if '_user_id' in flask.session:
+            flask.session[LAST_WRITE] = time.time()
+
+
+@event.listens_for(DhSession, 'after_rollback')
+def _forget_write(session):
+    session.info.pop('wrote', None)
+
 
 def create_view(name, selectable):
     """Creates a view.
@@ -70,6 +172,15 @@ def create_view(name, selectable):
     return table
 
 
+def any_of(column, ids):
+    """``column = ANY(:ids)`` for integer ids, passing all of them
+    in one array parameter instead of one parameter per id as
+    ``in_`` does.
+    """
+    ids = expression.literal(list(ids), postgresql.ARRAY(BigInteger))
+    return column == any_(ids)
+
+
 db = SQLAlchemy(session_options={'autoflush': False})
 f = db.func
 exp = expression
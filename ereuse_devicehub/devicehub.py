@@ -14,15 +14,19 @@ from ereuse_devicehub.auth import Auth
 from ereuse_devicehub.client import Client, UserClient
 from ereuse_devicehub.commands.adduser import AddUser
 from ereuse_devicehub.commands.initdatas import InitDatas
+from ereuse_devicehub.commands.rate import Rates
+from ereuse_devicehub.commands.snapshots_log import SnapshotsLogBackfill
+from ereuse_devicehub.commands.templates import CompileTemplates
 
 # from ereuse_devicehub.commands.reports import Report
 from ereuse_devicehub.commands.users import GetToken
 from ereuse_devicehub.config import DevicehubConfig
 from ereuse_devicehub.db import db
 from ereuse_devicehub.dummy.dummy import Dummy
-from ereuse_devicehub.ereuse_utils.session import DevicehubClient
 from ereuse_devicehub.resources.device.search import DeviceSearch
+from ereuse_devicehub.resources.hash_reports import write_pending_hashes
 from ereuse_devicehub.resources.inventory import Inventory, InventoryDef
+from ereuse_devicehub.resources.tag.provider import TagProvider
 from ereuse_devicehub.resources.user.models import User
 from ereuse_devicehub.teal.db import ResourceNotFound, SchemaSQLAlchemy
 from ereuse_devicehub.teal.teal import Teal
@@ -77,6 +81,10 @@ class Devicehub(Teal):
         self.get_token = GetToken(self)
         self.initdata = InitDatas(self)
         self.adduser = AddUser(self)
+        self.rates = Rates(self)
+        self.compile_templates = CompileTemplates(self)
+        self.snapshots_log_backfill = SnapshotsLogBackfill(self)
+        self.tag_provider = TagProvider(self)
 
         @self.cli.group(
             short_help='Inventory management.',
@@ -89,6 +97,7 @@ class Devicehub(Teal):
         inv.command('del')(self.delete_inventory)
         inv.command('search')(self.regenerate_search)
         self.before_request(self._prepare_request)
+        self.after_request(write_pending_hashes)
 
         self.configure_extensions()
 
@@ -219,10 +228,7 @@ class Devicehub(Teal):
 
     def _prepare_request(self):
         """Prepares request stuff."""
-        inv = g.inventory = Inventory.current  # type: Inventory
-        g.tag_provider = DevicehubClient(
-            base_url=inv.tag_provider, token=DevicehubClient.encode_token(inv.tag_token)
-        )
+        g.inventory = Inventory.current  # type: Inventory
         # NOTE: models init methods expects that current user is
         #   available on g.user (e.g. to initialize object owner)
         g.user = current_user
@@ -261,11 +261,14 @@ T = TypeVar('T', bound=requests.Session)
 def retry(session: T,
           retries=3,
           backoff_factor=1,
-          status_to_retry=(500, 502, 504)) -> T:
+          status_to_retry=(500, 502, 504),
+          pool_maxsize=requests.adapters.DEFAULT_POOLSIZE) -> T:
     """Configures requests from the given session to retry in
     failed requests due to connection errors, HTTP response codes
     with ``status_to_retry`` and 30X redirections.
 
+    ``pool_maxsize`` is the number of connections kept alive per host.
+
     Remember that you still need
     """
     # From https://www.peterbe.com/plog/best-practice-with-retries-with-requests
@@ -279,7 +282,7 @@ def retry(session: T,
         status_forcelist=status_to_retry,
         method_whitelist=False  # Retry too in non-idempotent methods like POST
     )
-    adapter = HTTPAdapter(max_retries=retry)
+    adapter = HTTPAdapter(max_retries=retry, pool_maxsize=pool_maxsize)
     session.mount('http://', adapter)
     session.mount('https://', adapter)
     return session
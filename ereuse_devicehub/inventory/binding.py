@@ -0,0 +1,212 @@
+"""Binding and unbinding of snapshot devices with placeholders.
+
+Binding moves the actions and tags of the device of the snapshot
+to the device of the placeholder, and deletes the former. Unbinding
+clones the bound device (and its components) as a new abstract
+device. Both used to walk every action, tag and log of the devices
+through the ORM; here the rows are moved with a few UPDATE and
+DELETE statements, so devices with long histories cost the same.
+"""
+
+from typing import Iterable, Set
+
+from flask import g
+from sqlalchemy import inspect
+
+from ereuse_devicehub.db import db
+from ereuse_devicehub.parser.models import PlaceholdersLog, SnapshotsLog
+from ereuse_devicehub.resources import baked
+from ereuse_devicehub.resources.action.models import (
+    ActionDevice,
+    ActionWithOneDevice,
+    LatestErasure,
+)
+from ereuse_devicehub.resources.device.models import Device, Placeholder
+from ereuse_devicehub.resources.device.trading import DeviceTradeState
+from ereuse_devicehub.resources.tag.model import Tag
+
+_action_device = ActionDevice.__table__
+_action_one = ActionWithOneDevice.__table__
+_placeholders_log = PlaceholdersLog.__table__
+_tag = Tag.__table__
+_trade_state = DeviceTradeState.__table__
+
+
+class Binding:
+    """A binding between the device with ``dhid`` and the
+    placeholder with ``phid``, of the user.
+
+    If the binding cannot be done, :attr:`error` says why.
+    """
+
+    def __init__(self, dhid: str, phid: str) -> None:
+        self.dhid = dhid
+        self.phid = phid
+        self.error = None
+        self.get_objects()
+        if not self.error:
+            self.error = self.check_errors()
+
+    def get_objects(self):
+        self.old_device = baked.device(self.dhid, g.user.id).first()
+        self.new_placeholder = baked.placeholder(self.phid, g.user.id).first()
+
+        if not self.old_device or not self.old_device.placeholder:
+            self.error = 'Device Dhid: "{}" not exist!'.format(self.dhid)
+            return
+
+        if not self.new_placeholder:
+            self.error = 'Device Phid: "{}" not exist!'.format(self.phid)
+            return
+
+        if self.old_device.placeholder.status == 'Snapshot':
+            self.new_device = self.new_placeholder.device
+            self.old_placeholder = self.old_device.placeholder
+        elif self.old_device.placeholder.status == 'Placeholder':
+            self.new_device = self.old_device
+            self.old_placeholder = self.new_placeholder
+            self.old_device = self.old_placeholder.device
+            self.new_placeholder = self.new_device.placeholder
+
+        self.abstract_device = self.old_placeholder.binding
+        self.real_dhid = self.new_device.devicehub_id
+        self.real_phid = self.new_placeholder.phid
+        self.abstract_dhid = self.old_device.devicehub_id
+        self.abstract_phid = self.old_placeholder.phid
+
+    def check_errors(self):
+        if self.old_device.placeholder.status != 'Snapshot':
+            return 'Device Dhid: "{}" is not a Snapshot device!'.format(self.dhid)
+
+        if self.new_placeholder.status == 'Twin':
+            return 'Device Phid: "{}" is a Twin device!'.format(self.phid)
+
+        if self.new_placeholder.status == self.old_placeholder.status:
+            txt = 'Device Phid: "{}" and device Dhid: "{}" have the same status, "{}"!'
+            return txt.format(self.phid, self.dhid, self.new_placeholder.status)
+
+    def bind(self):
+        """Binds the devices. The caller commits."""
+        assert not self.error, self.error
+        old_id, new_id = self.old_device.id, self.new_device.id
+
+        if self.old_placeholder.kangaroo:
+            self.new_placeholder.kangaroo = True
+        # to do a backup of abstract_dhid and abstract_phid in
+        # workbench device
+        if self.abstract_device:
+            self.abstract_device.dhid_bk = self.abstract_dhid
+            self.abstract_device.phid_bk = self.abstract_phid
+
+        db.session.execute(
+            _placeholders_log.delete().where(
+                _placeholders_log.c.placeholder_id == self.old_placeholder.id
+            )
+        )
+
+        # Actions of both devices keep the new one, the rest move to it
+        new_actions = db.select([_action_device.c.action_id]).where(
+            _action_device.c.device_id == new_id
+        )
+        db.session.execute(
+            _action_device.delete()
+            .where(_action_device.c.device_id == old_id)
+            .where(_action_device.c.action_id.in_(new_actions))
+        )
+        db.session.execute(
+            _action_device.update()
+            .where(_action_device.c.device_id == old_id)
+            .values(device_id=new_id)
+        )
+        db.session.execute(
+            _action_one.update()
+            .where(_action_one.c.device_id == old_id)
+            .values(device_id=new_id)
+        )
+        # The row of the old device goes with it
+        LatestErasure.refresh([new_id])
+        new_trades = db.select([_trade_state.c.trade_id]).where(
+            _trade_state.c.device_id == new_id
+        )
+        db.session.execute(
+            _trade_state.update()
+            .where(_trade_state.c.device_id == old_id)
+            .where(~_trade_state.c.trade_id.in_(new_trades))
+            .values(device_id=new_id)
+        )
+        db.session.execute(
+            _tag.update().where(_tag.c.device_id == old_id).values(device_id=new_id)
+        )
+
+        # Reload what moved, so deleting the device does not undo it
+        db.session.expire(self.old_device)
+        db.session.expire(self.new_device)
+        db.session.delete(self.old_device)
+        self.abstract_device.binding = self.new_placeholder
+        SnapshotsLog.denormalize_device(self.new_device)
+
+
+def unbind(placeholder: Placeholder) -> Device:
+    """Clones the device bound to the placeholder, and its
+    components, as a new abstract device. The caller commits.
+    """
+    device = placeholder.binding
+    devices = [device] + list(getattr(device, 'components', []))
+    used_dhids = _existing(Device.devicehub_id, (d.dhid_bk for d in devices))
+    used_phids = _existing(Placeholder.phid, (d.phid_bk for d in devices))
+    new_device = _clone(device, used_dhids, used_phids)
+    SnapshotsLog.denormalize_device(device)
+    return new_device
+
+
+def _existing(column, values: Iterable[str]) -> Set[str]:
+    """The values that some row already has in the column."""
+    values = {value for value in values if value}
+    if not values:
+        return set()
+    query = db.session.query(column).filter(column.in_(values))
+    return {value for value, in query}
+
+
+_NOT_CLONED = {'id', 'devicehub_id', 'system_uuid'}
+"""Columns that identify the device, which the clone cannot share."""
+
+
+def _clone(device: Device, used_dhids: Set[str], used_phids: Set[str]) -> Device:
+    if device.binding and device.binding.is_abstract:
+        return
+
+    kangaroo = False
+    if device.binding:
+        kangaroo = device.binding.kangaroo
+        device.binding.kangaroo = False
+
+    columns = {
+        attr.key: getattr(device, attr.key)
+        for attr in inspect(device).mapper.column_attrs
+        if attr.key not in _NOT_CLONED
+    }
+    new_device = device.__class__(**columns)
+    db.session.add(new_device)
+
+    for c in getattr(device, 'components', []):
+        if c.binding:
+            c.binding.device.parent = new_device
+        else:
+            new_c = _clone(c, used_dhids, used_phids)
+            if new_c:
+                new_c.parent = new_device
+
+    placeholder = Placeholder(
+        device=new_device, binding=device, is_abstract=True, kangaroo=kangaroo
+    )
+
+    if device.dhid_bk and device.dhid_bk not in used_dhids:
+        new_device.devicehub_id = device.dhid_bk
+        used_dhids.add(device.dhid_bk)
+    if device.phid_bk and device.phid_bk not in used_phids:
+        placeholder.phid = device.phid_bk
+        used_phids.add(device.phid_bk)
+
+    db.session.add(placeholder)
+    return new_device
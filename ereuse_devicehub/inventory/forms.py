@@ -2,6 +2,7 @@ import copy
 import csv
 import datetime
 import json
+import os
 from json.decoder import JSONDecodeError
 
 import pandas as pd
@@ -31,6 +32,7 @@ from wtforms.fields import FormField
 
 from ereuse_devicehub import messages
 from ereuse_devicehub.db import db
+from ereuse_devicehub.inventory.binding import Binding
 from ereuse_devicehub.inventory.models import (
     DeliveryNote,
     DeviceDocument,
@@ -41,6 +43,8 @@ from ereuse_devicehub.inventory.models import (
 from ereuse_devicehub.parser.models import PlaceholdersLog, SnapshotsLog
 from ereuse_devicehub.parser.parser import ParseSnapshotLsHw, ParseSnapshot
 from ereuse_devicehub.parser.schemas import Snapshot_lite
+from ereuse_devicehub.resources import baked
+from ereuse_devicehub.resources.action import bulk
 from ereuse_devicehub.resources.action.models import Snapshot, Trade, VisualTest
 from ereuse_devicehub.resources.action.schemas import Snapshot as SnapshotSchema
 from ereuse_devicehub.resources.action.views.snapshot import (
@@ -48,6 +52,7 @@ from ereuse_devicehub.resources.action.views.snapshot import (
     move_json,
     save_json,
 )
+from ereuse_devicehub.resources.device.fuzzy import fuzzy_search
 from ereuse_devicehub.resources.device.models import (
     SAI,
     Cellphone,
@@ -138,6 +143,7 @@ DATASTORAGE = ['HardDrive', 'SolidStateDrive']
 
 class AdvancedSearchForm(FlaskForm):
     q = StringField('Search', [validators.length(min=1)])
+    fuzzy = BooleanField('Similar serial numbers, models, tags and ids')
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -153,13 +159,21 @@ class AdvancedSearchForm(FlaskForm):
             self.search(dhids)
 
     def search(self, dhids):
-        query = Device.query.filter(Device.owner_id == g.user.id)
-        self.devices = query.join(Device.placeholder).filter(
-            or_(
-                Device.devicehub_id.in_(dhids),
-                Placeholder.phid.in_(dhids),
+        if not self.fuzzy.data:
+            query = Device.query.filter(Device.owner_id == g.user.id)
+            self.devices = (
+                query.join(Device.placeholder)
+                .filter(
+                    or_(
+                        Device.devicehub_id.in_(dhids),
+                        Placeholder.phid.in_(dhids),
+                    )
+                )
+                .all()
             )
-        )
+        # Serial numbers and tags are typed partially or with mistakes
+        if not self.devices:
+            self.devices = fuzzy_search(self.q.data, g.user.id).all()
 
 
 class FilterForm(FlaskForm):
@@ -272,6 +286,14 @@ class LotForm(FlaskForm):
         return self.instance
 
 
+def file_size(stream) -> int:
+    """The size of an uploaded file, which is left at its start."""
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    return size
+
+
 class UploadSnapshotForm(SnapshotMixin, FlaskForm):
     snapshot = MultipleFileField('Select a Snapshot File', [validators.DataRequired()])
 
@@ -290,22 +312,27 @@ class UploadSnapshotForm(SnapshotMixin, FlaskForm):
             return False
         self.snapshots = []
         self.result = {}
+        max_size = app.config['SNAPSHOT_MAX_SIZE']
         for d in data:
             filename = d.filename
             self.result[filename] = 'Not processed'
-            d = d.stream.read()
-            if not d:
+            size = file_size(d.stream)
+            if not size:
                 self.result[filename] = 'Error, this snapshot is empty'
                 continue
+            if max_size and size > max_size:
+                self.result[filename] = 'Error, this snapshot is too big'
+                continue
 
+            # From bytes, so json detects UTF-16, UTF-32 and the BOM
             try:
-                d_json = json.loads(d)
-            except JSONDecodeError:
+                d_json = json.loads(d.stream.read())
+            except (JSONDecodeError, UnicodeDecodeError):
                 self.result[filename] = 'Error, this snapshot is not a json'
                 continue
 
             uuid_snapshot = d_json.get('uuid')
-            if Snapshot.query.filter(Snapshot.uuid == uuid_snapshot).all():
+            if baked.snapshot_exists(uuid_snapshot):
                 self.result[filename] = 'Error, this snapshot already exists'
                 continue
 
@@ -757,11 +784,7 @@ class TagDeviceForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         self.delete = kwargs.pop('delete', None)
         self.dhid = kwargs.pop('dhid', None)
-        self._device = (
-            Device.query.filter(Device.devicehub_id == self.dhid)
-            .filter(Device.owner_id == g.user.id)
-            .one()
-        )
+        self._device = baked.one(baked.device(self.dhid, g.user.id), Device)
 
         super().__init__(*args, **kwargs)
 
@@ -847,41 +870,58 @@ class ActionFormMixin(FlaskForm):
         if not self.devices.data:
             return False
 
-        self._devices = OrderedSet()
-
-        devices = set(self.devices.data.split(","))
-        self._devices = OrderedSet(
-            Device.query.filter(Device.id.in_(devices))
+        self._devices_loaded = None
+        try:
+            devices = {int(x) for x in self.devices.data.split(",")}
+        except ValueError:
+            return False
+        # Only the ids: users can select thousands of devices
+        query = (
+            db.session.query(Device.id)
+            .filter(Device.id.in_(devices))
             .filter(Device.owner_id == g.user.id)
-            .all()
         )
+        self._device_ids = [device_id for device_id, in query]
 
-        if not self._devices:
+        if not self._device_ids:
             return False
 
         return True
 
+    @property
+    def _devices(self) -> OrderedSet:
+        """The selected devices, loaded the first time they are needed."""
+        if self._devices_loaded is None:
+            query = Device.query.filter(Device.id.in_(self._device_ids))
+            self._devices_loaded = OrderedSet(query.order_by(Device.id))
+        return self._devices_loaded
+
     def generic_validation(self, extra_validators=None):
         # Some times we want check validations without devices list
         return super().validate(extra_validators)
 
     def save(self):
+        """Performs the action to the selected devices in bulk, see
+        :mod:`ereuse_devicehub.resources.action.bulk`.
+        """
         Model = db.Model._decl_class_registry.data[self.type.data]()
         self.instance = Model()
-        devices = self.devices.data
         severity = self.severity.data
-        self.devices.data = self._devices
         self.severity.data = Severity[self.severity.data]
 
-        self.populate_obj(self.instance)
-        db.session.add(self.instance)
+        for name, field in self._fields.items():
+            if name != 'devices':
+                field.populate_obj(self.instance, name)
+        self.perform()
         db.session.commit()
 
-        self.devices.data = devices
         self.severity.data = severity
 
         return self.instance
 
+    def perform(self):
+        bulk.perform(self.instance, self._device_ids)
+
     def check_valid(self):
         if self.type.data in ['', None]:
             return
@@ -967,95 +1007,23 @@ class AllocateForm(ActionFormMixin):
 
     def check_allocate(self):
         txt = "You need to deallocate before allocating this device again"
-        for device in self._devices:
-            # |  Allo  -  Deallo  |  Allo  -  Deallo  |
-
-            allocates = [
-                ac for ac in device.actions if ac.type in ['Allocate', 'Deallocate']
-            ]
-            allocates.sort(key=lambda x: x.start_time)
-            allocates.reverse()
-            last_deallocate = None
-            last_allocate = None
-            for ac in allocates:
-                if (
-                    ac.type == 'Deallocate'
-                    and ac.start_time.date() < self.start_time.data
-                ):
-                    # allow to do the action
-                    break
-
-                # check if this action is between an old allocate - deallocate
-                if ac.type == 'Deallocate':
-                    last_deallocate = ac
-                    continue
-
-                if (
-                    ac.type == 'Allocate'
-                    and ac.start_time.date() > self.start_time.data
-                ):
-                    last_deallocate = None
-                    last_allocate = None
-                    continue
-
-                if ac.type == 'Allocate':
-                    last_allocate = ac
-
-                if last_allocate or not last_deallocate:
-                    self.devices.errors = [txt]
-                    return False
-
-            device.allocated = True
+        # |  Allo  -  Deallo  |  Allo  -  Deallo  |
+        if bulk.not_allocatable(self._device_ids, self.start_time.data):
+            self.devices.errors = [txt]
+            return False
         return True
 
     def check_deallocate(self):
         txt = "Error, some of these devices are actually deallocated"
-        for device in self._devices:
-            allocates = [
-                ac for ac in device.actions if ac.type in ['Allocate', 'Deallocate']
-            ]
-            allocates.sort(key=lambda x: x.start_time)
-            allocates.reverse()
-            last_deallocate = None
-            last_allocate = None
-
-            for ac in allocates:
-                # check if this action is between an old allocate - deallocate
-                # |  Allo  -  Deallo  |  Allo  -  Deallo  |
-                # |  Allo  |
-                if (
-                    ac.type == 'Allocate'
-                    and ac.start_time.date() > self.start_time.data
-                ):
-                    last_allocate = None
-                    last_deallocate = None
-                    continue
-
-                if ac.type == 'Allocate' and not last_deallocate:
-                    last_allocate = ac
-                    break
-
-                if (
-                    ac.type == 'Deallocate'
-                    and ac.start_time.date() > self.start_time.data
-                ):
-                    last_deallocate = ac
-                    continue
-
-                if ac.type == 'Deallocate':
-                    last_allocate = None
-
-                if last_deallocate or not last_allocate:
-                    self.devices.errors = [txt]
-                    return False
-
-            if not last_deallocate and not last_allocate:
-                self.devices.errors = [txt]
-                return False
-
-            device.allocated = False
+        if bulk.not_deallocatable(self._device_ids, self.start_time.data):
+            self.devices.errors = [txt]
+            return False
         return True
 
+    def perform(self):
+        super().perform()
+        bulk.set_allocated(self._device_ids, self.type.data == 'Allocate')
+
 
 class DataWipeDocumentForm(Form):
     date = DateField(
@@ -1094,7 +1062,7 @@ class DataWipeDocumentForm(Form):
         file_hash = ''
         if self.file_name.data:
             file_name = self.file_name.data.filename
-            file_hash = insert_hash(self.file_name.data.read(), commit=False)
+            file_hash = insert_hash(self.file_name.data.stream, commit=False)
 
         self.url.data = URL(self.url.data)
         self._obj = DataWipeDocument(
@@ -1417,7 +1385,7 @@ class TradeDocumentForm(FlaskForm):
 
         if self.file_name.data:
             file_name = self.file_name.data.filename
-            file_hash = insert_hash(self.file_name.data.read(), commit=False)
+            file_hash = insert_hash(self.file_name.data.stream, commit=False)
 
         self.url.data = URL(self.url.data)
         if not self._obj:
@@ -1522,7 +1490,7 @@ class DeviceDocumentForm(FlaskForm):
 
         if self.file_name.data:
             file_name = self.file_name.data.filename
-            file_hash = insert_hash(self.file_name.data.read(), commit=False)
+            file_hash = insert_hash(self.file_name.data.stream, commit=False)
 
         self.url.data = URL(self.url.data)
         if not self._obj:
@@ -1995,9 +1963,8 @@ class BindingForm(FlaskForm):
             return False
 
         if not self.placeholder:
-            self.placeholder = Placeholder.query.filter(
-                Placeholder.phid == self.phid.data.strip(), Placeholder.owner == g.user
-            ).first()
+            phid = self.phid.data.strip()
+            self.placeholder = baked.placeholder(phid, g.user.id).first()
 
         if not self.placeholder:
             txt = "This placeholder doesn't exist."
@@ -2013,6 +1980,88 @@ class BindingForm(FlaskForm):
         return True
 
 
+class BindingBatchForm(FlaskForm):
+    """Binds many snapshot devices with placeholders, from a file
+    with the columns 'DHID' and 'PHID'.
+    """
+
+    binding_file = FileField('Select a Binding File', [validators.DataRequired()])
+
+    def get_data_file(self):
+        files = request.files.getlist(self.binding_file.name)
+
+        if not files:
+            return False
+
+        _file = files[0]
+        if _file.content_type == 'text/csv':
+            data = pd.read_csv(
+                _file, delimiter=';', quotechar='"', quoting=csv.QUOTE_ALL, dtype=str
+            )
+        else:
+            try:
+                data = pd.read_excel(_file, dtype=str)
+            except ValueError:
+                txt = ["File doesn't have a correct format"]
+                self.binding_file.errors = txt
+                return False
+
+        return data.fillna('').to_dict()
+
+    def validate(self, extra_validators=None):
+        is_valid = super().validate(extra_validators)
+
+        if not is_valid:
+            return False
+
+        data = self.get_data_file()
+        if not data:
+            return False
+
+        if 'DHID' not in data.keys() or 'PHID' not in data.keys():
+            txt = ["Missing required fields in the file"]
+            self.binding_file.errors = txt
+            return False
+
+        self.pairs = []
+        for i in data['DHID'].keys():
+            dhid = data['DHID'][i].strip()
+            phid = data['PHID'][i].strip()
+            if dhid or phid:
+                self.pairs.append((dhid, phid))
+
+        dhids = [dhid for dhid, _ in self.pairs]
+        phids = [phid for _, phid in self.pairs]
+        if len(set(dhids)) != len(dhids) or len(set(phids)) != len(phids):
+            txt = ["Every DHID and PHID can only appear once in the file"]
+            self.binding_file.errors = txt
+            return False
+
+        return True
+
+    def save(self, commit=True):
+        """Binds the pairs of the file, skipping those that cannot be
+        bound.
+
+        :return: The number of bindings done and the errors of the
+                 rest.
+        """
+        bound = 0
+        errors = []
+        for dhid, phid in self.pairs:
+            binding = Binding(dhid, phid)
+            if binding.error:
+                errors.append(binding.error)
+                continue
+            binding.bind()
+            bound += 1
+
+        if commit:
+            db.session.commit()
+
+        return bound, errors
+
+
 class UserTrustsForm(FlaskForm):
     snapshot_type = SelectField(
         '',
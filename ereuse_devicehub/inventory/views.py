@@ -1,4 +1,3 @@
-import copy
 import csv
 import datetime
 import logging
@@ -16,14 +15,16 @@ from flask import current_app as app
 from flask import g, make_response, request, url_for, send_file
 from flask.views import View
 from flask_login import current_user, login_required
-from sqlalchemy import or_
 from werkzeug.exceptions import NotFound
+from werkzeug.utils import secure_filename
 
 from ereuse_devicehub import messages
-from ereuse_devicehub.db import db
+from ereuse_devicehub.db import db, read_replica
+from ereuse_devicehub.inventory.binding import Binding, unbind
 from ereuse_devicehub.inventory.forms import (
     AdvancedSearchForm,
     AllocateForm,
+    BindingBatchForm,
     BindingForm,
     CustomerDetailsForm,
     DataWipeForm,
@@ -44,19 +45,18 @@ from ereuse_devicehub.inventory.forms import (
 )
 from ereuse_devicehub.labels.forms import PrintLabelsForm
 from ereuse_devicehub.parser.models import PlaceholdersLog, SnapshotsLog
-from ereuse_devicehub.resources.action.models import EraseBasic, Trade
-from ereuse_devicehub.resources.device.models import (
-    Computer,
-    DataStorage,
-    Device,
-    Mobile,
-    Placeholder,
-)
+from ereuse_devicehub.resources import baked
+from ereuse_devicehub.resources.action.models import EraseBasic, LatestErasure, Trade
+from ereuse_devicehub.resources.device.manufacturers import manufacturers
+from ereuse_devicehub.resources.device.models import Device, Mobile, Placeholder
+from ereuse_devicehub.resources.documents import batch
+from ereuse_devicehub.resources.documents.batch import Document
 from ereuse_devicehub.resources.documents.device_row import ActionRow, DeviceRow
 from ereuse_devicehub.resources.enums import SnapshotSoftware
 from ereuse_devicehub.resources.hash_reports import insert_hash
 from ereuse_devicehub.resources.lot.models import Lot, ShareLot
 from ereuse_devicehub.resources.tag.model import Tag
+from ereuse_devicehub.resources.visibility import visible_device_ids, visible_lot_ids
 from ereuse_devicehub.views import GenericMixin
 
 devices = Blueprint('inventory', __name__, url_prefix='/inventory')
@@ -143,6 +143,7 @@ class DeviceListMixin(GenericMixin):
 
 
 class ErasureListView(DeviceListMixin):
+    decorators = [login_required, read_replica]
     template_name = 'inventory/erasure_list.html'
 
     def dispatch_request(self, orphans=0):
@@ -158,25 +159,12 @@ class ErasureListView(DeviceListMixin):
             EraseBasic.created.desc()
         )
         if orphans:
-            schema = app.config.get('SCHEMA')
-            _user = g.user.id
-            sql = f"""
-                select action.id from {schema}.action as action
-                    inner join {schema}.erase_basic as erase
-                        on action.id=erase.id
-                    inner join {schema}.device as device
-                        on device.id=action.parent_id
-                    inner join {schema}.placeholder as placeholder
-                        on placeholder.binding_id=device.id
-                    where (action.parent_id is null or placeholder.kangaroo=true)
-                    and action.author_id='{_user}'
-            """
-            ids = (e[0] for e in db.session.execute(sql))
-            erasure = (
-                EraseBasic.query.filter(EraseBasic.id.in_(ids))
-                .filter_by(author=g.user)
-                .order_by(EraseBasic.created.desc())
+            # The erasures done in a computer of a placeholder that is
+            # a kangaroo, which the user lends to erase other disks
+            kangaroos = db.select([Placeholder.binding_id]).where(
+                Placeholder.kangaroo.is_(True)
             )
+            erasure = erasure.filter(EraseBasic.parent_id.in_(kangaroos))
             self.context['orphans'] = True
 
         erasure = erasure.paginate(page=page, per_page=per_page)
@@ -186,26 +174,46 @@ class ErasureListView(DeviceListMixin):
 
 
 class DeviceListView(DeviceListMixin):
+    decorators = [login_required, read_replica]
+
     def dispatch_request(self, lot_id=None):
         self.get_context(lot_id)
         return flask.render_template(self.template_name, **self.context)
 
 
 class AllDeviceListView(DeviceListMixin):
+    decorators = [login_required, read_replica]
+
     def dispatch_request(self):
         self.get_context(all_devices=True)
         return flask.render_template(self.template_name, **self.context)
 
 
+class ManufacturersView(View):
+    """The names of the manufacturers that start with ``q``, for the
+    suggestions of the forms, found in memory.
+    """
+
+    decorators = [login_required]
+
+    def dispatch_request(self):
+        text = request.args.get('q', '').strip()
+        if not text:
+            return flask.jsonify([])
+        found = manufacturers().starting_with(text, app.config['MANUFACTURERS_LIMIT'])
+        return flask.jsonify([m.name for m in found])
+
+
 class AdvancedSearchView(DeviceListMixin):
     methods = ['GET', 'POST']
+    decorators = [login_required, read_replica]
     template_name = 'inventory/search.html'
     title = "Advanced Search"
 
     def dispatch_request(self):
         query = request.args.get('q', '')
         self.get_context()
-        form = AdvancedSearchForm(q=query)
+        form = AdvancedSearchForm(q=query, fuzzy=request.args.get('fuzzy'))
         self.context.update({'devices': form.devices, 'advanced_form': form})
         return flask.render_template(self.template_name, **self.context)
 
@@ -217,11 +225,7 @@ class DeviceDetailView(GenericMixin):
 
     def dispatch_request(self, id):
         self.get_context()
-        device = (
-            Device.query.filter(Device.owner_id == current_user.id)
-            .filter(Device.devicehub_id == id)
-            .one()
-        )
+        device = baked.one(baked.device(id, current_user.id), Device)
 
         form_tags = TagDeviceForm(dhid=id)
         placeholder = device.binding or device.placeholder
@@ -254,11 +258,7 @@ class BindingSearchView(GenericMixin):
 
     def dispatch_request(self, dhid):
         self.get_context()
-        device = (
-            Device.query.filter(Device.owner_id == current_user.id)
-            .filter(Device.devicehub_id == dhid)
-            .one()
-        )
+        device = baked.one(baked.device(dhid, current_user.id), Device)
 
         form_binding = BindingForm(device=device)
 
@@ -293,129 +293,80 @@ class BindingView(GenericMixin):
         self.dhid = dhid
         self.next_url = url_for('inventory.device_details', id=dhid)
         self.get_context()
-        self.get_objects()
-        if self.check_errors():
+        self.binding = Binding(dhid, phid)
+        if self.binding.error:
+            messages.error(self.binding.error)
             return flask.redirect(self.next_url)
 
         if request.method == 'POST':
             return self.post()
 
+        binding = self.binding
         self.context.update(
             {
-                'new_placeholder': self.new_placeholder,
-                'old_placeholder': self.old_placeholder,
+                'new_placeholder': binding.new_placeholder,
+                'old_placeholder': binding.old_placeholder,
                 'page_title': 'Binding confirm',
-                'actions': list(self.old_device.actions)
-                + list(self.new_device.actions),
-                'tags': list(self.old_device.tags) + list(self.new_device.tags),
+                'actions': list(binding.old_device.actions)
+                + list(binding.new_device.actions),
+                'tags': list(binding.old_device.tags) + list(binding.new_device.tags),
                 'dhid': self.dhid,
             }
         )
 
         return flask.render_template(self.template_name, **self.context)
 
-    def check_errors(self):
-        if not self.new_placeholder:
-            messages.error('Device Phid: "{}" not exist!'.format(self.phid))
-            return True
-
-        if self.old_device.placeholder.status != 'Snapshot':
-            messages.error(
-                'Device Dhid: "{}" is not a Snapshot device!'.format(self.dhid)
-            )
-            return True
-
-        if self.new_placeholder.status == 'Twin':
-            messages.error('Device Phid: "{}" is a Twin device!'.format(self.phid))
-            return True
-
-        if self.new_placeholder.status == self.old_placeholder.status:
-            txt = 'Device Phid: "{}" and device Dhid: "{}" have the same status, "{}"!'.format(
-                self.phid, self.dhid, self.new_placeholder.status
-            )
-            messages.error(txt)
-            return True
-
-    def get_objects(self):
-        self.old_device = (
-            Device.query.filter(Device.owner_id == g.user.id)
-            .filter(Device.devicehub_id == self.dhid)
-            .one()
-        )
-        self.new_placeholder = (
-            Placeholder.query.filter(Placeholder.owner_id == g.user.id)
-            .filter(Placeholder.phid == self.phid)
-            .first()
-        )
-
-        if not self.new_placeholder:
-            return
-
-        if self.old_device.placeholder.status == 'Snapshot':
-            self.new_device = self.new_placeholder.device
-            self.old_placeholder = self.old_device.placeholder
-        elif self.old_device.placeholder.status == 'Placeholder':
-            self.new_device = self.old_device
-            self.old_placeholder = self.new_placeholder
-            self.old_device = self.old_placeholder.device
-            self.new_placeholder = self.new_device.placeholder
-
-        self.abstract_device = self.old_placeholder.binding
-        self.real_dhid = self.new_device.devicehub_id
-        self.real_phid = self.new_placeholder.phid
-        self.abstract_dhid = self.old_device.devicehub_id
-        self.abstract_phid = self.old_placeholder.phid
-        if self.old_placeholder.kangaroo:
-            self.new_placeholder.kangaroo = True
-
-        # to do a backup of abstract_dhid and abstract_phid in
-        # workbench device
-        if self.abstract_device:
-            self.abstract_device.dhid_bk = self.abstract_dhid
-            self.abstract_device.phid_bk = self.abstract_phid
-
     def post(self):
-        for plog in PlaceholdersLog.query.filter_by(
-            placeholder_id=self.old_placeholder.id
-        ):
-            db.session.delete(plog)
-
-        for ac in self.old_device.actions:
-            ac.devices.add(self.new_device)
-            ac.devices.remove(self.old_device)
-            for act in ac.actions_device:
-                if act.device == self.old_device:
-                    db.session.delete(act)
-
-        for tag in list(self.old_device.tags):
-            tag.device = self.new_device
-
-        db.session.delete(self.old_device)
-        self.abstract_device.binding = self.new_placeholder
+        binding = self.binding
+        binding.bind()
         db.session.commit()
 
-        next_url = url_for('inventory.device_details', id=self.real_dhid)
+        next_url = url_for('inventory.device_details', id=binding.real_dhid)
         txt = 'Device placeholder with PHID: {} and DHID: {} bind successfully with '
         txt += 'device snapshot PHID: {} DHID: {}.'
         messages.success(
             txt.format(
-                self.real_phid, self.real_dhid, self.abstract_phid, self.abstract_dhid
+                binding.real_phid,
+                binding.real_dhid,
+                binding.abstract_phid,
+                binding.abstract_dhid,
             )
         )
         return flask.redirect(next_url)
 
 
+class BindingBatchView(GenericMixin):
+    methods = ['GET', 'POST']
+    decorators = [login_required]
+    template_name = 'inventory/binding_batch.html'
+
+    def dispatch_request(self):
+        self.get_context()
+        form = BindingBatchForm()
+        self.context.update(
+            {
+                'page_title': 'Binding in batch',
+                'form': form,
+            }
+        )
+        if form.validate_on_submit():
+            bound, errors = form.save()
+            if bound:
+                messages.success('{} devices bind successfully.'.format(bound))
+            for error in errors:
+                messages.error(error)
+            return flask.redirect(url_for('inventory.devicelist'))
+
+        return flask.render_template(self.template_name, **self.context)
+
+
 class UnBindingView(GenericMixin):
     methods = ['GET', 'POST']
     decorators = [login_required]
     template_name = 'inventory/unbinding.html'
 
     def dispatch_request(self, phid):
-        placeholder = (
-            Placeholder.query.filter(Placeholder.owner_id == g.user.id)
-            .filter(Placeholder.phid == phid)
-            .one()
-        )
+        placeholder = baked.one(baked.placeholder(phid, g.user.id), Placeholder)
         if not placeholder.binding or placeholder.status != 'Twin':
             next_url = url_for(
                 'inventory.device_details', id=placeholder.device.devicehub_id
@@ -432,7 +383,8 @@ class UnBindingView(GenericMixin):
 
         if request.method == 'POST':
             dhid = placeholder.device.devicehub_id
-            self.clone_device(placeholder.binding)
+            unbind(placeholder)
+            db.session.commit()
             next_url = url_for('inventory.device_details', id=dhid)
             messages.success(
                 'Device with PHID:"{}" and DHID: {} unbind successfully!'.format(
@@ -450,57 +402,6 @@ class UnBindingView(GenericMixin):
 
         return flask.render_template(self.template_name, **self.context)
 
-    def clone_device(self, device):
-        if device.binding and device.binding.is_abstract:
-            return
-
-        kangaroo = False
-        if device.binding:
-            kangaroo = device.binding.kangaroo
-            device.binding.kangaroo = False
-
-        dict_device = copy.copy(device.__dict__)
-        dict_device.pop('_sa_instance_state')
-        dict_device.pop('id', None)
-        dict_device.pop('devicehub_id', None)
-        dict_device.pop('actions_multiple', None)
-        dict_device.pop('actions_one', None)
-        dict_device.pop('components', None)
-        dict_device.pop('tags', None)
-        dict_device.pop('system_uuid', None)
-        dict_device.pop('binding', None)
-        dict_device.pop('placeholder', None)
-        new_device = device.__class__(**dict_device)
-        db.session.add(new_device)
-
-        if hasattr(device, 'components'):
-            for c in device.components:
-                if c.binding:
-                    c.binding.device.parent = new_device
-                else:
-                    new_c = self.clone_device(c)
-                    new_c.parent = new_device
-
-        placeholder = Placeholder(
-            device=new_device, binding=device, is_abstract=True, kangaroo=kangaroo
-        )
-
-        if (
-            device.dhid_bk
-            and not Device.query.filter_by(devicehub_id=device.dhid_bk).first()
-        ):
-            new_device.devicehub_id = device.dhid_bk
-        if (
-            device.phid_bk
-            and not Placeholder.query.filter_by(phid=device.phid_bk).first()
-        ):
-            placeholder.phid = device.phid_bk
-
-        db.session.add(placeholder)
-        db.session.commit()
-
-        return new_device
-
 
 class LotCreateView(GenericMixin):
     methods = ['GET', 'POST']
@@ -671,11 +572,7 @@ class DeviceEditView(GenericMixin):
 
     def dispatch_request(self, id):
         self.get_context()
-        device = (
-            Device.query.filter(Device.owner_id == current_user.id)
-            .filter(Device.devicehub_id == id)
-            .one()
-        )
+        device = baked.one(baked.device(id, current_user.id), Device)
         form = NewDeviceForm(_obj=device)
         self.context.update(
             {
@@ -1005,7 +902,7 @@ class EditTransferView(GenericMixin):
 
 class ExportsView(View):
     methods = ['GET']
-    decorators = [login_required]
+    decorators = [login_required, read_replica]
 
     def dispatch_request(self, export_id):
         export_ids = {
@@ -1014,6 +911,7 @@ class ExportsView(View):
             'compare_devices': self.compare_devices_list,
             'actions_erasures': self.actions_erasures,
             'certificates': self.erasure,
+            'lots_certificates': self.lots_erasures,
             'lots': self.lots_export,
             'devices_lots': self.devices_lots_export,
             'obada_standard': self.obada_standard_export,
@@ -1025,20 +923,10 @@ class ExportsView(View):
         return export_ids[export_id]()
 
     def find_devices(self):
-        sql = """
-            select lot_device.device_id as id from {schema}.share_lot as share
-                inner join {schema}.lot_device as lot_device
-                    on share.lot_id=lot_device.lot_id
-                where share.user_to_id='{user_id}'
-        """.format(
-            schema=app.config.get('SCHEMA'), user_id=g.user.id
-        )
-
-        shared = (x[0] for x in db.session.execute(sql))
-
         args = request.args.get('ids')
         ids = args.split(',') if args else []
-        query = Device.query.filter(or_(Device.owner == g.user, Device.id.in_(shared)))
+        visible = visible_device_ids(g.user.id, traded=False)
+        query = Device.query.filter(Device.id.in_(visible))
         return query.filter(Device.devicehub_id.in_(ids))
 
     def response_csv(self, data, name):
@@ -1057,14 +945,10 @@ class ExportsView(View):
 
         output = BytesIO()
         df.to_excel(output, index=False, sheet_name='Page1', engine='xlsxwriter')
+        with output.getbuffer() as report:
+            insert_hash(report)
         output.seek(0)
 
-        output2 = BytesIO()
-        df.to_excel(output2, index=False, sheet_name='Page1', engine='xlsxwriter')
-        output2.seek(0)
-
-
-        insert_hash(output2.read())
         return send_file(
             output,
             as_attachment=True,
@@ -1193,6 +1077,39 @@ class ExportsView(View):
         insert_hash(res.data)
         return res
 
+    def lots_erasures(self):
+        """The erasure certificates of many lots, in a ZIP file."""
+        args = request.args.get('ids')
+        ids = []
+        for id in args.split(',') if args else []:
+            try:
+                ids.append(uuid.UUID(id.strip()))
+            except ValueError:
+                continue
+        visible = visible_device_ids(g.user.id, traded=False)
+        lots = Lot.query.filter(Lot.id.in_(visible_lot_ids(g.user.id)))
+        lots = lots.filter(Lot.id.in_(ids)).order_by(Lot.name)
+
+        documents = []
+        for lot in lots:
+            devices = Device.query.filter(Device.id.in_(visible))
+            devices = devices.filter(Device.lots.any(Lot.id == lot.id))
+            html = self.build_erasure_certificate(devices, lot)
+            name = 'erasure-certificate-{}-{}.pdf'.format(lot.name, lot.id)
+            documents.append(Document(secure_filename(name), html))
+
+        data, pdfs = batch.render_zip(
+            documents, request.url_root, app.config['CERTIFICATES_PROCESSES']
+        )
+        for pdf in pdfs:
+            insert_hash(pdf)
+        return send_file(
+            BytesIO(data),
+            as_attachment=True,
+            attachment_filename='erasure-certificates.zip',
+            mimetype='application/zip',
+        )
+
     def actions_erasures(self):
 
         l_devs = []
@@ -1218,32 +1135,24 @@ class ExportsView(View):
 
         return self.download_xls(l_devs, "Erasures.xlsx")
 
-    def get_datastorages(self):
-        erasures = []
-        for device in self.find_devices():
-            if device.placeholder and device.placeholder.binding:
-                device = device.placeholder.binding
-            if isinstance(device, Computer):
-                for ac in device.last_erase_action:
-                    erasures.append(ac)
-            elif isinstance(device, DataStorage):
-                ac = device.last_erase_action
-                if ac:
-                    erasures.append(ac)
-            elif isinstance(device, Mobile):
-                ac = device.last_erase_action
-                if ac:
-                    erasures.append(ac)
-        return erasures
-
-    def get_costum_details(self, erasures):
+    def get_datastorages(self, devices=None):
+        if devices is None:
+            devices = self.find_devices()
+        devices = devices.with_entities(Device.id).subquery()
+        storages = LatestErasure.storages_of(db.select([devices.c.id]))
+        return LatestErasure.erasures(storages).all()
+
+    def get_costum_details(self, erasures, lot=None):
         my_data = None
         customer_details = None
-        lot = None
 
         if hasattr(g.user, 'sanitization_entity'):
             my_data = g.user.sanitization_entity
 
+        if lot:
+            customer_details = lot.transfer and lot.transfer.customer_details
+            return my_data, customer_details
+
         customer_details = self.get_customer_details_from_request()
 
         if not erasures or customer_details:
@@ -1291,15 +1200,15 @@ class ExportsView(View):
                 pass
         return erasures_host, erasures_on_server, erasures_mobile
 
-    def build_erasure_certificate(self):
-        erasures = self.get_datastorages()
+    def build_erasure_certificate(self, devices=None, lot=None):
+        erasures = self.get_datastorages(devices)
         software = 'USODY DRIVE ERASURE'
         if erasures and erasures[0].snapshot:
             software += ' {}'.format(
                 erasures[0].snapshot.version,
             )
 
-        my_data, customer_details = self.get_costum_details(erasures)
+        my_data, customer_details = self.get_costum_details(erasures, lot)
 
         a, b, c = self.get_server_erasure_hosts(erasures)
         erasures_host, erasures_on_server, erasures_mobile = a, b, c
@@ -1448,6 +1357,7 @@ class ExportsView(View):
 
 
 class SnapshotListView(GenericMixin):
+    decorators = [login_required, read_replica]
     template_name = 'inventory/snapshots_list.html'
 
     def dispatch_request(self):
@@ -1617,6 +1527,7 @@ class UploadPlaceholderView(GenericMixin):
 
 
 class PlaceholderLogListView(GenericMixin):
+    decorators = [login_required, read_replica]
     template_name = 'inventory/placeholder_log_list.html'
 
     def dispatch_request(self):
@@ -1680,6 +1591,9 @@ devices.add_url_rule(
 devices.add_url_rule(
     '/search/', view_func=AdvancedSearchView.as_view('advanced_search')
 )
+devices.add_url_rule(
+    '/manufacturers/', view_func=ManufacturersView.as_view('manufacturers')
+)
 devices.add_url_rule(
     '/device/<string:id>/', view_func=DeviceDetailView.as_view('device_details')
 )
@@ -1760,6 +1674,9 @@ devices.add_url_rule(
 devices.add_url_rule(
     '/binding/<string:dhid>/<string:phid>/', view_func=BindingView.as_view('binding')
 )
+devices.add_url_rule(
+    '/binding/batch/', view_func=BindingBatchView.as_view('binding_batch')
+)
 devices.add_url_rule(
     '/unbinding/<string:phid>/', view_func=UnBindingView.as_view('unbinding')
 )
@@ -1,3 +1,4 @@
+from flask import current_app as app
 from flask import g
 from flask_wtf import FlaskForm
 from wtforms import IntegerField, StringField, validators
@@ -40,7 +41,7 @@ class TagUnnamedForm(FlaskForm):
 
     def save(self):
         num = self.amount.data
-        tags_id, _ = g.tag_provider.post('/', {}, query=[('num', num)])
+        tags_id = app.tag_provider.reserve(num)
         tags = [Tag(id=tag_id, provider=g.inventory.tag_provider) for tag_id in tags_id]
         db.session.add_all(tags)
         db.session.commit()
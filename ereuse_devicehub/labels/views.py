@@ -8,7 +8,7 @@ from requests.exceptions import ConnectionError
 
 from ereuse_devicehub import __version__, messages
 from ereuse_devicehub.labels.forms import PrintLabelsForm, TagForm, TagUnnamedForm
-from ereuse_devicehub.resources.lot.models import Lot, ShareLot
+from ereuse_devicehub.resources.lot.summary import lot_summary_cache
 from ereuse_devicehub.resources.tag.model import Tag
 
 labels = Blueprint('labels', __name__, url_prefix='/labels')
@@ -22,17 +22,15 @@ class TagListView(View):
     template_name = 'labels/label_list.html'
 
     def dispatch_request(self):
-        lots = Lot.query.filter(Lot.owner_id == current_user.id)
-        share_lots = ShareLot.query.filter_by(user_to_id=current_user.id)
+        user_lots = lot_summary_cache.get(current_user.id).owned()
         tags = Tag.query.filter(Tag.owner_id == current_user.id).order_by(
             Tag.created.desc()
         )
         context = {
-            'lots': lots,
+            'user_lots': user_lots,
             'tags': tags,
             'page_title': 'Unique Identifiers Management',
             'version': __version__,
-            'share_lots': share_lots,
         }
         return flask.render_template(self.template_name, **context)
 
@@ -43,13 +41,11 @@ class TagAddView(View):
     template_name = 'labels/tag_create.html'
 
     def dispatch_request(self):
-        lots = Lot.query.filter(Lot.owner_id == current_user.id)
-        share_lots = ShareLot.query.filter_by(user_to_id=current_user.id)
+        user_lots = lot_summary_cache.get(current_user.id).owned()
         context = {
             'page_title': 'New Tag',
-            'lots': lots,
+            'user_lots': user_lots,
             'version': __version__,
-            'share_lots': share_lots,
         }
         form = TagForm()
         if form.validate_on_submit():
@@ -66,13 +62,11 @@ class TagAddUnnamedView(View):
     template_name = 'labels/tag_create_unnamed.html'
 
     def dispatch_request(self):
-        lots = Lot.query.filter(Lot.owner_id == current_user.id)
-        share_lots = ShareLot.query.filter_by(user_to_id=current_user.id)
+        user_lots = lot_summary_cache.get(current_user.id).owned()
         context = {
             'page_title': 'New Unnamed Tag',
-            'lots': lots,
+            'user_lots': user_lots,
             'version': __version__,
-            'share_lots': share_lots,
         }
         form = TagUnnamedForm()
         if form.validate_on_submit():
@@ -103,14 +97,12 @@ class PrintLabelsView(View):
     title = 'Design and implementation of labels'
 
     def dispatch_request(self):
-        lots = Lot.query.filter(Lot.owner_id == current_user.id)
-        share_lots = ShareLot.query.filter_by(user_to_id=current_user.id)
+        user_lots = lot_summary_cache.get(current_user.id).owned()
         context = {
-            'lots': lots,
+            'user_lots': user_lots,
             'page_title': self.title,
             'version': __version__,
             'referrer': request.referrer,
-            'share_lots': share_lots,
         }
 
         form = PrintLabelsForm()
@@ -134,17 +126,15 @@ class LabelDetailView(View):
     title = 'Design and implementation of labels'
 
     def dispatch_request(self, id):
-        lots = Lot.query.filter(Lot.owner_id == current_user.id)
-        share_lots = ShareLot.query.filter_by(user_to_id=current_user.id)
+        user_lots = lot_summary_cache.get(current_user.id).owned()
         tag = (
             Tag.query.filter(Tag.owner_id == current_user.id).filter(Tag.id == id).one()
         )
         context = {
-            'lots': lots,
+            'user_lots': user_lots,
             'page_title': self.title,
             'version': __version__,
             'referrer': request.referrer,
-            'share_lots': share_lots,
         }
 
         devices = []
@@ -0,0 +1,45 @@
+"""report hash unique
+
+Revision ID: 2f4b8e1c6a90
+Revises: b660f18f83c6
+Create Date: 2026-10-19 13:02:47.661204
+
+"""
+from alembic import context, op
+
+# revision identifiers, used by Alembic.
+revision = '2f4b8e1c6a90'
+down_revision = 'b660f18f83c6'
+branch_labels = None
+depends_on = None
+
+
+def get_inv():
+    INV = context.get_x_argument(as_dictionary=True).get('inventory')
+    if not INV:
+        raise ValueError("Inventory value is not specified")
+    return INV
+
+
+def upgrade():
+    # Keep only the first registration of every hash
+    op.execute(
+        f"""
+        DELETE FROM {get_inv()}.report_hash a
+        USING {get_inv()}.report_hash b
+        WHERE a.hash3 = b.hash3 AND (a.created, a.id) > (b.created, b.id);
+        """
+    )
+    op.create_index(
+        'report_hash_hash3_index',
+        'report_hash',
+        ['hash3'],
+        unique=True,
+        schema=f'{get_inv()}',
+    )
+
+
+def downgrade():
+    op.drop_index(
+        'report_hash_hash3_index', table_name='report_hash', schema=f'{get_inv()}'
+    )
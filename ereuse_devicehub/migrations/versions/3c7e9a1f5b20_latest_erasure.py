@@ -0,0 +1,92 @@
+"""latest erasure
+
+Revision ID: 3c7e9a1f5b20
+Revises: b8f1d3a6c2e4
+Create Date: 2026-10-19 18:02:37.418230
+
+"""
+import sqlalchemy as sa
+from alembic import context, op
+from sqlalchemy.dialects import postgresql
+
+from ereuse_devicehub import teal
+from ereuse_devicehub.resources.enums import Severity
+
+# revision identifiers, used by Alembic.
+revision = '3c7e9a1f5b20'
+down_revision = 'b8f1d3a6c2e4'
+branch_labels = None
+depends_on = None
+
+
+def get_inv():
+    INV = context.get_x_argument(as_dictionary=True).get('inventory')
+    if not INV:
+        raise ValueError("Inventory value is not specified")
+    return INV
+
+
+def upgrade():
+    op.create_table(
+        'latest_erasure',
+        sa.Column('device_id', sa.BigInteger(), nullable=False),
+        sa.Column('erasure_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column(
+            'host_id',
+            sa.BigInteger(),
+            nullable=True,
+            comment='The computer where the device was erased.',
+        ),
+        sa.Column('severity', teal.db.IntEnum(Severity), nullable=False),
+        sa.Column(
+            'created',
+            sa.TIMESTAMP(timezone=True),
+            nullable=False,
+            comment='When Devicehub created the erasure.',
+        ),
+        sa.ForeignKeyConstraint(
+            ['device_id'], [f'{get_inv()}.device.id'], ondelete='CASCADE'
+        ),
+        sa.ForeignKeyConstraint(
+            ['erasure_id'], [f'{get_inv()}.erase_basic.id'], ondelete='CASCADE'
+        ),
+        sa.ForeignKeyConstraint(
+            ['host_id'], [f'{get_inv()}.device.id'], ondelete='SET NULL'
+        ),
+        sa.PrimaryKeyConstraint('device_id'),
+        schema=f'{get_inv()}',
+    )
+    op.create_index(
+        'latest_erasure_erasure_id_index',
+        'latest_erasure',
+        ['erasure_id'],
+        unique=False,
+        postgresql_using='hash',
+        schema=f'{get_inv()}',
+    )
+
+    # The last erasure of the devices erased until now
+    op.execute(
+        f"""
+        insert into {get_inv()}.latest_erasure
+            (device_id, erasure_id, host_id, severity, created)
+        select distinct on (one.device_id)
+            one.device_id, action.id, action.parent_id, action.severity,
+            action.created
+        from {get_inv()}.action as action
+            inner join {get_inv()}.action_with_one_device as one
+                on one.id=action.id
+            inner join {get_inv()}.erase_basic as erase
+                on erase.id=action.id
+        order by one.device_id, action.created desc, action.id desc
+        """
+    )
+
+
+def downgrade():
+    op.drop_index(
+        'latest_erasure_erasure_id_index',
+        table_name='latest_erasure',
+        schema=f'{get_inv()}',
+    )
+    op.drop_table('latest_erasure', schema=f'{get_inv()}')
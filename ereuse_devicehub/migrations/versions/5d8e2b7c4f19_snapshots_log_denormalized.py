@@ -0,0 +1,84 @@
+"""snapshots log denormalized
+
+Revision ID: 5d8e2b7c4f19
+Revises: c4d1e7a9b352
+Create Date: 2026-10-19 16:02:37.118204
+
+"""
+import citext
+import sqlalchemy as sa
+from alembic import context, op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '5d8e2b7c4f19'
+down_revision = 'c4d1e7a9b352'
+branch_labels = None
+depends_on = None
+
+
+def get_inv():
+    INV = context.get_x_argument(as_dictionary=True).get('inventory')
+    if not INV:
+        raise ValueError("Inventory value is not specified")
+    return INV
+
+
+def upgrade():
+    for name in 'dhid', 'original_dhid', 'placeholder_status', 'new_device':
+        op.add_column(
+            'snapshots_log',
+            sa.Column(name, citext.CIText(), nullable=True),
+            schema=f'{get_inv()}',
+        )
+    op.add_column(
+        'snapshots_log',
+        sa.Column('system_uuid', postgresql.UUID(as_uuid=True), nullable=True),
+        schema=f'{get_inv()}',
+    )
+    op.add_column(
+        'snapshots_log',
+        sa.Column('display_version', citext.CIText(), nullable=True),
+        schema=f'{get_inv()}',
+    )
+    op.create_index(
+        'snapshots_log_owner_id_created_index',
+        'snapshots_log',
+        ['owner_id', 'created'],
+        unique=False,
+        schema=f'{get_inv()}',
+    )
+    op.create_index(
+        'snapshots_log_snapshot_uuid_index',
+        'snapshots_log',
+        ['snapshot_uuid'],
+        unique=False,
+        schema=f'{get_inv()}',
+    )
+    # The logs of snapshots are computed by ``flask snapshots_log_backfill``
+    op.execute(
+        f"""update {get_inv()}.snapshots_log set display_version = version
+        where snapshot_id is null"""
+    )
+
+
+def downgrade():
+    op.drop_index(
+        'snapshots_log_snapshot_uuid_index',
+        table_name='snapshots_log',
+        schema=f'{get_inv()}',
+    )
+    op.drop_index(
+        'snapshots_log_owner_id_created_index',
+        table_name='snapshots_log',
+        schema=f'{get_inv()}',
+    )
+    for name in (
+        'display_version',
+        'system_uuid',
+        'new_device',
+        'placeholder_status',
+        'original_dhid',
+        'dhid',
+    ):
+        op.drop_column('snapshots_log', name, schema=f'{get_inv()}')
@@ -0,0 +1,48 @@
+"""visibility indexes
+
+Revision ID: 73b97027e6c2
+Revises: 57e6201f280c
+Create Date: 2026-10-19 10:12:31.104512
+
+"""
+from alembic import context, op
+
+# revision identifiers, used by Alembic.
+revision = '73b97027e6c2'
+down_revision = '57e6201f280c'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('device_owner_id_index', 'device', 'owner_id'),
+    ('action_device_action_id_index', 'action_device', 'action_id'),
+    ('trade_user_from_id_index', 'trade', 'user_from_id'),
+    ('trade_user_to_id_index', 'trade', 'user_to_id'),
+    ('trade_lot_id_index', 'trade', 'lot_id'),
+    ('lot_device_lot_id_index', 'lot_device', 'lot_id'),
+    ('share_lot_user_to_id_index', 'share_lot', 'user_to_id'),
+]
+
+
+def get_inv():
+    INV = context.get_x_argument(as_dictionary=True).get('inventory')
+    if not INV:
+        raise ValueError("Inventory value is not specified")
+    return INV
+
+
+def upgrade():
+    for name, table, column in INDEXES:
+        op.create_index(
+            name,
+            table,
+            [column],
+            unique=False,
+            postgresql_using='hash',
+            schema=f'{get_inv()}',
+        )
+
+
+def downgrade():
+    for name, table, _ in INDEXES:
+        op.drop_index(name, table_name=table, schema=f'{get_inv()}')
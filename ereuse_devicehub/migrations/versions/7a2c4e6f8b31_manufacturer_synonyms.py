@@ -0,0 +1,63 @@
+"""manufacturer synonyms
+
+Revision ID: 7a2c4e6f8b31
+Revises: 3c7e9a1f5b20
+Create Date: 2026-10-19 18:46:05.127904
+
+"""
+from alembic import context, op
+
+# revision identifiers, used by Alembic.
+revision = '7a2c4e6f8b31'
+down_revision = '3c7e9a1f5b20'
+branch_labels = None
+depends_on = None
+
+# The synonyms that the search had in its code
+SYNONYMS = [('asus', 'asus', 'B')] + [
+    (pattern, token, weight)
+    for pattern in ('h.p', 'hewlett', 'hp')
+    for token, weight in (('h.p', 'C'), ('hewlett', 'C'), ('hp', 'B'), ('packard', 'C'))
+]
+
+
+def get_inv():
+    INV = context.get_x_argument(as_dictionary=True).get('inventory')
+    if not INV:
+        raise ValueError("Inventory value is not specified")
+    return INV
+
+
+def upgrade():
+    # The table is in the common schema, shared by all the inventories
+    op.execute(
+        """
+        create table if not exists common.manufacturer_synonym (
+            pattern varchar not null,
+            token varchar not null,
+            weight varchar(1) not null check (weight in ('A', 'B', 'C', 'D')),
+            primary key (pattern, token)
+        )
+        """
+    )
+    op.execute(
+        "comment on column common.manufacturer_synonym.pattern is "
+        "'Lowercase text that the name of the manufacturer\n    contains.\n    '"
+    )
+    op.execute(
+        "comment on column common.manufacturer_synonym.token is "
+        "'The word that the search finds.'"
+    )
+    op.execute(
+        "comment on column common.manufacturer_synonym.weight is "
+        "'The weight of the word, from A to D.'"
+    )
+    values = ', '.join("('{}', '{}', '{}')".format(*synonym) for synonym in SYNONYMS)
+    op.execute(
+        "insert into common.manufacturer_synonym (pattern, token, weight) "
+        "values {} on conflict do nothing".format(values)
+    )
+
+
+def downgrade():
+    op.execute("drop table if exists common.manufacturer_synonym")
@@ -0,0 +1,29 @@
+"""lot summary sequence
+
+Revision ID: b660f18f83c6
+Revises: 73b97027e6c2
+Create Date: 2026-10-19 11:40:05.218376
+
+"""
+from alembic import context, op
+
+# revision identifiers, used by Alembic.
+revision = 'b660f18f83c6'
+down_revision = '73b97027e6c2'
+branch_labels = None
+depends_on = None
+
+
+def get_inv():
+    INV = context.get_x_argument(as_dictionary=True).get('inventory')
+    if not INV:
+        raise ValueError("Inventory value is not specified")
+    return INV
+
+
+def upgrade():
+    op.execute(f"CREATE SEQUENCE {get_inv()}.lot_summary_seq START 1;")
+
+
+def downgrade():
+    op.execute(f"DROP SEQUENCE {get_inv()}.lot_summary_seq;")
@@ -0,0 +1,57 @@
+"""fuzzy search trigrams
+
+Revision ID: b8f1d3a6c2e4
+Revises: 5d8e2b7c4f19
+Create Date: 2026-10-19 17:11:52.604381
+
+"""
+import sqlalchemy as sa
+from alembic import context, op
+
+# revision identifiers, used by Alembic.
+revision = 'b8f1d3a6c2e4'
+down_revision = '5d8e2b7c4f19'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ('device_serial_number_trgm', 'device', 'serial_number'),
+    ('device_model_trgm', 'device', 'model'),
+    ('device_manufacturer_trgm', 'device', 'manufacturer'),
+    ('tag_id_trgm', 'tag', '(id::text)'),
+    (
+        'placeholder_id_device_supplier_trgm',
+        'placeholder',
+        '(id_device_supplier::text)',
+    ),
+    (
+        'placeholder_id_device_internal_trgm',
+        'placeholder',
+        '(id_device_internal::text)',
+    ),
+)
+
+
+def get_inv():
+    INV = context.get_x_argument(as_dictionary=True).get('inventory')
+    if not INV:
+        raise ValueError("Inventory value is not specified")
+    return INV
+
+
+def upgrade():
+    # pg_trgm is already used by the index of the manufacturers
+    for name, table, expression in INDEXES:
+        op.create_index(
+            name,
+            table,
+            [sa.text('{} gin_trgm_ops'.format(expression))],
+            unique=False,
+            postgresql_using='gin',
+            schema=f'{get_inv()}',
+        )
+
+
+def downgrade():
+    for name, table, _ in INDEXES:
+        op.drop_index(name, table_name=table, schema=f'{get_inv()}')
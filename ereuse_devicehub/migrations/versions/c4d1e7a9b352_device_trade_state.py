@@ -0,0 +1,95 @@
+"""device trade state
+
+Revision ID: c4d1e7a9b352
+Revises: 2f4b8e1c6a90
+Create Date: 2026-10-19 14:21:09.482113
+
+"""
+import sqlalchemy as sa
+from alembic import context, op
+from sqlalchemy.dialects import postgresql
+
+from ereuse_devicehub.resources.device.trading import states_of_confirms
+
+# revision identifiers, used by Alembic.
+revision = 'c4d1e7a9b352'
+down_revision = '2f4b8e1c6a90'
+branch_labels = None
+depends_on = None
+
+
+def get_inv():
+    INV = context.get_x_argument(as_dictionary=True).get('inventory')
+    if not INV:
+        raise ValueError("Inventory value is not specified")
+    return INV
+
+
+def upgrade_data(table):
+    con = op.get_bind()
+    sql = f"""
+        select ad.device_id, c.action_id, t.user_from_id, t.user_to_id,
+               a.type, c.user_id
+        from {get_inv()}.confirm as c
+        join {get_inv()}.action as a on a.id = c.id
+        join {get_inv()}.action_device as ad on ad.action_id = c.id
+        join {get_inv()}.trade as t on t.id = c.action_id
+        where a.type in ('Confirm', 'Revoke')
+        order by ad.device_id, c.action_id, a.created
+    """
+    states = list(states_of_confirms(con.execute(sql)))
+    if states:
+        op.bulk_insert(table, states)
+
+
+def upgrade():
+    table = op.create_table(
+        'device_trade_state',
+        sa.Column('device_id', sa.BigInteger(), nullable=False),
+        sa.Column('trade_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column(
+            'status',
+            sa.SmallInteger(),
+            nullable=False,
+            comment='The status from the state machine, see ``replay``.',
+        ),
+        sa.Column(
+            'simple_status',
+            sa.SmallInteger(),
+            nullable=False,
+            comment='The status from the simple state machine.',
+        ),
+        sa.Column(
+            'last_user_id',
+            postgresql.UUID(as_uuid=True),
+            nullable=True,
+            comment='The last user that changed the status.',
+        ),
+        sa.ForeignKeyConstraint(
+            ['device_id'], [f'{get_inv()}.device.id'], ondelete='CASCADE'
+        ),
+        sa.ForeignKeyConstraint(
+            ['trade_id'], [f'{get_inv()}.trade.id'], ondelete='CASCADE'
+        ),
+        sa.ForeignKeyConstraint(['last_user_id'], ['common.user.id']),
+        sa.PrimaryKeyConstraint('device_id', 'trade_id'),
+        schema=f'{get_inv()}',
+    )
+    op.create_index(
+        'device_trade_state_trade_id_index',
+        'device_trade_state',
+        ['trade_id'],
+        unique=False,
+        postgresql_using='hash',
+        schema=f'{get_inv()}',
+    )
+    upgrade_data(table)
+
+
+def downgrade():
+    op.drop_index(
+        'device_trade_state_trade_id_index',
+        table_name='device_trade_state',
+        schema=f'{get_inv()}',
+    )
+    op.drop_table('device_trade_state', schema=f'{get_inv()}')
@@ -4,16 +4,13 @@ from contextlib import suppress
 from datetime import datetime
 from fractions import Fraction
 from math import hypot
-from typing import Iterator, List, Optional, TypeVar
+from typing import Iterator, List, Optional, TypeVar, Union
 
 import dateutil.parser
 from ereuse_devicehub.ereuse_utils import getter, text
-from ereuse_devicehub.ereuse_utils.nested_lookup import (
-    get_nested_dicts_with_key_containing_value,
-    get_nested_dicts_with_key_value,
-)
 
 from ereuse_devicehub.parser import base2, unit, utils
+from ereuse_devicehub.parser.index import Hwinfo, LshwIndex
 from ereuse_devicehub.parser.models import SnapshotsLog
 from ereuse_devicehub.parser.utils import Dumpeable
 from ereuse_devicehub.resources.enums import Severity
@@ -55,14 +52,14 @@ C = TypeVar('C', bound='Component')
 
 class Component(Device):
     @classmethod
-    def new(cls, lshw, hwinfo, **kwargs) -> Iterator[C]:
+    def new(cls, lshw: LshwIndex, hwinfo: Hwinfo, **kwargs) -> Iterator[C]:
         raise NotImplementedError()
 
 
 class Processor(Component):
     @classmethod
-    def new(cls, lshw: dict, **kwargs) -> Iterator[C]:
-        nodes = get_nested_dicts_with_key_value(lshw, 'class', 'processor')
+    def new(cls, lshw: LshwIndex, **kwargs) -> Iterator[C]:
+        nodes = lshw.by_class('processor')
         # We want only the physical cpu's, not the logic ones
         # In some cases we may get empty cpu nodes, we can detect them because
         # all regular cpus have at least a description (Intel Core i5...)
@@ -147,9 +144,9 @@ class Processor(Component):
 
 class RamModule(Component):
     @classmethod
-    def new(cls, lshw, **kwargs) -> Iterator[C]:
+    def new(cls, lshw: LshwIndex, **kwargs) -> Iterator[C]:
         # We can get flash memory (BIOS?), system memory and unknown types of memory
-        memories = get_nested_dicts_with_key_value(lshw, 'class', 'memory')
+        memories = lshw.by_class('memory')
         TYPES = {'ddr', 'sdram', 'sodimm'}
         for memory in memories:
             physical_ram = any(
@@ -184,8 +181,8 @@ class RamModule(Component):
 
 class GraphicCard(Component):
     @classmethod
-    def new(cls, lshw, hwinfo, **kwargs) -> Iterator[C]:
-        nodes = get_nested_dicts_with_key_value(lshw, 'class', 'display')
+    def new(cls, lshw: LshwIndex, hwinfo: Hwinfo, **kwargs) -> Iterator[C]:
+        nodes = lshw.by_class('display')
         return (cls(n) for n in nodes if n['configuration'].get('driver', None))
 
     def __init__(self, node: dict) -> None:
@@ -206,24 +203,28 @@ class Motherboard(Component):
     INTERFACES = 'usb', 'firewire', 'serial', 'pcmcia'
 
     @classmethod
-    def new(cls, lshw, hwinfo, **kwargs) -> C:
-        node = next(get_nested_dicts_with_key_value(lshw, 'description', 'Motherboard'))
-        bios_node = next(get_nested_dicts_with_key_value(lshw, 'id', 'firmware'))
+    def new(cls, lshw: LshwIndex, hwinfo: Hwinfo, **kwargs) -> C:
+        node = next(iter(lshw.by_description('Motherboard')))
+        bios_node = next(iter(lshw.by_id('firmware')))
         # bios_node = '1'
         memory_array = next(
-            getter.indents(hwinfo, 'Physical Memory Array', indent='    '), None
+            iter(hwinfo.indents('Physical Memory Array', indent='    ')), None
         )
-        return cls(node, bios_node, memory_array)
+        return cls(node, bios_node, memory_array, lshw)
 
     def __init__(
-        self, node: dict, bios_node: dict, memory_array: Optional[List[str]]
+        self,
+        node: dict,
+        bios_node: dict,
+        memory_array: Optional[List[str]],
+        lshw: LshwIndex,
     ) -> None:
         super().__init__(node)
         self.from_lshw(node)
-        self.usb = self.num_interfaces(node, 'usb')
-        self.firewire = self.num_interfaces(node, 'firewire')
-        self.serial = self.num_interfaces(node, 'serial')
-        self.pcmcia = self.num_interfaces(node, 'pcmcia')
+        self.usb = self.num_interfaces(lshw, node, 'usb')
+        self.firewire = self.num_interfaces(lshw, node, 'firewire')
+        self.serial = self.num_interfaces(lshw, node, 'serial')
+        self.pcmcia = self.num_interfaces(lshw, node, 'pcmcia')
         self.slots = int(2)
         #     run(
         #         'dmidecode -t 17 | ' 'grep -o BANK | ' 'wc -l',
@@ -243,8 +244,8 @@ class Motherboard(Component):
                 self.ram_max_size = next(text.numbers(self.ram_max_size))
 
     @staticmethod
-    def num_interfaces(node: dict, interface: str) -> int:
-        interfaces = get_nested_dicts_with_key_containing_value(node, 'id', interface)
+    def num_interfaces(lshw: LshwIndex, node: dict, interface: str) -> int:
+        interfaces = lshw.containing(node, 'id', interface)
         if interface == 'usb':
             interfaces = (
                 c
@@ -259,8 +260,8 @@ class Motherboard(Component):
 
 class NetworkAdapter(Component):
     @classmethod
-    def new(cls, lshw, hwinfo, **kwargs) -> Iterator[C]:
-        nodes = get_nested_dicts_with_key_value(lshw, 'class', 'network')
+    def new(cls, lshw: LshwIndex, hwinfo: Hwinfo, **kwargs) -> Iterator[C]:
+        nodes = lshw.by_class('network')
         return (cls(node) for node in nodes)
 
     def __init__(self, node: dict) -> None:
@@ -294,8 +295,8 @@ class NetworkAdapter(Component):
 
 class SoundCard(Component):
     @classmethod
-    def new(cls, lshw, hwinfo, **kwargs) -> Iterator[C]:
-        nodes = get_nested_dicts_with_key_value(lshw, 'class', 'multimedia')
+    def new(cls, lshw: LshwIndex, hwinfo: Hwinfo, **kwargs) -> Iterator[C]:
+        nodes = lshw.by_class('multimedia')
         return (cls(node) for node in nodes)
 
     def __init__(self, node) -> None:
@@ -308,8 +309,8 @@ class Display(Component):
     """Display technologies"""
 
     @classmethod
-    def new(cls, lshw, hwinfo, **kwargs) -> Iterator[C]:
-        for node in getter.indents(hwinfo, 'Monitor'):
+    def new(cls, lshw: LshwIndex, hwinfo: Hwinfo, **kwargs) -> Iterator[C]:
+        for node in hwinfo.indents('Monitor'):
             yield cls(node)
 
     def __init__(self, node: dict) -> None:
@@ -422,16 +423,29 @@ class Computer(Device):
         self._ram = None
 
     @classmethod
-    def run(cls, lshw, hwinfo_raw, uuid=None, sid=None, version=None):
+    def run(
+        cls,
+        lshw: Union[dict, LshwIndex],
+        hwinfo: Union[str, Hwinfo],
+        uuid=None,
+        sid=None,
+        version=None,
+    ):
         """
         Gets hardware information from the computer and its components,
         like serial numbers or model names, and benchmarks them.
 
         This function uses ``LSHW`` as the main source of hardware information,
         which is obtained once when it is instantiated.
+
+        :param lshw: The output of lshw or its index.
+        :param hwinfo: The text of hwinfo or its :class:`Hwinfo`.
         """
-        hwinfo = hwinfo_raw.splitlines()
-        computer = cls(lshw)
+        if not isinstance(lshw, LshwIndex):
+            lshw = LshwIndex(lshw)
+        if not isinstance(hwinfo, Hwinfo):
+            hwinfo = Hwinfo(hwinfo)
+        computer = cls(lshw.root)
         components = []
         try:
             for Component in cls.COMPONENTS:
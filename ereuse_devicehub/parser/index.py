@@ -0,0 +1,111 @@
+"""Indexes of the outputs of lshw, hwinfo and dmidecode of a snapshot.
+
+The parsers looked up the nodes of lshw walking the whole tree once
+per kind of component, split the text of hwinfo again for each
+search, and filtered every DMI structure each time they asked for a
+type. These classes read each output once per snapshot, and the
+parsers ask them instead.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterator, List, Tuple
+
+from dmidecode import DMIParse
+
+from ereuse_devicehub.ereuse_utils import getter
+
+
+class LshwIndex:
+    """The nodes of the lshw tree by ``class``, ``id``, ``businfo``
+    and ``description``.
+
+    The lists keep the order in which
+    :func:`ereuse_devicehub.ereuse_utils.nested_lookup.get_nested_dicts_with_key_value`
+    returns the nodes.
+    """
+
+    KEYS = 'class', 'id', 'businfo', 'description'
+
+    def __init__(self, lshw: dict) -> None:
+        self.root = lshw
+        self.nodes = []  # type: List[dict]
+        self._spans = {}  # type: Dict[int, Tuple[int, int]]
+        self._keys = {key: defaultdict(list) for key in self.KEYS}
+        self._walk(lshw)
+
+    def _walk(self, document):
+        if isinstance(document, list):
+            for value in document:
+                self._walk(value)
+        elif isinstance(document, dict):
+            start = len(self.nodes)
+            self.nodes.append(document)
+            # A node is indexed when its key is reached, as lshw does
+            # not always write ``class`` or ``id`` before ``children``
+            for key, value in document.items():
+                if isinstance(value, (dict, list)):
+                    self._walk(value)
+                elif key in self._keys and isinstance(value, str):
+                    self._keys[key][value].append(document)
+            self._spans[id(document)] = start, len(self.nodes)
+
+    def get(self, key: str, value: str) -> List[dict]:
+        """The nodes whose ``key`` is ``value``."""
+        return self._keys[key].get(value, [])
+
+    def by_class(self, value: str) -> List[dict]:
+        return self.get('class', value)
+
+    def by_id(self, value: str) -> List[dict]:
+        return self.get('id', value)
+
+    def by_businfo(self, value: str) -> List[dict]:
+        return self.get('businfo', value)
+
+    def by_description(self, value: str) -> List[dict]:
+        return self.get('description', value)
+
+    def subtree(self, node: dict) -> List[dict]:
+        """The node and the nodes under it."""
+        start, end = self._spans[id(node)]
+        return self.nodes[start:end]
+
+    def containing(self, node: dict, key: str, value: str) -> Iterator[dict]:
+        """The nodes of the subtree of ``node`` whose ``key``
+        contains ``value``.
+        """
+        return (n for n in self.subtree(node) if value in n.get(key, ()))
+
+
+class Hwinfo:
+    """The text of hwinfo split once in lines and in blocks."""
+
+    def __init__(self, raw: str) -> None:
+        self.raw = raw
+        self.lines = raw.splitlines()
+        self.blocks = [block.split('\n') for block in raw.split('\n\n')]
+        self._indents = {}  # type: Dict[Tuple[str, str], List[List[str]]]
+
+    def indents(self, keyword: str, indent='  ') -> List[List[str]]:
+        """The sections of the lines under ``keyword``; see
+        :func:`ereuse_devicehub.ereuse_utils.getter.indents`.
+        """
+        key = keyword, indent
+        if key not in self._indents:
+            self._indents[key] = list(getter.indents(self.lines, keyword, indent))
+        return self._indents[key]
+
+
+class DMI(DMIParse):
+    """The structures of dmidecode, keeping the ones of each type
+    once they are asked for.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        self._types = {}
+        super().__init__(*args, **kwargs)
+
+    def get(self, *args):
+        if args not in self._types:
+            self._types[args] = super().get(*args)
+        return self._types[args]
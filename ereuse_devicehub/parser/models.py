@@ -1,11 +1,11 @@
 from citext import CIText
 from flask import g
-from sqlalchemy import BigInteger, Column, Sequence, SmallInteger
+from sqlalchemy import BigInteger, Column, Sequence, SmallInteger, event
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import backref
 
-from ereuse_devicehub.db import db
-from ereuse_devicehub.resources.action.models import Snapshot
+from ereuse_devicehub.db import DhSession, db
+from ereuse_devicehub.resources.action.models import ActionWithOneDevice, Snapshot
 from ereuse_devicehub.resources.device.models import Placeholder
 from ereuse_devicehub.resources.enums import Severity
 from ereuse_devicehub.resources.models import Thing
@@ -13,7 +13,14 @@ from ereuse_devicehub.resources.user.models import User
 
 
 class SnapshotsLog(Thing):
-    """A Snapshot log."""
+    """A Snapshot log.
+
+    The log keeps what the log pages show of its snapshot (the DHID,
+    the status of the placeholder, whether the snapshot is of a new
+    device...), computed once with :meth:`denormalize` after the log
+    is flushed, instead of following the snapshot and its device for
+    every row of the page.
+    """
 
     id = Column(BigInteger, Sequence('snapshots_log_seq'), primary_key=True)
     severity = Column(SmallInteger, default=Severity.Info, nullable=False)
@@ -30,6 +37,25 @@ class SnapshotsLog(Thing):
     )
     snapshot = db.relationship(Snapshot, primaryjoin=snapshot_id == Snapshot.id)
     owner = db.relationship(User, primaryjoin=owner_id == User.id)
+    dhid = Column(CIText(), nullable=True)
+    dhid.comment = """The DHID of the device of the snapshot or, if it
+    is bound, of the device of its placeholder."""
+    original_dhid = Column(CIText(), nullable=True)
+    original_dhid.comment = """The DHID the device had before binding it."""
+    placeholder_status = Column(CIText(), nullable=True)
+    placeholder_status.comment = """The status of the placeholder of the device."""
+    new_device = Column(CIText(), nullable=True)
+    new_device.comment = """'New Device' or 'Update', if the device had
+    snapshots before this one."""
+    system_uuid = Column(UUID(as_uuid=True), nullable=True)
+    display_version = Column(CIText(), nullable=True)
+    display_version.comment = """The version with the initials of the
+    settings version. Null if the log has not been denormalized."""
+
+    __table_args__ = (
+        db.Index('snapshots_log_owner_id_created_index', 'owner_id', 'created'),
+        db.Index('snapshots_log_snapshot_uuid_index', snapshot_uuid),
+    )
 
     def save(self, commit=False):
         db.session.add(self)
@@ -37,57 +63,87 @@ class SnapshotsLog(Thing):
         if commit:
             db.session.commit()
 
+    def denormalize(self):
+        """Computes the values that the log shows of its snapshot."""
+        self.display_version = self._display_version()
+        device = self.snapshot.device if self.snapshot else None
+        if not device:
+            self.dhid = self.original_dhid = self.placeholder_status = None
+            self.new_device = self.system_uuid = None
+            return
+
+        binding = device.binding
+        self.dhid = binding.device.devicehub_id if binding else device.devicehub_id
+        self.original_dhid = device.dhid_bk or self.dhid
+        self.placeholder_status = binding.status if binding else None
+        before = device.timeline.last_of(
+            (self.snapshot.__class__,), self.snapshot.created
+        )
+        self.new_device = before and 'Update' or 'New Device'
+        self.system_uuid = getattr(device, 'system_uuid', None)
+
+    def detach_snapshot(self):
+        """Unlinks the log from its snapshot, which is going to be deleted."""
+        self.snapshot_id = None
+        self.snapshot_uuid = None
+        self.dhid = self.original_dhid = self.placeholder_status = None
+        self.new_device = self.system_uuid = None
+        self.display_version = self.version
+
+    @classmethod
+    def denormalize_device(cls, device):
+        """Computes again, after the next flush, the logs of the
+        snapshots of the device, as binding and unbinding it changes
+        what they show.
+        """
+        snapshots = db.select([_action_one.c.id]).where(
+            _action_one.c.device_id == device.id
+        )
+        session = db.session()
+        with session.no_autoflush:
+            for log in cls.query.filter(cls.snapshot_id.in_(snapshots)):
+                if log.snapshot:
+                    # The device of the snapshot can have been moved with SQL
+                    session.expire(log.snapshot)
+                _pending(session).add(log)
+
+    def _denormalized(self):
+        # Logs saved before the values were stored, until the
+        # ``snapshots_log_backfill`` command computes them
+        if self.display_version is None:
+            self.denormalize()
+
     def get_status(self):
-        if self.snapshot:
+        if self.snapshot_id:
             return Severity(self.severity)
 
         return ''
 
     def get_device(self):
-        if self.snapshot:
-            if self.snapshot.device.binding:
-                return self.snapshot.device.binding.device.devicehub_id
-            return self.snapshot.device.devicehub_id
-
-        return ''
+        self._denormalized()
+        return self.dhid or ''
 
     def get_original_dhid(self):
-        if self.snapshot:
-            dev = self.snapshot.device
-            if dev.dhid_bk:
-                return dev.dhid_bk
-
-        return self.get_device()
+        self._denormalized()
+        return self.original_dhid or ''
 
     def get_type_device(self):
-        if self.snapshot:
-            if self.snapshot.device.binding:
-                return self.snapshot.device.binding.status
-
-        return ''
+        self._denormalized()
+        return self.placeholder_status or ''
 
     def get_new_device(self):
-        if not self.snapshot:
-            return ''
-
-        if not self.snapshot.device:
-            return ''
-
-        snapshots = []
-        for s in self.snapshot.device.actions:
-            if s == self.snapshot:
-                break
-            if s.type == self.snapshot.type:
-                snapshots.append(s)
-        return snapshots and 'Update' or 'New Device'
+        self._denormalized()
+        return self.new_device or ''
 
     def get_system_uuid(self):
-        try:
-            return self.snapshot.device.system_uuid or ''
-        except AttributeError:
-            return ''
+        self._denormalized()
+        return self.system_uuid or ''
 
     def get_version(self):
+        self._denormalized()
+        return self.display_version
+
+    def _display_version(self):
         if not self.snapshot:
             return self.version
         settings_version = self.snapshot.settings_version or ''
@@ -98,6 +154,35 @@ class SnapshotsLog(Thing):
         return "{}".format(self.version)
 
 
+_action_one = ActionWithOneDevice.__table__
+
+
+def _pending(session) -> set:
+    """The logs to denormalize after the next flush of the session."""
+    return session.info.setdefault('snapshots_log_pending', set())
+
+
+@event.listens_for(DhSession, 'before_flush')
+def _new_logs(session, flush_context, instances):
+    _pending(session).update(
+        obj for obj in session.new if isinstance(obj, SnapshotsLog)
+    )
+
+
+@event.listens_for(DhSession, 'after_flush_postexec')
+def _denormalize_logs(session, flush_context):
+    # After the flush the devices have their DHID; the changes are
+    # saved by the next flush, which commit does
+    for log in session.info.pop('snapshots_log_pending', ()):
+        if log in session:
+            log.denormalize()
+
+
+@event.listens_for(DhSession, 'after_soft_rollback')
+def _discard_logs(session, previous_transaction):
+    session.info.pop('snapshots_log_pending', None)
+
+
 class PlaceholdersLog(Thing):
     """A Placeholder log."""
 
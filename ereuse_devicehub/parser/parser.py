@@ -5,13 +5,12 @@ import pytz
 from datetime import datetime
 
 import numpy
-from dmidecode import DMIParse
 from flask import request
 from marshmallow.exceptions import ValidationError
 
-from ereuse_devicehub.ereuse_utils.nested_lookup import get_nested_dicts_with_key_value
 from ereuse_devicehub.parser import base2, unit
 from ereuse_devicehub.parser.computer import Computer
+from ereuse_devicehub.parser.index import DMI, Hwinfo, LshwIndex
 from ereuse_devicehub.parser.models import SnapshotsLog
 from ereuse_devicehub.resources.action.schemas import Snapshot
 from ereuse_devicehub.resources.enums import DataStorageInterface, Severity
@@ -38,9 +37,10 @@ class ParseSnapshot:
         self.components = []
         self.monitors = []
 
-        self.dmi = DMIParse(self.dmidecode_raw)
+        self.dmi = DMI(self.dmidecode_raw)
         self.smart = self.loads(self.smart_raw)
         self.lshw = self.loads(self.lshw_raw)
+        self.lshw_index = LshwIndex(self.lshw)
         self.hwinfo = self.parse_hwinfo()
 
         self.set_computer()
@@ -149,7 +149,7 @@ class ParseSnapshot:
             )
 
     def get_graphic(self):
-        nodes = get_nested_dicts_with_key_value(self.lshw, 'class', 'display')
+        nodes = self.lshw_index.by_class('display')
         for c in nodes:
             if not c['configuration'].get('driver', None):
                 continue
@@ -249,7 +249,7 @@ class ParseSnapshot:
         return [erase]
 
     def get_networks(self):
-        nodes = get_nested_dicts_with_key_value(self.lshw, 'class', 'network')
+        nodes = self.lshw_index.by_class('network')
         for c in nodes:
             capacity = c.get('capacity')
             units = c.get('units')
@@ -271,7 +271,7 @@ class ParseSnapshot:
             )
 
     def get_sound_card(self):
-        nodes = get_nested_dicts_with_key_value(self.lshw, 'class', 'multimedia')
+        nodes = self.lshw_index.by_class('multimedia')
         for c in nodes:
             self.components.append(
                 {
@@ -340,7 +340,7 @@ class ParseSnapshot:
             )
 
     def get_hwinfo_monitors(self):
-        for c in self.hwinfo:
+        for c in self.hwinfo.blocks:
             monitor = None
             external = None
             for x in c:
@@ -556,8 +556,7 @@ class ParseSnapshot:
         return total_capacity / 1024**2
 
     def parse_hwinfo(self):
-        hw_blocks = self.hwinfo_raw.split("\n\n")
-        return [x.split("\n") for x in hw_blocks]
+        return Hwinfo(self.hwinfo_raw)
 
     def loads(self, x):
         if isinstance(x, str):
@@ -595,7 +594,7 @@ class ParseSnapshotLsHw:
         self.components_obj = []
         self._errors = []
 
-        self.dmi = DMIParse(self.dmidecode_raw)
+        self.dmi = DMI(self.dmidecode_raw)
         self.hwinfo = self.parse_hwinfo()
 
         self.set_basic_datas()
@@ -618,8 +617,7 @@ class ParseSnapshotLsHw:
         return Snapshot().load(self.snapshot_json)
 
     def parse_hwinfo(self):
-        hw_blocks = self.hwinfo_raw.split("\n\n")
-        return [x.split("\n") for x in hw_blocks]
+        return Hwinfo(self.hwinfo_raw)
 
     def loads(self, x):
         if isinstance(x, str):
@@ -629,7 +627,7 @@ class ParseSnapshotLsHw:
     def set_basic_datas(self):
         try:
             pc, self.components_obj = Computer.run(
-                self.lshw, self.hwinfo_raw, self.uuid, self.sid, self.version
+                self.lshw, self.hwinfo, self.uuid, self.sid, self.version
             )
             pc = pc.dump()
             minimum_hid = None in [pc['manufacturer'], pc['model'], pc['serialNumber']]
@@ -1,8 +1,9 @@
 from typing import Dict, List
 
-from flask import Response, jsonify, request
+from flask import Response, request
 from webargs.flaskparser import FlaskParser
 
+from ereuse_devicehub.teal.json_util import jsonify
 from ereuse_devicehub.teal.query import NestedQueryFlaskParser
 
 
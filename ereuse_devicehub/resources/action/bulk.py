@@ -0,0 +1,151 @@
+"""Actions performed to many devices at once.
+
+An :class:`ActionWithMultipleDevices` receives its devices through
+the ``devices`` relationship, which loads every device, copies the
+components of every computer into ``components`` and inserts the
+rows of ``action_device`` and ``action_component`` one by one. That
+is fine for a few devices, but the device list lets users select
+thousands of them.
+
+:func:`perform` saves the action through the ORM and links the
+devices and their components with one ``INSERT ... SELECT`` each,
+without loading them. The search documents of the devices do not
+need updating, as they do not contain the actions of the device.
+
+The preconditions of allocating and deallocating devices are checked
+with :func:`not_allocatable` and :func:`not_deallocatable`, which
+aggregate the ``Allocate`` and ``Deallocate`` actions of the devices
+in one query.
+"""
+
+import datetime
+from typing import Iterable, List, Set
+
+from flask import g
+from sqlalchemy.dialects.postgresql import insert
+
+from ereuse_devicehub.db import any_of, db
+from ereuse_devicehub.resources.action.models import (
+    Action,
+    ActionComponent,
+    ActionDevice,
+    ActionWithMultipleDevices,
+)
+from ereuse_devicehub.resources.device.models import Component, Device
+
+_action = Action.__table__
+_action_device = ActionDevice.__table__
+_action_component = ActionComponent.__table__
+_component = Component.__table__
+_device = Device.__table__
+
+
+def perform(action: ActionWithMultipleDevices, device_ids: Iterable[int]):
+    """Saves the action and links it to the devices and their
+    components, in bulk.
+
+    The action must not have devices. The caller commits.
+    """
+    assert not action.devices, 'Pass the devices through device_ids.'
+    db.session.add(action)
+    db.session.flush()
+    add_devices(action, device_ids)
+    return action
+
+
+def add_devices(action: ActionWithMultipleDevices, device_ids: Iterable[int]):
+    """Links more devices, and their components, to a saved action.
+
+    Devices that the action already has are skipped.
+    """
+    ids = list(device_ids)
+    # As ActionDevice, which orders the actions of the devices
+    created = datetime.datetime.now(datetime.timezone.utc)
+    devices = db.select(
+        [
+            _device.c.id,
+            db.literal(action.id, type_=_action.c.id.type),
+            db.literal(g.user.id, type_=_action_device.c.author_id.type),
+            db.literal(created, type_=_action_device.c.created.type),
+        ]
+    ).where(any_of(_device.c.id, ids))
+    db.session.execute(
+        insert(_action_device)
+        .from_select(['device_id', 'action_id', 'author_id', 'created'], devices)
+        .on_conflict_do_nothing()
+    )
+    components = db.select(
+        [_component.c.id, db.literal(action.id, type_=_action.c.id.type)]
+    ).where(any_of(_component.c.parent_id, ids))
+    db.session.execute(
+        insert(_action_component)
+        .from_select(['device_id', 'action_id'], components)
+        .on_conflict_do_nothing()
+    )
+    # The collections could have been loaded without the new rows
+    db.session.expire(action, ['devices', 'components'])
+
+
+def set_allocated(device_ids: Iterable[int], allocated: bool):
+    db.session.execute(
+        _device.update()
+        .where(any_of(_device.c.id, device_ids))
+        .values(allocated=allocated, updated=db.func.now())
+    )
+
+
+def _allocations(device_ids: List[int], date: datetime.date):
+    """The ``start_time`` of some ``Allocate`` and ``Deallocate`` of
+    each device, relative to ``date``.
+    """
+    start = _action.c.start_time
+    day = db.cast(start, db.Date)
+    allocate = _action.c.type == 'Allocate'
+    deallocate = _action.c.type == 'Deallocate'
+    last, first = db.func.max(start).filter, db.func.min(start).filter
+    return (
+        db.session.query(
+            _action_device.c.device_id,
+            last(day <= date).label('last'),
+            last(allocate & (day <= date)).label('allocate'),
+            last(deallocate & (day < date)).label('deallocate'),
+            first(allocate & (day > date)).label('next_allocate'),
+            first(deallocate & (day > date)).label('next_deallocate'),
+        )
+        .select_from(_action_device)
+        .join(_action, _action.c.id == _action_device.c.action_id)
+        .filter(any_of(_action_device.c.device_id, device_ids))
+        .filter(allocate | deallocate)
+        .group_by(_action_device.c.device_id)
+    )
+
+
+def not_allocatable(device_ids: Iterable[int], date: datetime.date) -> Set[int]:
+    """The devices that cannot be allocated on ``date``: those with
+    an ``Allocate`` on or before the date that is not followed by
+    a ``Deallocate`` before the date.
+    """
+    return {
+        row.device_id
+        for row in _allocations(list(device_ids), date)
+        if row.allocate and (not row.deallocate or row.allocate > row.deallocate)
+    }
+
+
+def not_deallocatable(device_ids: Iterable[int], date: datetime.date) -> Set[int]:
+    """The devices that cannot be deallocated on ``date``: those
+    whose last action on or before the date is not an ``Allocate``,
+    and those with a ``Deallocate`` after the date before the
+    following ``Allocate``.
+    """
+    ids = set(device_ids)
+    allocated = set()
+    for row in _allocations(list(ids), date):
+        if not row.last or row.allocate != row.last:
+            continue
+        deallocated_after = row.next_deallocate and (
+            not row.next_allocate or row.next_deallocate < row.next_allocate
+        )
+        if not deallocated_after:
+            allocated.add(row.device_id)
+    return ids - allocated
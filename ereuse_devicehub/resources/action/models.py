@@ -15,6 +15,7 @@ from collections import Iterable
 from contextlib import suppress
 from datetime import datetime, timedelta, timezone
 from decimal import ROUND_HALF_EVEN, ROUND_UP, Decimal
+from itertools import chain
 from typing import Optional, Set, Union
 from uuid import uuid4
 
@@ -46,7 +47,7 @@ from sqlalchemy.orm.events import AttributeEvents as Events
 from sqlalchemy.util import OrderedSet
 
 import ereuse_devicehub.teal.db
-from ereuse_devicehub.db import db
+from ereuse_devicehub.db import DhSession, db
 from ereuse_devicehub.resources.agent.models import Agent
 from ereuse_devicehub.resources.device.metrics import TradeMetrics
 from ereuse_devicehub.resources.device.models import (
@@ -56,6 +57,8 @@ from ereuse_devicehub.resources.device.models import (
     Desktop,
     Device,
     Laptop,
+    Mobile,
+    Placeholder,
     Server,
 )
 from ereuse_devicehub.resources.enums import (
@@ -379,6 +382,10 @@ class ActionDevice(db.Model):
         primaryjoin=author_id == User.id,
     )
 
+    __table_args__ = (
+        db.Index('action_device_action_id_index', action_id, postgresql_using='hash'),
+    )
+
     def __init__(self, **kwargs) -> None:
         self.created = kwargs.get('created', datetime.now(timezone.utc))
         super().__init__(**kwargs)
@@ -617,6 +624,160 @@ class EraseDataWipe(EraseBasic):
         return '{:%c}'.format(day)
 
 
+class LatestErasure(db.Model):
+    """The last erasure of each erased device, with the computer
+    where it was erased and its result.
+
+    The rows are computed again when erasures are saved, changed or
+    deleted (see :func:`refresh_latest_erasures`), so the erasures of
+    many data storages are read with one query instead of going
+    through the actions of each of them.
+    """
+
+    device_id = Column(
+        BigInteger, ForeignKey(Device.id, ondelete='CASCADE'), primary_key=True
+    )
+    erasure_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey(EraseBasic.id, ondelete='CASCADE'),
+        nullable=False,
+    )
+    erasure = relationship(EraseBasic, primaryjoin=erasure_id == EraseBasic.id)
+    host_id = Column(BigInteger, ForeignKey(Device.id, ondelete='SET NULL'))
+    host_id.comment = """The computer where the device was erased."""
+    severity = Column(ereuse_devicehub.teal.db.IntEnum(Severity), nullable=False)
+    created = Column(db.TIMESTAMP(timezone=True), nullable=False)
+    created.comment = """When Devicehub created the erasure."""
+
+    __table_args__ = (
+        db.Index(
+            'latest_erasure_erasure_id_index', erasure_id, postgresql_using='hash'
+        ),
+    )
+
+    @classmethod
+    def refresh(cls, device_ids, session=None):
+        """Computes again the rows of the devices."""
+        session = session or db.session
+        action = Action.__table__
+        one = ActionWithOneDevice.__table__
+        erasure = EraseBasic.__table__
+        last = (
+            db.select(
+                [
+                    one.c.device_id,
+                    action.c.id,
+                    action.c.parent_id,
+                    action.c.severity,
+                    action.c.created,
+                ]
+            )
+            .select_from(
+                action.join(one, one.c.id == action.c.id).join(
+                    erasure, erasure.c.id == action.c.id
+                )
+            )
+            .where(one.c.device_id.in_(device_ids))
+            .distinct(one.c.device_id)
+            .order_by(one.c.device_id, action.c.created.desc(), action.c.id.desc())
+        )
+        table = cls.__table__
+        session.execute(table.delete().where(table.c.device_id.in_(device_ids)))
+        session.execute(
+            table.insert().from_select(
+                ['device_id', 'erasure_id', 'host_id', 'severity', 'created'], last
+            )
+        )
+
+    @staticmethod
+    def storages_of(devices):
+        """The ids of the data storages and mobiles that the erasure
+        certificate of ``devices``, a select of their ids, shows.
+
+        These are the devices themselves and the data storages of the
+        computers, through the device bound to their placeholder.
+        """
+        device = Device.__table__
+        placeholder = Placeholder.__table__
+        storage = DataStorage.__table__
+        component = Component.__table__
+        targets = (
+            db.select([db.func.coalesce(placeholder.c.binding_id, device.c.id)])
+            .select_from(
+                device.outerjoin(placeholder, placeholder.c.device_id == device.c.id)
+            )
+            .where(device.c.id.in_(devices))
+        )
+        computers = db.select([Computer.__table__.c.id]).where(
+            Computer.__table__.c.id.in_(targets)
+        )
+        return db.union(
+            db.select([storage.c.id]).where(storage.c.id.in_(targets)),
+            db.select([Mobile.__table__.c.id]).where(
+                Mobile.__table__.c.id.in_(targets)
+            ),
+            db.select([storage.c.id])
+            .select_from(storage.join(component, component.c.id == storage.c.id))
+            .where(component.c.parent_id.in_(computers)),
+        )
+
+    @classmethod
+    def erasures(cls, devices, twins=True):
+        """The last erasure of each device of ``devices``, a select of
+        their ids.
+
+        With ``twins``, the last erasure of a device and of the other
+        device of its placeholder, like
+        :attr:`ereuse_devicehub.resources.device.models.DataStorage.last_erase_action`;
+        if not, the last erasure of each device, like ``privacy``.
+        """
+        query = EraseBasic.query.join(cls, cls.erasure_id == EraseBasic.id)
+        if not twins:
+            return query.filter(cls.device_id.in_(devices))
+        placeholder = Placeholder.__table__
+        twin = db.func.coalesce(placeholder.c.device_id, cls.device_id)
+        return (
+            query.outerjoin(
+                placeholder,
+                db.or_(
+                    placeholder.c.device_id == cls.device_id,
+                    placeholder.c.binding_id == cls.device_id,
+                ),
+            )
+            .filter(
+                db.or_(
+                    cls.device_id.in_(devices),
+                    placeholder.c.device_id.in_(devices),
+                    placeholder.c.binding_id.in_(devices),
+                )
+            )
+            .distinct(twin)
+            .order_by(twin, cls.created.desc(), cls.erasure_id.desc())
+        )
+
+
+@event.listens_for(DhSession, 'after_flush')
+def refresh_latest_erasures(session, flush_context):
+    """Keeps :class:`LatestErasure` with the erasures of the flush.
+
+    An erasure moved to another device refreshes both devices.
+    Erasures moved with SQL are not seen here; refresh their devices
+    with :meth:`LatestErasure.refresh`.
+    """
+    device_ids = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, EraseBasic):
+            for key in 'device_id', 'device':
+                history = orm.attributes.get_history(
+                    obj, key, passive=orm.attributes.PASSIVE_NO_INITIALIZE
+                )
+                for value in history.sum():
+                    device_ids.add(value.id if isinstance(value, Device) else value)
+    device_ids.discard(None)
+    if device_ids:
+        LatestErasure.refresh(sorted(device_ids), session)
+
+
 class Step(db.Model):
     erasure_id = Column(
         UUID(as_uuid=True),
@@ -1945,6 +2106,12 @@ class Trade(JoinedTableMixin, ActionWithMultipleTradeDocuments):
         primaryjoin='Trade.lot_id == Lot.id',
     )
 
+    __table_args__ = (
+        db.Index('trade_user_from_id_index', user_from_id, postgresql_using='hash'),
+        db.Index('trade_user_to_id_index', user_to_id, postgresql_using='hash'),
+        db.Index('trade_lot_id_index', lot_id, postgresql_using='hash'),
+    )
+
     def get_metrics(self):
         """
         This method get a list of values for calculate a metrics from a spreadsheet
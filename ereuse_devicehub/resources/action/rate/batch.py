@@ -0,0 +1,302 @@
+"""Rate v1.0 for all the computers of the inventory at once.
+
+:class:`ereuse_devicehub.resources.action.rate.v1_0.RateAlgorithm`
+rates one computer at a time, walking its components and their
+actions, and only when a Snapshot arrives. Re-rating the inventory
+after changing the parameters of the algorithm that way means
+loading every computer with all its components and actions.
+
+:class:`BatchRateAlgorithm` loads the characteristics and benchmarks
+of the components with three queries, keeps them in NumPy arrays
+(one position per computer) and applies the same normalization and
+harmonic means to all computers at once. The parameters are read
+from the rate classes of v1.0, so both implementations always agree.
+
+As in v1.0, only the first processor of a computer is rated, and a
+computer can only be rated if that processor has a
+``BenchmarkProcessor`` and all its data storage units have a
+``BenchmarkDataStorage``. Computers without a benchmarked processor
+have not been through Workbench and are not rated.
+"""
+
+import logging
+from typing import List, NamedTuple
+from uuid import uuid4
+
+import numpy as np
+from sqlalchemy.orm import aliased, selectinload
+
+from ereuse_devicehub.db import db
+from ereuse_devicehub.resources.action.models import (
+    BenchmarkDataStorage,
+    BenchmarkProcessor,
+    RateComputer,
+)
+from ereuse_devicehub.resources.action.rate.rate import BaseRate
+from ereuse_devicehub.resources.action.rate.v1_0 import (
+    DataStorageRate,
+    ProcessorRate,
+    RamRate,
+)
+from ereuse_devicehub.resources.device.models import (
+    Computer,
+    DataStorage,
+    Processor,
+    RamModule,
+)
+from ereuse_devicehub.resources.user.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class Features(NamedTuple):
+    """The characteristics of the components of a set of computers,
+    one position of each array per computer.
+
+    RAM and data storage speeds are already multiplied by the size
+    of their component, and summed up.
+    """
+
+    ids: np.ndarray
+    owners: List
+    cores: np.ndarray
+    speed: np.ndarray
+    benchmark: np.ndarray
+    ram_size: np.ndarray
+    ram_speed: np.ndarray
+    storage_size: np.ndarray
+    read_speed: np.ndarray
+    write_speed: np.ndarray
+
+
+class Rates(NamedTuple):
+    processor: np.ndarray
+    ram: np.ndarray
+    data_storage: np.ndarray
+    rating: np.ndarray
+
+
+class BatchRateAlgorithm(BaseRate):
+    """Computes Rate v1.0 for many computers with vectorized
+    operations.
+    """
+
+    def load(self) -> Features:
+        """Loads the features of all the computers that can be rated."""
+        # Same benchmark than ProcessorRate: the last one not from Sysbench
+        benchmark = (
+            db.session.query(BenchmarkProcessor.device_id, BenchmarkProcessor.rate)
+            .filter(BenchmarkProcessor.type == BenchmarkProcessor.t)
+            .distinct(BenchmarkProcessor.device_id)
+            .order_by(BenchmarkProcessor.device_id, BenchmarkProcessor.end_time.desc())
+            .subquery()
+        )
+        parent = aliased(Computer, flat=True)
+        processors = (
+            db.session.query(
+                Processor.parent_id,
+                parent.owner_id,
+                Processor.cores,
+                Processor.speed,
+                benchmark.c.rate,
+            )
+            .join(parent, parent.id == Processor.parent_id)
+            .outerjoin(benchmark, benchmark.c.device_id == Processor.id)
+            .distinct(Processor.parent_id)
+            .order_by(Processor.parent_id, Processor.id)
+        )
+        processors = [row for row in processors if row[-1] is not None]
+        ids = np.array([row[0] for row in processors], dtype=np.int64)
+        owners = [row[1] for row in processors]
+        cores, speed, bench = self._columns(processors, 2, 3, 4)
+
+        rams = db.session.query(
+            RamModule.parent_id, RamModule.size, RamModule.speed
+        ).filter(RamModule.parent_id.isnot(None))
+        rams = self._rows_of(ids, rams)
+        ram_parents = self._positions(ids, rams)
+        size, ram_speed = self._columns(rams, 1, 2)
+        size = np.nan_to_num(size)
+        # RamRate.RAM_SPEED_FACTOR estimates the speed of unknown modules
+        ram_speed = self._default(ram_speed, size / RamRate.RAM_SPEED_FACTOR)
+
+        # Same benchmark than DataStorageRate: the last one created
+        benchmark = (
+            db.session.query(
+                BenchmarkDataStorage.device_id,
+                BenchmarkDataStorage.read_speed,
+                BenchmarkDataStorage.write_speed,
+            )
+            .distinct(BenchmarkDataStorage.device_id)
+            .order_by(
+                BenchmarkDataStorage.device_id, BenchmarkDataStorage.created.desc()
+            )
+            .subquery()
+        )
+        storages = (
+            db.session.query(
+                DataStorage.parent_id,
+                DataStorage.size,
+                benchmark.c.read_speed,
+                benchmark.c.write_speed,
+            )
+            .outerjoin(benchmark, benchmark.c.device_id == DataStorage.id)
+            .filter(DataStorage.parent_id.isnot(None))
+        )
+        storages = self._rows_of(ids, storages)
+        storage_parents = self._positions(ids, storages)
+        storage_size, read, write = self._columns(storages, 1, 2, 3)
+        storage_size = np.nan_to_num(storage_size)
+
+        # DataStorageRate cannot rate a data storage without benchmark
+        missing = np.bincount(storage_parents, np.isnan(read), minlength=len(ids))
+        valid = missing == 0
+
+        def total(parents, values):
+            return np.bincount(parents, np.nan_to_num(values), minlength=len(ids))
+
+        return Features(
+            ids=ids[valid],
+            owners=[owner for owner, ok in zip(owners, valid) if ok],
+            cores=cores[valid],
+            speed=speed[valid],
+            benchmark=bench[valid],
+            ram_size=total(ram_parents, size)[valid],
+            ram_speed=total(ram_parents, ram_speed * size)[valid],
+            storage_size=total(storage_parents, storage_size)[valid],
+            read_speed=total(storage_parents, read * storage_size)[valid],
+            write_speed=total(storage_parents, write * storage_size)[valid],
+        )
+
+    def compute(self, features: Features) -> Rates:
+        """Rates the computers of ``features``, rounding every value
+        as :class:`RateComputer` does.
+        """
+        f = features
+        # Values like 0 or NULL take the defaults, as in ProcessorRate
+        cores = self._default(f.cores, ProcessorRate.DEFAULT_CORES)
+        speed = self._default(f.speed, ProcessorRate.DEFAULT_SPEED)
+        benchmark = self._default(f.benchmark, ProcessorRate.DEFAULT_SCORE)
+        processor = (benchmark + speed * 2000 * cores) / 2
+        processor = self._rate(processor, ProcessorRate.PROCESSOR_NORM)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ram_speed = f.ram_speed / f.ram_size
+            read_speed = f.read_speed / f.storage_size
+            write_speed = f.write_speed / f.storage_size
+            ram = self.harmonic_mean(
+                RamRate.RAM_WEIGHTS,
+                (
+                    self._rate(f.ram_size, RamRate.SIZE_NORM),
+                    self._rate(ram_speed, RamRate.RAM_SPEED_NORM),
+                ),
+            )
+            data_storage = self.harmonic_mean(
+                DataStorageRate.DATA_STORAGE_WEIGHTS,
+                (
+                    self._rate(f.storage_size, DataStorageRate.SIZE_NORM),
+                    self._rate(read_speed, DataStorageRate.READ_SPEED_NORM),
+                    self._rate(write_speed, DataStorageRate.WRITE_SPEED_NORM),
+                ),
+            )
+        # Without size there is no rate, and RateAlgorithm keeps a 1
+        ram = np.where(f.ram_size > 0, ram, 1)
+        data_storage = np.where(f.storage_size > 0, data_storage, 1)
+
+        processor, ram, data_storage = (
+            np.round(x, RateComputer.N) for x in (processor, ram, data_storage)
+        )
+        rating = self.harmonic_mean_rates(processor, data_storage, ram)
+        rating = np.round(np.maximum(rating, 0), RateComputer.N)
+        return Rates(processor, ram, data_storage, rating)
+
+    def save(self, features: Features, rates: Rates) -> int:
+        """Adds a :class:`RateComputer` for every computer, authored
+        by the owner of the computer and with the individual of the
+        owner as agent, as the actions of a Snapshot.
+
+        Computers whose owner has no individual are not rated.
+
+        :return: The number of new rates.
+        """
+        owners = (
+            User.query.filter(User.id.in_(set(features.owners)))
+            .options(selectinload(User.individuals))
+            .all()
+        )
+        agents = {owner.id: owner.individual for owner in owners}
+        values = zip(
+            features.ids.tolist(),
+            features.owners,
+            *(x.tolist() for x in rates),
+        )
+        new_rates = []
+        for device_id, owner_id, processor, ram, data_storage, rating in values:
+            agent = agents.get(owner_id)
+            if agent is None:
+                logger.warning(
+                    'Computer %s not rated: its owner has no individual', device_id
+                )
+                continue
+            new_rates.append(
+                RateComputer(
+                    id=uuid4(),
+                    device_id=device_id,
+                    author_id=owner_id,
+                    agent_id=agent.id,
+                    processor=processor,
+                    ram=ram,
+                    data_storage=data_storage,
+                    rating=rating,
+                )
+            )
+        db.session.bulk_save_objects(new_rates)
+        return len(new_rates)
+
+    def run(self) -> int:
+        """Re-rates all the computers of the inventory.
+
+        :return: The number of rated computers.
+        """
+        features = self.load()
+        return self.save(features, self.compute(features))
+
+    def _rate(self, x: np.ndarray, x_norm) -> np.ndarray:
+        """Normalizes and rates the values as the v1.0 classes do:
+        exponentially, linearly or logarithmically depending
+        on the normalized value.
+        """
+        x = np.maximum(self.norm(x, *x_norm), 0)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            return np.select(
+                (x >= self.CLOG, (self.CLIN <= x) & (x < self.CLOG)),
+                (np.log10(2 * x) + 3.57, 7 * x + 0.06),
+                np.exp(x) / (2 - np.exp(x)),
+            )
+
+    @staticmethod
+    def _default(x: np.ndarray, default) -> np.ndarray:
+        return np.where(np.isnan(x) | (x == 0), default, x)
+
+    @staticmethod
+    def _columns(rows, *positions) -> List[np.ndarray]:
+        """Gets the given columns of the rows as float arrays,
+        with NaN for NULL values.
+        """
+        return [np.array([row[i] for row in rows], dtype=np.float64) for i in positions]
+
+    @staticmethod
+    def _rows_of(ids: np.ndarray, query) -> list:
+        """The rows of the query whose first column is in ``ids``."""
+        rows = query.all()
+        parents = np.array([row[0] for row in rows], dtype=np.int64)
+        return [row for row, ok in zip(rows, np.isin(parents, ids)) if ok]
+
+    @staticmethod
+    def _positions(ids: np.ndarray, rows) -> np.ndarray:
+        """The position in ``ids`` of the first column of the rows."""
+        parents = np.array([row[0] for row in rows], dtype=np.int64)
+        return np.searchsorted(ids, parents)
+
+
+batch_rate_algorithm = BatchRateAlgorithm()
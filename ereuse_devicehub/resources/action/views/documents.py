@@ -5,7 +5,7 @@ from ereuse_devicehub.resources.action.models import DataWipe
 from ereuse_devicehub.resources.documents.models import DataWipeDocument
 from ereuse_devicehub.resources.device.models import DataStorage
 from ereuse_devicehub.resources.documents.schemas import DataWipeDocument as sh_document
-from ereuse_devicehub.resources.hash_reports import ReportHash
+from ereuse_devicehub.resources.hash_reports import register_hash
 
 
 class ErasedView():
@@ -32,8 +32,7 @@ class ErasedView():
         self.document = DataWipeDocument(**doc_data)
         db.session.add(self.document)
 
-        db_hash = ReportHash(hash3=self.document.file_hash)
-        db.session.add(db_hash)
+        register_hash(self.document.file_hash, commit=False)
 
     def insert_action(self, data):
         [data.pop(x, None) for x in ['url', 'documentId', 'filename', 'hash', 'software', 'success']]
@@ -4,6 +4,7 @@ import json
 import os
 import shutil
 from datetime import datetime
+from itertools import chain
 from uuid import UUID
 
 from flask import current_app as app
@@ -12,6 +13,7 @@ from sqlalchemy.util import OrderedSet
 
 from ereuse_devicehub.db import db
 from ereuse_devicehub.resources.action.models import Snapshot
+from ereuse_devicehub.resources.device.manufacturers import manufacturers
 from ereuse_devicehub.resources.device.models import Computer
 from ereuse_devicehub.resources.device.sync import Sync
 from ereuse_devicehub.resources.enums import Severity, SnapshotSoftware
@@ -88,6 +90,7 @@ class SnapshotMixin:
 
         assert not device.actions_one
         assert all(not c.actions_one for c in components) if components else True
+        self.normalize_manufacturers(device, components)
         db_device, remove_actions = self.sync.run(
             device, components, self.create_new_device
         )
@@ -123,6 +126,22 @@ class SnapshotMixin:
 
         return snapshot
 
+    def normalize_manufacturers(self, device, components):
+        """Replaces the manufacturers of the device and its components
+        by their normalized names, before looking the devices up by
+        their HID.
+        """
+        if not app.config.get('NORMALIZE_MANUFACTURERS'):
+            return
+        if components is None:
+            components = device.components
+        index = manufacturers()
+        for dev in chain((device,), components):
+            name = index.normalize(dev.manufacturer)
+            if name and name.lower() != dev.manufacturer:
+                dev.manufacturer = name.lower()
+                dev.set_hid()
+
     def is_server_erase(self, snapshot):
         if snapshot.device.binding:
             if snapshot.device.binding.kangaroo:
@@ -0,0 +1,84 @@
+"""Lookups done in almost every request, as baked queries.
+
+SQLAlchemy builds and compiles the SQL of a query every time it is
+run, which takes more than running it when the query only looks for
+one row by a unique value, as looking for a device by its Devicehub
+ID or for a user by its token. The queries of this module are baked
+(see `baked queries <https://docs.sqlalchemy.org/en/13/orm/extensions/
+baked.html>`_): the first time they run their SQL is cached, and the
+following times only the values change.
+
+The functions return a :class:`sqlalchemy.ext.baked.Result`, which
+gets the rows with ``first()``, ``all()`` or ``one_or_none()``; use
+:func:`one` instead of ``one()`` to raise our exceptions, as
+``Model.query.one()`` does.
+"""
+
+from sqlalchemy import bindparam
+from sqlalchemy.ext import baked
+from sqlalchemy.orm.exc import MultipleResultsFound, NoResultFound
+
+from ereuse_devicehub.db import db
+from ereuse_devicehub.resources.action.models import Snapshot
+from ereuse_devicehub.resources.device.models import Device, Placeholder
+from ereuse_devicehub.resources.user.models import Session, User
+from ereuse_devicehub.teal.db import MultipleResourcesFound, ResourceNotFound
+
+bakery = baked.bakery()
+
+
+def one(result: baked.Result, model):
+    """As ``result.one()``, but raising :class:`ResourceNotFound`
+    and :class:`MultipleResourcesFound` with the name of the model.
+    """
+    try:
+        return result.one()
+    except NoResultFound:
+        raise ResourceNotFound(model.t)
+    except MultipleResultsFound:
+        raise MultipleResourcesFound(model.t)
+
+
+def device(dhid: str, owner_id=None, active: bool = None) -> baked.Result:
+    """The devices with the Devicehub ID, of the owner and active
+    or not, if passed.
+    """
+    query = bakery(lambda s: s.query(Device))
+    query += lambda q: q.filter(Device.devicehub_id == bindparam('dhid'))
+    params = {'dhid': dhid}
+    if owner_id is not None:
+        query += lambda q: q.filter(Device.owner_id == bindparam('owner_id'))
+        params['owner_id'] = owner_id
+    if active is not None:
+        query += lambda q: q.filter(Device.active == bindparam('active'))
+        params['active'] = active
+    return query(db.session()).params(**params)
+
+
+def placeholder(phid: str, owner_id) -> baked.Result:
+    """The placeholder of the owner with the PHID."""
+    query = bakery(lambda s: s.query(Placeholder))
+    query += lambda q: q.filter(
+        Placeholder.phid == bindparam('phid'),
+        Placeholder.owner_id == bindparam('owner_id'),
+    )
+    return query(db.session()).params(phid=phid, owner_id=owner_id)
+
+
+def snapshot_exists(uuid) -> bool:
+    """Whether there is a snapshot with the uuid."""
+    query = bakery(lambda s: s.query(Snapshot.id))
+    query += lambda q: q.filter(Snapshot.uuid == bindparam('uuid'))
+    return query(db.session()).params(uuid=uuid).first() is not None
+
+
+def user_by_token(token) -> baked.Result:
+    query = bakery(lambda s: s.query(User))
+    query += lambda q: q.filter(User.token == bindparam('token'))
+    return query(db.session()).params(token=token)
+
+
+def session_by_token(token) -> baked.Result:
+    query = bakery(lambda s: s.query(Session))
+    query += lambda q: q.filter(Session.token == bindparam('token'))
+    return query(db.session()).params(token=token)
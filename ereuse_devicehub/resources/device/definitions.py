@@ -1,7 +1,8 @@
 from typing import Callable, Iterable, Tuple
 
-from ereuse_devicehub.resources.device import schemas
-from ereuse_devicehub.resources.device.models import Manufacturer
+from ereuse_devicehub.resources.device import trading  # noqa: F401 registers listeners
+from ereuse_devicehub.resources.device import manufacturers, schemas
+from ereuse_devicehub.resources.device.models import Manufacturer, ManufacturerSynonym
 from ereuse_devicehub.resources.device.views import (
     DeviceMergeView,
     DeviceView,
@@ -691,9 +692,11 @@ class ManufacturerDef(Resource):
     AUTH = True
 
     def init_db(self, db: 'db.SQLAlchemy', exclude_schema=None):
-        """Loads the manufacturers to the database."""
+        """Loads the manufacturers and their synonyms to the database."""
         if exclude_schema != 'common':
             Manufacturer.add_all_to_session(db.session)
+            ManufacturerSynonym.add_all_to_session(db.session)
+            manufacturers.reset()
 
 
 class OtherDef(DeviceDef):
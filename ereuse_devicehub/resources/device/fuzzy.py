@@ -0,0 +1,101 @@
+"""Fuzzy search of devices by what is written on them.
+
+Finds the devices whose serial number, model or manufacturer, the
+serial number of one of their components, one of their tags or the
+ids that the supplier or the user gave to their placeholder are
+similar to a text, as someone types a partial or mistyped serial
+number.
+
+The similarity is the ``word_similarity`` of ``pg_trgm``, and the
+``<%`` operator uses the trigram GIN indexes of those columns, so
+the search does not go through all the devices. The results are
+ranked by their best similarity, and the threshold and the number of
+results are ``FUZZY_SEARCH_THRESHOLD`` and ``FUZZY_SEARCH_LIMIT``.
+"""
+
+from flask import current_app as app
+from sqlalchemy import Text, cast
+
+from ereuse_devicehub.db import db
+from ereuse_devicehub.resources.device.models import Component, Device, Placeholder
+from ereuse_devicehub.resources.tag.model import Tag
+
+MIN_LENGTH = 3
+"""Shorter texts have no trigrams to look up."""
+
+_device = Device.__table__
+_component = Component.__table__
+_placeholder = Placeholder.__table__
+_tag = Tag.__table__
+
+
+def _matches(q, device_id, column, *where):
+    column = cast(column, Text)
+    score = db.func.word_similarity(q, column)
+    query = db.select([device_id.label('device_id'), score.label('score')]).where(
+        q.op('<%')(column)
+    )
+    for condition in where:
+        query = query.where(condition)
+    return query
+
+
+def fuzzy_search(q: str, owner_id, limit: int = None):
+    """The devices of the owner similar to ``q``, the most similar
+    first.
+
+    Components also match through their serial number, and make
+    their computer match too.
+
+    :return: A query of devices, empty if ``q`` is too short.
+    """
+    q = q.strip()
+    if len(q) < MIN_LENGTH:
+        return Device.query.filter(db.false())
+    limit = limit or app.config['FUZZY_SEARCH_LIMIT']
+    # A select, so it runs where the search does, see DhSession
+    threshold = str(app.config['FUZZY_SEARCH_THRESHOLD'])
+    db.session.execute(
+        db.select(
+            [db.func.set_config('pg_trgm.word_similarity_threshold', threshold, True)]
+        )
+    )
+    q = db.literal(q, Text)
+    owned = _device.c.owner_id == owner_id
+    matches = db.union_all(
+        _matches(q, _device.c.id, _device.c.serial_number, owned),
+        _matches(q, _device.c.id, _device.c.model, owned),
+        _matches(q, _device.c.id, _device.c.manufacturer, owned),
+        _matches(
+            q,
+            _component.c.parent_id,
+            _device.c.serial_number,
+            owned,
+            _component.c.id == _device.c.id,
+            _component.c.parent_id.isnot(None),
+        ),
+        _matches(q, _tag.c.device_id, _tag.c.id, _tag.c.owner_id == owner_id),
+        _matches(
+            q,
+            _placeholder.c.device_id,
+            _placeholder.c.id_device_supplier,
+            _placeholder.c.owner_id == owner_id,
+        ),
+        _matches(
+            q,
+            _placeholder.c.device_id,
+            _placeholder.c.id_device_internal,
+            _placeholder.c.owner_id == owner_id,
+        ),
+    ).alias('matches')
+    ranked = (
+        db.select([matches.c.device_id, db.func.max(matches.c.score).label('score')])
+        .group_by(matches.c.device_id)
+        .alias('ranked')
+    )
+    return (
+        Device.query.join(ranked, ranked.c.device_id == Device.id)
+        .filter(Device.owner_id == owner_id)
+        .order_by(ranked.c.score.desc(), Device.id)
+        .limit(limit)
+    )
@@ -0,0 +1,128 @@
+"""The manufacturers kept in memory.
+
+The suggestions of manufacturers looked for the names starting with
+a text in ``common.manufacturer`` on every request, although the
+table barely changes: it is loaded from ``manufacturers.csv``.
+
+:class:`ManufacturerIndex` reads the table once per process and
+keeps the names sorted, so the names starting with a text are found
+with a binary search, and maps the ways devices write the name of
+their manufacturer (``DELL INC.``, ``Hewlett Packard``...) to the
+normalized name.
+"""
+
+import re
+from bisect import bisect_left
+from threading import Lock
+from typing import Dict, List, NamedTuple, Optional
+
+from ereuse_devicehub.resources.device.models import Manufacturer
+
+SUFFIXES = {
+    'ag',
+    'bv',
+    'co',
+    'company',
+    'corp',
+    'corporation',
+    'gmbh',
+    'inc',
+    'incorporated',
+    'kk',
+    'limited',
+    'llc',
+    'ltd',
+    'plc',
+    'sa',
+    'spa',
+    'srl',
+}
+"""Words of the legal form of a company, ignored at the end of names."""
+
+_WORDS = re.compile(r'[^\W_]+')
+
+
+class ManufacturerEntry(NamedTuple):
+    name: str
+    url: Optional[str]
+    logo: Optional[str]
+
+    t = Manufacturer.t
+    """The type, for the schema of the manufacturers."""
+
+
+def name_key(name: str) -> str:
+    """The name without case, punctuation, spaces and legal form, to
+    compare the ways of writing a manufacturer.
+    """
+    words = _WORDS.findall(name.casefold())
+    while len(words) > 1 and words[-1] in SUFFIXES:
+        words.pop()
+    return ''.join(words)
+
+
+class ManufacturerIndex:
+    def __init__(self, manufacturers: List[ManufacturerEntry]) -> None:
+        self.manufacturers = sorted(manufacturers, key=lambda m: m.name.casefold())
+        self._names = [m.name.casefold() for m in self.manufacturers]
+        self._keys = {}  # type: Dict[str, Optional[str]]
+        for m in self.manufacturers:
+            key = name_key(m.name)
+            if not key:
+                continue
+            # Names written the same way by two manufacturers stay as
+            # the devices write them
+            self._keys[key] = None if key in self._keys else m.name
+
+    @classmethod
+    def load(cls) -> 'ManufacturerIndex':
+        query = Manufacturer.query.with_entities(
+            Manufacturer.name, Manufacturer.url, Manufacturer.logo
+        )
+        return cls([ManufacturerEntry(*row) for row in query])
+
+    def starting_with(self, text: str, limit: int = 6) -> List[ManufacturerEntry]:
+        """The manufacturers whose name starts with ``text``, ignoring
+        the case, sorted by name.
+        """
+        text = text.casefold()
+        i = bisect_left(self._names, text)
+        found = []
+        while i < len(self._names) and len(found) < limit:
+            if not self._names[i].startswith(text):
+                break
+            found.append(self.manufacturers[i])
+            i += 1
+        return found
+
+    def normalize(self, name: Optional[str]) -> Optional[str]:
+        """The normalized name of the manufacturer written as ``name``,
+        or None if there is not one.
+        """
+        if not name:
+            return None
+        return self._keys.get(name_key(name))
+
+
+_index = None  # type: Optional[ManufacturerIndex]
+_lock = Lock()
+
+
+def manufacturers() -> ManufacturerIndex:
+    """The index of the manufacturers, read the first time it is
+    used by the process.
+    """
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                _index = ManufacturerIndex.load()
+    return _index
+
+
+def reset():
+    """Reads the manufacturers again the next time, after they
+    change.
+    """
+    global _index
+    _index = None
@@ -40,7 +40,9 @@ from stdnum import meid
 
 from ereuse_devicehub.db import db
 from ereuse_devicehub.ereuse_utils.naming import HID_CONVERSION_DOC
+from ereuse_devicehub.resources.device import timeline as timeline_module
 from ereuse_devicehub.resources.device.metrics import Metrics
+from ereuse_devicehub.resources.device.timeline import Timeline
 from ereuse_devicehub.resources.enums import (
     BatteryTechnology,
     CameraFacing,
@@ -234,6 +236,21 @@ class Device(Thing):
     __table_args__ = (
         db.Index('device_id', id, postgresql_using='hash'),
         db.Index('type_index', type, postgresql_using='hash'),
+        db.Index('device_owner_id_index', owner_id, postgresql_using='hash'),
+        # Trigrams for the fuzzy search, see device.fuzzy
+        db.Index(
+            'device_serial_number_trgm',
+            text('serial_number gin_trgm_ops'),
+            postgresql_using='gin',
+        ),
+        db.Index(
+            'device_model_trgm', text('model gin_trgm_ops'), postgresql_using='gin'
+        ),
+        db.Index(
+            'device_manufacturer_trgm',
+            text('manufacturer gin_trgm_ops'),
+            postgresql_using='gin',
+        ),
     )
 
     def __init__(self, **kw) -> None:
@@ -272,6 +289,19 @@ class Device(Thing):
 
         Actions are returned by descending ``created`` time.
         """
+        return list(self.timeline.actions)
+
+    @property
+    def timeline(self) -> Timeline:
+        """The actions of the device, computed once until they
+        change; see :mod:`ereuse_devicehub.resources.device.timeline`.
+        """
+        timeline = self.__dict__.get('_timeline')
+        if not timeline or timeline.generation != timeline_module.generation:
+            timeline = self.__dict__['_timeline'] = Timeline(self._actions())
+        return timeline
+
+    def _actions(self) -> list:
         actions_multiple = copy.copy(self.actions_multiple)
         actions_one = copy.copy(self.actions_one)
         actions = []
@@ -396,16 +426,8 @@ class Device(Thing):
         """
         from ereuse_devicehub.resources.device import states
 
-        actions = copy.copy(self.actions)
-        actions.sort(key=lambda x: x.created)
-        for e in reversed(actions):
-            if not isinstance(e, tuple(states.Usage.actions())):
-                continue
-            if closed:
-                if e.created < closed:
-                    return e
-            else:
-                return e
+        types = tuple(states.Usage.actions())
+        return self.timeline.last_of(types, closed or None)
 
     def physical_status(self, closed=None):
         """Show the actual status of device for this owner.
@@ -418,16 +440,8 @@ class Device(Thing):
         """
         from ereuse_devicehub.resources.device import states
 
-        actions = copy.copy(self.actions)
-        actions.sort(key=lambda x: x.created)
-        for e in reversed(actions):
-            if not isinstance(e, tuple(states.Physical.actions())):
-                continue
-            if closed:
-                if e.created < closed:
-                    return e
-            else:
-                return e
+        types = tuple(states.Physical.actions())
+        return self.timeline.last_of(types, closed or None)
 
     def status(self, closed=None):
         """Show the actual status of device for this owner.
@@ -439,16 +453,8 @@ class Device(Thing):
         """
         from ereuse_devicehub.resources.device import states
 
-        actions = copy.copy(self.actions)
-        actions.sort(key=lambda x: x.created)
-        for e in reversed(actions):
-            if not isinstance(e, tuple(states.Status.actions())):
-                continue
-            if closed:
-                if e.created < closed:
-                    return e
-            else:
-                return e
+        types = tuple(states.Status.actions())
+        return self.timeline.last_of(types, closed or None)
 
     @property
     def history_status(self):
@@ -497,90 +503,25 @@ class Device(Thing):
     def tradings(self):
         return {str(x.id): self.trading(x.lot) for x in self.actions if x.t == 'Trade'}
 
-    def trading(self, lot, simple=None):  # noqa: C901
+    def trading(self, lot, simple=None):
         """The trading state, or None if no Trade action has
         ever been performed to this device. This extract the posibilities for to do.
         This method is performed for show in the web.
         If you need to do one simple and generic response you can put simple=True for that.
+
+        The state is computed when the confirmations are saved, see
+        :mod:`ereuse_devicehub.resources.device.trading`.
         """
+        from ereuse_devicehub.resources.device import trading
+
         if not hasattr(lot, 'trade'):
             return
 
-        Status = {
-            0: 'Trade',
-            1: 'Confirm',
-            2: 'NeedConfirmation',
-            3: 'TradeConfirmed',
-            4: 'Revoke',
-            5: 'NeedConfirmRevoke',
-            6: 'RevokeConfirmed',
-        }
-
         trade = lot.trade
-        user_from = trade.user_from
-        user_to = trade.user_to
-        status = 0
-        last_user = None
-
         if not hasattr(trade, 'acceptances'):
-            return Status[status]
-
-        for ac in self.actions:
-            if ac.t not in ['Confirm', 'Revoke']:
-                continue
-
-            if ac.user not in [user_from, user_to]:
-                continue
-
-            if ac.t == 'Confirm' and ac.action == trade:
-                if status in [0, 6]:
-                    if simple:
-                        status = 2
-                        continue
-                    status = 1
-                    last_user = ac.user
-                    if ac.user == user_from and user_to == g.user:
-                        status = 2
-                    if ac.user == user_to and user_from == g.user:
-                        status = 2
-                    continue
-
-                if status in [1, 2]:
-                    if last_user != ac.user:
-                        status = 3
-                        last_user = ac.user
-                    continue
-
-                if status in [4, 5]:
-                    status = 3
-                    last_user = ac.user
-                    continue
-
-            if ac.t == 'Revoke' and ac.action == trade:
-                if status == 3:
-                    if simple:
-                        status = 5
-                        continue
-                    status = 4
-                    last_user = ac.user
-                    if ac.user == user_from and user_to == g.user:
-                        status = 5
-                    if ac.user == user_to and user_from == g.user:
-                        status = 5
-                    continue
-
-                if status in [4, 5]:
-                    if last_user != ac.user:
-                        status = 6
-                        last_user = ac.user
-                    continue
-
-                if status in [1, 2]:
-                    status = 6
-                    last_user = ac.user
-                    continue
+            return trading.STATUS[0]
 
-        return Status[status]
+        return trading.trading(self, trade, simple)
 
     @property
     def revoke(self):
@@ -736,29 +677,25 @@ class Device(Thing):
         return ', '.join([t.id for t in self.tags])
 
     def appearance(self):
-        actions = copy.copy(self.actions)
-        actions.sort(key=lambda x: x.created)
+        actions = self.timeline.by_created
         with suppress(LookupError, ValueError, StopIteration):
             action = next(e for e in reversed(actions) if e.type == 'VisualTest')
             return action.appearance_range
 
     def functionality(self):
-        actions = copy.copy(self.actions)
-        actions.sort(key=lambda x: x.created)
+        actions = self.timeline.by_created
         with suppress(LookupError, ValueError, StopIteration):
             action = next(e for e in reversed(actions) if e.type == 'VisualTest')
             return action.functionality_range
 
     def set_appearance(self, value):
-        actions = copy.copy(self.actions)
-        actions.sort(key=lambda x: x.created)
+        actions = self.timeline.by_created
         with suppress(LookupError, ValueError, StopIteration):
             action = next(e for e in reversed(actions) if e.type == 'VisualTest')
             action.appearance_range = value
 
     def set_functionality(self, value):
-        actions = copy.copy(self.actions)
-        actions.sort(key=lambda x: x.created)
+        actions = self.timeline.by_created
         with suppress(LookupError, ValueError, StopIteration):
             action = next(e for e in reversed(actions) if e.type == 'VisualTest')
             action.functionality_range = value
@@ -884,15 +821,12 @@ class Device(Thing):
 
         :raise LookupError: Device has not an action of the given type.
         """
-        try:
-            # noinspection PyTypeHints
-            actions = copy.copy(self.actions)
-            actions.sort(key=lambda x: x.created)
-            return next(e for e in reversed(actions) if isinstance(e, types))
-        except StopIteration:
+        action = self.timeline.last_of(types)
+        if action is None:
             raise LookupError(
                 '{!r} does not contain actions of types {}.'.format(self, types)
             )
+        return action
 
     def which_user_put_this_device_in_trace(self):
         """which is the user than put this device in this trade"""
@@ -1012,8 +946,7 @@ class Device(Thing):
 
         for ac in snapshots:
             for slog in SnapshotsLog.query.filter_by(snapshot=ac):
-                slog.snapshot_id = None
-                slog.snapshot_uuid = None
+                slog.detach_snapshot()
             db.session.delete(ac)
 
     def remove_devices(self, devices):
@@ -1024,8 +957,7 @@ class Device(Thing):
                 if ac.type != 'Snapshot':
                     continue
                 for slog in SnapshotsLog.query.filter_by(snapshot=ac):
-                    slog.snapshot_id = None
-                    slog.snapshot_uuid = None
+                    slog.detach_snapshot()
 
             for c in dev.components:
                 c.parent_id = None
@@ -1316,6 +1248,20 @@ class Placeholder(Thing):
     )
     owner = db.relationship(User, primaryjoin=owner_id == User.id)
 
+    __table_args__ = (
+        # Trigrams for the fuzzy search, see device.fuzzy
+        db.Index(
+            'placeholder_id_device_supplier_trgm',
+            text('(id_device_supplier::text) gin_trgm_ops'),
+            postgresql_using='gin',
+        ),
+        db.Index(
+            'placeholder_id_device_internal_trgm',
+            text('(id_device_internal::text) gin_trgm_ops'),
+            postgresql_using='gin',
+        ),
+    )
+
     @property
     def actions(self):
         actions = list(self.device.get_actions()) or []
@@ -1422,9 +1368,8 @@ class Computer(Device):
         else:
             super().__init__(*args, **kwargs)
 
-    @property
-    def actions(self) -> list:
-        actions = copy.copy(super().actions)
+    def _actions(self) -> list:
+        actions = super()._actions()
         actions_parent = copy.copy(self.actions_parent)
         for ac in actions_parent:
             ac.real_created = ac.created
@@ -1730,9 +1675,8 @@ class Component(Device):
             raise ResourceNotFound(self.type)
         return component
 
-    @property
-    def actions(self) -> list:
-        return sorted(chain(super().actions, self.actions_components))
+    def _actions(self) -> list:
+        return sorted(chain(super()._actions(), self.actions_components))
 
 
 class JoinedComponentTableMixin:
@@ -2098,7 +2042,45 @@ class Manufacturer(db.Model):
             cursor.copy_expert('COPY common.manufacturer FROM STDIN (FORMAT csv)', f)
 
 
+class ManufacturerSynonym(db.Model):
+    """A word that the search finds for the devices whose manufacturer
+    contains a text, like *hp* for *Hewlett-Packard*.
+
+    :class:`ereuse_devicehub.resources.device.search.DeviceSearch`
+    adds the words of each weight to the documents of the devices,
+    once each and in alphabetical order.
+    """
+
+    pattern = db.Column(db.Unicode(), primary_key=True)
+    pattern.comment = """Lowercase text that the name of the manufacturer
+    contains.
+    """
+    token = db.Column(db.Unicode(), primary_key=True)
+    token.comment = """The word that the search finds."""
+    weight = db.Column(
+        db.Unicode(1),
+        db.CheckConstraint("weight in ('A', 'B', 'C', 'D')"),
+        nullable=False,
+    )
+    weight.comment = """The weight of the word, from A to D."""
+
+    __table_args__ = ({'schema': 'common'},)
+
+    @classmethod
+    def add_all_to_session(cls, session: db.Session):
+        """Adds all the synonyms to session."""
+        cursor = session.connection().connection.cursor()
+        path = pathlib.Path(__file__).parent.joinpath('manufacturer_synonyms.csv')
+        with path.open() as f:
+            cursor.copy_expert(
+                'COPY common.manufacturer_synonym (pattern, token, weight) '
+                'FROM STDIN (FORMAT csv)',
+                f,
+            )
+
+
 listener_reset_field_updated_in_actual_time(Device)
+listener_reset_field_updated_in_actual_time(Placeholder)
 
 
 def create_code_tag(mapper, connection, device):
@@ -0,0 +1,100 @@
+"""Conditional responses and render cache for the public page of
+the devices.
+
+The public page of a device is the target of the QR codes of the
+labels, and it is rendered from the device, its placeholder, the
+abstract device bound to it with its components, and the actions of
+all of them.
+
+:func:`page_version` stamps the page with the number of those rows
+and the last time any of them was updated, with one query, so the
+page is only rendered when it changed: clients get ``304 Not
+Modified`` through the ``ETag`` header, and :class:`PublicPageCache` keeps the last rendered pages per process
+(see ``PUBLIC_PAGE_CACHE_SIZE``). As the stamp is read for every
+request, a change committed by any worker produces a new version.
+
+There is no ``Last-Modified``: deleting a row changes the counts but
+can leave the last update time as it was, so only the ``ETag`` tells
+if the page changed.
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+from flask import current_app as app
+
+from ereuse_devicehub import __version__
+from ereuse_devicehub.db import any_of, db
+from ereuse_devicehub.resources.action.models import (
+    Action,
+    ActionDevice,
+    ActionWithOneDevice,
+)
+from ereuse_devicehub.resources.device.models import Component, Device, Placeholder
+
+_action = Action.__table__
+_action_device = ActionDevice.__table__
+_action_one = ActionWithOneDevice.__table__
+_component = Component.__table__
+_device = Device.__table__
+_placeholder = Placeholder.__table__
+
+
+def _stamp(table, condition):
+    count = db.select([db.func.count()]).select_from(table).where(condition)
+    updated = db.select([db.func.max(table.c.updated)]).where(condition)
+    return count.as_scalar(), updated.as_scalar()
+
+
+def page_version(devices: Iterable[Device], placeholder: Optional[Placeholder]) -> str:
+    """The version of the public page showing the devices."""
+    ids = {device.id for device in devices}
+    components = db.select([_component.c.id]).where(any_of(_component.c.parent_id, ids))
+    actions = db.union(
+        db.select([_action_device.c.action_id]).where(
+            any_of(_action_device.c.device_id, ids)
+        ),
+        db.select([_action_one.c.id]).where(any_of(_action_one.c.device_id, ids)),
+        db.select([_action.c.id]).where(any_of(_action.c.parent_id, ids)),
+    )
+    placeholder_id = placeholder.id if placeholder else None
+    row = db.session.query(
+        *_stamp(_device, any_of(_device.c.id, ids) | _device.c.id.in_(components)),
+        *_stamp(_action, _action.c.id.in_(actions)),
+        *_stamp(_placeholder, _placeholder.c.id == placeholder_id),
+    ).one()
+    # The template changes with the version of Devicehub
+    key = '{}:{}'.format(__version__, row)
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+class PublicPageCache:
+    """The last rendered public pages, by inventory, DHID and version
+    of the page.
+    """
+
+    def __init__(self) -> None:
+        self._entries = OrderedDict()  # type: OrderedDict
+
+    def get(self, dhid: str, version: str, render: Callable[[], str]) -> str:
+        size = app.config['PUBLIC_PAGE_CACHE_SIZE']
+        if not size:
+            return render()
+        key = app.schema, dhid
+        entry = self._entries.get(key)
+        if entry and entry[0] == version:
+            self._entries.move_to_end(key)
+            return entry[1]
+        html = render()
+        self._entries[key] = version, html
+        self._entries.move_to_end(key)
+        while len(self._entries) > size:
+            self._entries.popitem(last=False)
+        return html
+
+    def clear(self):
+        self._entries.clear()
+
+
+public_page_cache = PublicPageCache()
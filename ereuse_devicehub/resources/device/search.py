@@ -1,16 +1,15 @@
 from itertools import chain
 
-import inflection
 from sqlalchemy.dialects import postgresql
-from sqlalchemy.dialects.postgresql import TSVECTOR
-from sqlalchemy.orm import aliased
+from sqlalchemy.dialects.postgresql import TSVECTOR, aggregate_order_by
 
 from ereuse_devicehub.db import db
 from ereuse_devicehub.resources import search
 from ereuse_devicehub.resources.action.models import Action, ActionWithMultipleDevices, \
     ActionWithOneDevice
-from ereuse_devicehub.resources.agent.models import Organization
-from ereuse_devicehub.resources.device.models import Component, Computer, Device
+from ereuse_devicehub.resources.agent.models import Agent
+from ereuse_devicehub.resources.device.models import Component, Computer, Device, \
+    ManufacturerSynonym
 from ereuse_devicehub.resources.tag.model import Tag
 
 
@@ -66,8 +65,9 @@ class DeviceSearch(db.Model):
         # see https://groups.google.com/forum/#!topic/sqlalchemy/hBzfypgPfYo
         # todo probably should replace it with what the solution says
         session.flush()
-        for device in (d for d in devices_to_update if not isinstance(d, Component)):
-            cls.set_device_tokens(session, device)
+        ids = sorted(d.id for d in devices_to_update if not isinstance(d, Component))
+        if ids:
+            cls.set_devices_tokens(session, ids)
 
     @classmethod
     def set_all_devices_tokens_if_empty(cls, session: db.Session):
@@ -83,76 +83,113 @@ class DeviceSearch(db.Model):
     def regenerate_search_table(cls, session: db.Session):
         """Deletes and re-computes all the search table."""
         DeviceSearch.query.delete()
-        for device in Device.query:
-            if not isinstance(device, Component):
-                cls.set_device_tokens(session, device)
+        cls.set_devices_tokens(session)
 
     @classmethod
     def set_device_tokens(cls, session: db.Session, device: Device):
         """(Re)Generates the device search tokens."""
         assert not isinstance(device, Component)
+        cls.set_devices_tokens(session, [device.id])
 
-        tokens = [
-            (str(device.id), search.Weight.A),
-            (inflection.humanize(device.type), search.Weight.B),
-            (Device.model, search.Weight.B),
-            (Device.manufacturer, search.Weight.C),
-            (Device.serial_number, search.Weight.A)
-        ]
-
-        if device.manufacturer:
-            # todo this has to be done using a dictionary
-            manufacturer = device.manufacturer.lower()
-            if 'asus' in manufacturer:
-                tokens.append(('asus', search.Weight.B))
-            if 'hewlett' in manufacturer or 'hp' in manufacturer or 'h.p' in manufacturer:
-                tokens.append(('hp', search.Weight.B))
-                tokens.append(('h.p', search.Weight.C))
-                tokens.append(('hewlett', search.Weight.C))
-                tokens.append(('packard', search.Weight.C))
-
-        if isinstance(device, Computer):
-            # Aggregate the values of all the components of pc
-            Comp = aliased(Component)
-            tokens.extend((
-                (db.func.string_agg(db.cast(Comp.id, db.TEXT), ' '), search.Weight.D),
-                (db.func.string_agg(Comp.model, ' '), search.Weight.C),
-                (db.func.string_agg(Comp.manufacturer, ' '), search.Weight.D),
-                (db.func.string_agg(Comp.serial_number, ' '), search.Weight.B),
-                (db.func.string_agg(Comp.type, ' '), search.Weight.B),
-                ('Computer', search.Weight.C),
-                ('PC', search.Weight.C),
-            ))
-
-        properties = session \
-            .query(search.Search.vectorize(*tokens)) \
-            .filter(Device.id == device.id)
-
-        if isinstance(device, Computer):
-            # Join to components
-            properties = properties \
-                .outerjoin(Comp, Computer.components) \
-                .group_by(Device.id)
-
-        tags = session.query(
-            search.Search.vectorize(
-                (db.func.string_agg(Tag.id, ' '), search.Weight.A),
-                (db.func.string_agg(Tag.secondary, ' '), search.Weight.A),
-                (db.func.string_agg(Organization.name, ' '), search.Weight.B)
-            )
-        ).filter(Tag.device_id == device.id).join(Tag.org)
-
-        devicehub_ids = session.query(
-            search.Search.vectorize(
-                (db.func.string_agg(Device.devicehub_id, ' '), search.Weight.A),
-            )
-        ).filter(Device.devicehub_id == device.devicehub_id)
+    @classmethod
+    def set_devices_tokens(cls, session: db.Session, device_ids=None):
+        """(Re)Generates the search tokens of the devices, or of all
+        the devices if ``device_ids`` is None, with one statement.
+
+        Components have no document; their values are in the one of
+        their computer.
+        """
+        documents = db.select([
+            _device.c.id,
+            _properties(),
+            _tags.c.document,
+            search.Search.vectorize((_device.c.devicehub_id, search.Weight.A)),
+        ]).select_from(
+            _device.outerjoin(_computer, _computer.c.id == _device.c.id)
+            .join(_synonyms, db.true())
+            .join(_components, db.true())
+            .join(_tags, db.true())
+        ).where(~db.exists().where(_component.c.id == _device.c.id))
+        if device_ids is not None:
+            documents = documents.where(_device.c.id.in_(device_ids))
 
         # Note that commit flushes later
-        # todo see how to get rid of the one_or_none() by embedding those as subqueries
-        # I don't like this but I want the 'on_conflict_on_update' thingie
-        device_document = dict(properties=properties.one_or_none(), tags=tags.one_or_none(), devicehub_ids=devicehub_ids.one_or_none())
+        columns = 'properties', 'tags', 'devicehub_ids'
         insert = postgresql.insert(DeviceSearch.__table__) \
-            .values(device_id=device.id, **device_document) \
-            .on_conflict_do_update(constraint='device_search_pkey', set_=device_document)
+            .from_select(('device_id',) + columns, documents)
+        insert = insert.on_conflict_do_update(
+            constraint='device_search_pkey',
+            set_={column: insert.excluded[column] for column in columns}
+        )
         session.execute(insert)
+
+
+_device = Device.__table__
+_computer = Computer.__table__
+_component = Component.__table__
+_part = Device.__table__.alias('part')
+
+
+def _string_agg(column, order_by):
+    separator = aggregate_order_by(db.literal_column("' '"), order_by)
+    return db.func.string_agg(column, separator)
+
+
+def _synonyms_of(weight: search.Weight):
+    synonym = ManufacturerSynonym.__table__
+    tokens = _string_agg(db.distinct(synonym.c.token), synonym.c.token)
+    return tokens.filter(synonym.c.weight == weight.name).label(weight.name)
+
+
+# The synonyms of the manufacturer of the device, by weight
+_synonyms = db.select([_synonyms_of(weight) for weight in search.Weight]).where(
+    db.func.strpos(db.func.lower(db.cast(_device.c.manufacturer, db.TEXT)),
+                   ManufacturerSynonym.__table__.c.pattern) > 0
+).lateral('synonyms')
+
+# The values of the components of the computer, joined
+_components = db.select([
+    _string_agg(db.cast(_part.c.id, db.TEXT), _part.c.id).label('ids'),
+    _string_agg(_part.c.model, _part.c.id).label('models'),
+    _string_agg(_part.c.manufacturer, _part.c.id).label('manufacturers'),
+    _string_agg(_part.c.serial_number, _part.c.id).label('serial_numbers'),
+    _string_agg(_part.c.type, _part.c.id).label('types'),
+]).select_from(
+    _part.join(_component, _component.c.id == _part.c.id)
+).where(_component.c.parent_id == _device.c.id).lateral('components')
+
+_tag = Tag.__table__
+# The name of the organization is in the table of the agents
+_org = Agent.__table__
+
+_tags = db.select([
+    search.Search.vectorize(
+        (db.func.string_agg(_tag.c.id, ' '), search.Weight.A),
+        (db.func.string_agg(_tag.c.secondary, ' '), search.Weight.A),
+        (db.func.string_agg(_org.c.name, ' '), search.Weight.B)
+    ).label('document')
+]).select_from(
+    _tag.join(_org, _org.c.id == _tag.c.org_id)
+).where(_tag.c.device_id == _device.c.id).lateral('tags')
+
+
+def _properties():
+    """The document of the values of the device, with the synonyms of
+    its manufacturer and, for computers, the values of its components.
+    """
+    is_computer = _computer.c.id.isnot(None)
+    return search.Search.vectorize(
+        (db.cast(_device.c.id, db.TEXT), search.Weight.A),
+        (_device.c.type, search.Weight.B),
+        (_device.c.model, search.Weight.B),
+        (_device.c.manufacturer, search.Weight.C),
+        (_device.c.serial_number, search.Weight.A),
+        *((_synonyms.c[weight.name], weight) for weight in search.Weight),
+        (_components.c.ids, search.Weight.D),
+        (_components.c.models, search.Weight.C),
+        (_components.c.manufacturers, search.Weight.D),
+        (_components.c.serial_numbers, search.Weight.B),
+        (_components.c.types, search.Weight.B),
+        (db.case([(is_computer, 'Computer')]), search.Weight.C),
+        (db.case([(is_computer, 'PC')]), search.Weight.C),
+    )
@@ -0,0 +1,89 @@
+"""The actions of a device, sorted once.
+
+``Device.actions`` merges and sorts the actions of the device every
+time it is read, and the status methods (``status``,
+``physical_status``, ``allocated_status``, ``last_action_of``...)
+copy it and sort it again by ``created`` to get the last action of
+some types. The device list calls several of them per row.
+
+:class:`Timeline` keeps both orders and the actions grouped by
+class, so the last action of some types is found without going
+through the history. The timeline of a device is computed once and
+kept in the instance until :data:`generation` changes, which happens
+when actions are added to or removed from devices, and when the
+session flushes, commits, rolls back or expires devices or actions.
+"""
+
+from bisect import bisect_left
+from itertools import count
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+
+from sqlalchemy import event
+from sqlalchemy.orm import mapper
+
+from ereuse_devicehub.db import DhSession
+
+_counter = count()
+generation = next(_counter)
+"""Changes when the timelines computed before can be outdated."""
+
+
+def invalidate(*args, **kwargs):
+    global generation
+    generation = next(_counter)
+
+
+class Timeline:
+    def __init__(self, actions: Sequence) -> None:
+        self.generation = generation
+        self.actions = tuple(actions)
+        """The actions as ``Device.actions`` returns them."""
+        self.by_created = tuple(sorted(self.actions, key=lambda ac: ac.created))
+        """The actions sorted by ``created``."""
+        self._buckets = {}  # type: Dict[Type, Tuple[List[int], List]]
+        for i, ac in enumerate(self.by_created):
+            positions, created = self._buckets.setdefault(ac.__class__, ([], []))
+            positions.append(i)
+            created.append(ac.created)
+        self._classes = {}  # type: Dict[Tuple[Type, ...], List[Type]]
+
+    def last_of(self, types: Tuple[Type, ...], before=None) -> Optional[object]:
+        """The last action, by ``created``, that is an instance of
+        ``types`` and, if set, was created before ``before``.
+        """
+        classes = self._classes.get(types)
+        if classes is None:
+            classes = [cls for cls in self._buckets if issubclass(cls, types)]
+            self._classes[types] = classes
+        last = -1
+        for cls in classes:
+            positions, created = self._buckets[cls]
+            i = len(positions) if before is None else bisect_left(created, before)
+            if i:
+                last = max(last, positions[i - 1])
+        return self.by_created[last] if last >= 0 else None
+
+
+@event.listens_for(mapper, 'after_configured', once=True)
+def _listen_actions():
+    from ereuse_devicehub.resources.action.models import (
+        Action,
+        ActionWithMultipleDevices,
+        ActionWithOneDevice,
+    )
+    from ereuse_devicehub.resources.device.models import Device
+
+    for attr in ActionWithMultipleDevices.devices, Action.components:
+        event.listen(attr, 'append', invalidate)
+        event.listen(attr, 'remove', invalidate)
+        event.listen(attr, 'bulk_replace', invalidate)
+    for attr in ActionWithOneDevice.device, Action.parent:
+        event.listen(attr, 'set', invalidate)
+    for cls in Device, Action:
+        event.listen(cls, 'expire', invalidate, propagate=True)
+        event.listen(cls, 'refresh', invalidate, propagate=True)
+
+
+event.listen(DhSession, 'after_flush', invalidate)
+event.listen(DhSession, 'after_commit', invalidate)
+event.listen(DhSession, 'after_soft_rollback', invalidate)
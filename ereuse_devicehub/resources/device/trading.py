@@ -0,0 +1,238 @@
+"""The trading state of the devices of a trade.
+
+The state of a device in a trade results from replaying the
+``Confirm`` and ``Revoke`` actions of the users of the trade.
+Instead of doing it every time the state is shown, the result is
+saved in :class:`DeviceTradeState` when those actions are created,
+and the states of all the devices of a trade are read with one query.
+"""
+
+from itertools import chain
+from typing import Dict, Iterable, Tuple
+
+from flask import g
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import UUID
+
+from ereuse_devicehub.db import DhSession, db
+from ereuse_devicehub.resources.action.models import Confirm, Trade
+from ereuse_devicehub.resources.device.models import Device
+from ereuse_devicehub.resources.user.models import User
+
+STATUS = {
+    0: 'Trade',
+    1: 'Confirm',
+    2: 'NeedConfirmation',
+    3: 'TradeConfirmed',
+    4: 'Revoke',
+    5: 'NeedConfirmRevoke',
+    6: 'RevokeConfirmed',
+}
+
+CONFIRMS = 'Confirm', 'Revoke'
+"""The types of the actions that change the trading state."""
+
+
+def replay(confirms: Iterable[Tuple[str, object]], user_from, user_to, simple=False):
+    """Runs the state machine of the trading state.
+
+    :param confirms: The type and user of the ``Confirm`` and
+                     ``Revoke`` of the trade, sorted.
+    :return: The status and the last user that changed it.
+             Unless ``simple``, the status 1 and 4 can also be 2 and 5
+             depending on who is looking, see :func:`status_for`.
+    """
+    status = 0
+    last_user = None
+    for t, user in confirms:
+        if user not in [user_from, user_to]:
+            continue
+
+        if t == 'Confirm':
+            if status in [0, 6]:
+                if simple:
+                    status = 2
+                    continue
+                status = 1
+                last_user = user
+                continue
+
+            if status in [1, 2]:
+                if last_user != user:
+                    status = 3
+                    last_user = user
+                continue
+
+            if status in [4, 5]:
+                status = 3
+                last_user = user
+                continue
+
+        if t == 'Revoke':
+            if status == 3:
+                if simple:
+                    status = 5
+                    continue
+                status = 4
+                last_user = user
+                continue
+
+            if status in [4, 5]:
+                if last_user != user:
+                    status = 6
+                    last_user = user
+                continue
+
+            if status in [1, 2]:
+                status = 6
+                last_user = user
+                continue
+
+    return status, last_user
+
+
+def status_for(status: int, last_user_id, user_from_id, user_to_id, user_id) -> int:
+    """The status as the user sees it: a pending confirmation
+    or revocation of the other party needs the action of the user.
+    """
+    if status in [1, 4]:
+        if last_user_id == user_from_id and user_to_id == user_id:
+            return status + 1
+        if last_user_id == user_to_id and user_from_id == user_id:
+            return status + 1
+    return status
+
+
+class DeviceTradeState(db.Model):
+    """The result of replaying the confirmations of a trade for
+    a device.
+    """
+
+    device_id = db.Column(
+        db.BigInteger, db.ForeignKey(Device.id, ondelete='CASCADE'), primary_key=True
+    )
+    device = db.relationship(Device, primaryjoin=Device.id == device_id)
+    trade_id = db.Column(
+        UUID(as_uuid=True),
+        db.ForeignKey(Trade.id, ondelete='CASCADE'),
+        primary_key=True,
+    )
+    trade = db.relationship(Trade, primaryjoin=Trade.id == trade_id)
+    status = db.Column(db.SmallInteger, nullable=False, default=0)
+    status.comment = """The status from the state machine, see ``replay``."""
+    simple_status = db.Column(db.SmallInteger, nullable=False, default=0)
+    simple_status.comment = """The status from the simple state machine."""
+    last_user_id = db.Column(UUID(as_uuid=True), db.ForeignKey(User.id))
+    last_user_id.comment = """The last user that changed the status."""
+
+    __table_args__ = (
+        db.Index(
+            'device_trade_state_trade_id_index', trade_id, postgresql_using='hash'
+        ),
+    )
+
+    def get_status(self, simple=None) -> str:
+        if simple:
+            return STATUS[self.simple_status]
+        trade = self.trade
+        status = status_for(
+            self.status,
+            self.last_user_id,
+            trade.user_from_id,
+            trade.user_to_id,
+            g.user.id,
+        )
+        return STATUS[status]
+
+    def update(self):
+        """Replays the confirmations of the device in the trade."""
+        trade = self.trade
+        # Confirmations are sorted by creation, which new actions
+        # already have before being flushed
+        actions = sorted(self.device.actions_multiple, key=lambda ac: ac.created)
+        confirms = [
+            (ac.t, ac.user) for ac in actions if ac.t in CONFIRMS and ac.action == trade
+        ]
+        users = trade.user_from, trade.user_to
+        self.status, last_user = replay(confirms, *users)
+        self.last_user_id = last_user.id if last_user else None
+        self.simple_status, _ = replay(confirms, *users, simple=True)
+
+    @classmethod
+    def of_trade(cls, trade: Trade) -> Dict[int, 'DeviceTradeState']:
+        """The states of the devices of the trade, by device id.
+
+        The states are read once per trade and session.
+        """
+        states = db.session.info.setdefault('trade_states', {})
+        if trade.id not in states:
+            query = cls.query.filter_by(trade_id=trade.id)
+            states[trade.id] = {state.device_id: state for state in query}
+        return states[trade.id]
+
+
+def trading(device: Device, trade: Trade, simple=None) -> str:
+    """The trading state of the device in the trade, see
+    :meth:`ereuse_devicehub.resources.device.models.Device.trading`.
+    """
+    state = DeviceTradeState.of_trade(trade).get(device.id)
+    if not state:
+        return STATUS[0]
+    return state.get_status(simple)
+
+
+@event.listens_for(DhSession, 'before_flush')
+def _update_trade_states(session, flush_context, instances):
+    pairs = {}
+    for ac in session.new:
+        if (
+            isinstance(ac, Confirm)
+            and ac.t in CONFIRMS
+            and isinstance(ac.action, Trade)
+        ):
+            for device in ac.devices:
+                pairs[id(device), id(ac.action)] = device, ac.action
+
+    states = session.info.setdefault('trade_states', {})
+    for device, trade in pairs.values():
+        state = None
+        if device.id is not None and trade.id is not None:
+            state = session.query(DeviceTradeState).get((device.id, trade.id))
+        if not state:
+            state = DeviceTradeState(device=device, trade=trade)
+            session.add(state)
+        state.update()
+        if trade.id in states and device.id is not None:
+            states[trade.id][device.id] = state
+
+
+@event.listens_for(DhSession, 'after_commit')
+@event.listens_for(DhSession, 'after_soft_rollback')
+def _forget_trade_states(session, *args):
+    session.info.pop('trade_states', None)
+
+
+def states_of_confirms(rows) -> Iterable[dict]:
+    """Computes the states from rows of ``(device_id, trade_id,
+    user_from_id, user_to_id, type, user_id)``, sorted by device,
+    trade and time of the confirmation.
+
+    Used to compute the states of the existing trades.
+    """
+    key = None
+    confirms = []
+    for row in chain(map(tuple, rows), [(None,) * 6]):
+        if key and key != row[:4]:
+            device_id, trade_id, user_from_id, user_to_id = key
+            status, last_user_id = replay(confirms, user_from_id, user_to_id)
+            simple_status, _ = replay(confirms, user_from_id, user_to_id, simple=True)
+            yield {
+                'device_id': device_id,
+                'trade_id': trade_id,
+                'status': status,
+                'simple_status': simple_status,
+                'last_user_id': last_user_id,
+            }
+            confirms = []
+        key = row[:4]
+        confirms.append(row[4:])
@@ -14,19 +14,22 @@ from marshmallow import fields
 from marshmallow import fields as f
 from marshmallow import validate as v
 from sqlalchemy.util import OrderedSet
+from werkzeug.http import is_resource_modified
 
 from ereuse_devicehub import auth
 from ereuse_devicehub.db import db
 from ereuse_devicehub.query import SearchQueryParser, things_response
-from ereuse_devicehub.resources import search
+from ereuse_devicehub.resources import baked, search
 from ereuse_devicehub.resources.action import models as actions
-from ereuse_devicehub.resources.action.models import Trade
 from ereuse_devicehub.resources.device import states
+from ereuse_devicehub.resources.device.manufacturers import manufacturers
 from ereuse_devicehub.resources.device.models import Computer, Device, Manufacturer
+from ereuse_devicehub.resources.device.public import page_version, public_page_cache
 from ereuse_devicehub.resources.device.search import DeviceSearch
 from ereuse_devicehub.resources.enums import SnapshotSoftware
 from ereuse_devicehub.resources.lot.models import LotDeviceDescendants
 from ereuse_devicehub.resources.tag.model import Tag
+from ereuse_devicehub.resources.visibility import visible_device_ids
 from ereuse_devicehub.teal import query
 from ereuse_devicehub.teal.cache import cache
 from ereuse_devicehub.teal.db import ResourceNotFound
@@ -137,7 +140,7 @@ class DeviceView(View):
             return self.one_private(id)
 
     def one_public(self, id: int):
-        devices = Device.query.filter_by(devicehub_id=id, active=True).all()
+        devices = baked.device(id, active=True).all()
         if not devices:
             devices = [Device.query.filter_by(dhid_bk=id, active=True).one()]
         device = devices[0]
@@ -151,21 +154,32 @@ class DeviceView(View):
         placeholder = device.binding or device.placeholder
         device_abstract = placeholder and placeholder.binding or device
         device_real = placeholder and placeholder.device or device
-        return render_template(
-            'devices/layout.html',
-            placeholder=placeholder,
-            device=device,
-            device_abstract=device_abstract,
-            device_real=device_real,
-            states=states,
-            abstract=abstract,
-        )
+        etag = page_version({device, device_abstract, device_real}, placeholder)
+        if not is_resource_modified(request.environ, etag):
+            response = Response(status=304)
+        else:
+            html = public_page_cache.get(
+                id,
+                etag,
+                lambda: render_template(
+                    'devices/layout.html',
+                    placeholder=placeholder,
+                    device=device,
+                    device_abstract=device_abstract,
+                    device_real=device_real,
+                    states=states,
+                    abstract=abstract,
+                ),
+            )
+            response = Response(html, mimetype='text/html')
+        response.set_etag(etag)
+        # Clients keep the page but ask if it changed before using it
+        response.cache_control.no_cache = True
+        return response
 
     @auth.Auth.requires_auth
     def one_private(self, id: str):
-        device = Device.query.filter_by(
-            devicehub_id=id, owner_id=g.user.id, active=True
-        ).first()
+        device = baked.device(id, g.user.id, active=True).first()
         if not device:
             return self.one_public(id)
         return self.schema.jsonify(device)
@@ -187,15 +201,10 @@ class DeviceView(View):
         )
 
     def query(self, args):
-        trades = Trade.query.filter(
-            (Trade.user_from == g.user) | (Trade.user_to == g.user)
-        ).distinct()
-
-        trades_dev_ids = {d.id for t in trades for d in t.devices}
-
+        visible = visible_device_ids(g.user.id, shared=False)
         query = (
             Device.query.filter(Device.active == True)
-            .filter((Device.owner_id == g.user.id) | (Device.id.in_(trades_dev_ids)))
+            .filter(Device.id.in_(visible))
             .distinct()
         )
 
@@ -324,14 +333,7 @@ class ManufacturerView(View):
 
     @cache(datetime.timedelta(days=1))
     def find(self, args: dict):
-        search = args['search']
-        manufacturers = Manufacturer.query.filter(
-            Manufacturer.name.ilike(search + '%')
-        ).paginate(
-            page=1, per_page=6
-        )  # type: Pagination
+        found = manufacturers().starting_with(args['search'])
         return jsonify(
-            items=app.resources[Manufacturer.t].schema.dump(
-                manufacturers.items, many=True, nested=1
-            )
+            items=app.resources[Manufacturer.t].schema.dump(found, many=True, nested=1)
         )
@@ -0,0 +1,147 @@
+"""Renders many PDF documents at once, in a pool of processes.
+
+Rendering a certificate with WeasyPrint takes most of the time of
+the request, and it is done by one process at a time. The HTML of
+the documents needs the database and the templates, so it is built
+in the web process; :func:`render_zip` then renders the PDFs in
+``CERTIFICATES_PROCESSES`` processes and packs them in a ZIP file
+with the time each one took.
+
+Each web worker starts its pool the first time it renders, and keeps
+it. The processes are spawned, not forked, so they do not inherit
+the connections to the database or the locks of the threads of the
+worker. Each process keeps its font configuration and the
+stylesheets and images it downloaded (ex. the bootstrap of the
+certificates), so they are loaded once per process instead of once
+per document. With 0 processes the documents are rendered in the
+worker, which keeps them the same way.
+"""
+
+import csv
+import logging
+import multiprocessing
+import time
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO, StringIO
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from weasyprint import HTML, default_url_fetcher
+from weasyprint.fonts import FontConfiguration
+
+logger = logging.getLogger(__name__)
+
+Document = namedtuple('Document', 'name html')
+"""A document to render: the name of the PDF file and its HTML."""
+
+FETCHED_SIZE = 64
+"""Maximum of downloaded files that each process keeps."""
+
+_fonts = None  # type: FontConfiguration
+_fetched = {}  # type: Dict[str, dict]
+
+_pool = None  # type: Optional[ProcessPoolExecutor]
+_pool_lock = Lock()
+
+
+def _init_process():
+    global _fonts
+    if _fonts is None:
+        _fonts = FontConfiguration()
+
+
+def _get_pool(processes: int) -> ProcessPoolExecutor:
+    """The pool of the worker, started the first time."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                processes,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_process,
+            )
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Forgets a pool that cannot be used, so the next render
+    starts another one.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def _fetch(url: str) -> dict:
+    """As WeasyPrint's fetcher, keeping what was downloaded."""
+    if url.startswith('data:'):
+        return default_url_fetcher(url)
+    if url not in _fetched:
+        if len(_fetched) >= FETCHED_SIZE:
+            _fetched.clear()
+        resource = default_url_fetcher(url)
+        if 'file_obj' in resource:
+            with resource.pop('file_obj') as f:
+                resource['string'] = f.read()
+        _fetched[url] = resource
+    return dict(_fetched[url])
+
+
+def _render(document: Document, base_url: str) -> Tuple[str, bytes, float]:
+    start = time.perf_counter()
+    html = HTML(string=document.html, base_url=base_url, url_fetcher=_fetch)
+    pdf = html.write_pdf(font_config=_fonts)
+    return document.name, pdf, time.perf_counter() - start
+
+
+def render(
+    documents: Iterable[Document], base_url: str, processes: int
+) -> List[Tuple[str, bytes, float]]:
+    """Renders the documents in the pool of processes of the
+    worker, or in the worker if ``processes`` is 0.
+
+    :return: The name, PDF and seconds it took, of every document.
+    """
+    documents = list(documents)
+    if not documents:
+        return []
+    if processes < 1:
+        _init_process()
+        return [_render(document, base_url) for document in documents]
+    base_urls = [base_url] * len(documents)
+    pool = _get_pool(processes)
+    try:
+        return list(pool.map(_render, documents, base_urls))
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+
+
+def render_zip(
+    documents: Iterable[Document], base_url: str, processes: int
+) -> Tuple[bytes, List[bytes]]:
+    """Renders the documents and packs them in a ZIP file, with
+    a ``timing.csv`` file with the seconds each one took.
+
+    :return: The ZIP file and the PDFs in it.
+    """
+    start = time.perf_counter()
+    rendered = render(documents, base_url, processes)
+    timing = StringIO()
+    cw = csv.writer(timing, delimiter=';', lineterminator='\n')
+    cw.writerow(['Document', 'Seconds'])
+    data = BytesIO()
+    with zipfile.ZipFile(data, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, pdf, seconds in rendered:
+            zf.writestr(name, pdf)
+            cw.writerow([name, '{:.3f}'.format(seconds)])
+        zf.writestr('timing.csv', timing.getvalue())
+    logger.info(
+        'Rendered %s documents in %.3fs', len(rendered), time.perf_counter() - start
+    )
+    return data.getvalue(), [pdf for _, pdf, _ in rendered]
@@ -18,7 +18,7 @@ from flask.json import jsonify
 
 import ereuse_devicehub.teal.marshmallow
 from ereuse_devicehub import auth
-from ereuse_devicehub.db import db
+from ereuse_devicehub.db import db, read_replica
 from ereuse_devicehub.resources.action import models as evs
 from ereuse_devicehub.resources.action.models import Trade
 from ereuse_devicehub.resources.deliverynote.models import Deliverynote
@@ -31,7 +31,12 @@ from ereuse_devicehub.resources.documents.device_row import (
     StockRow,
 )
 from ereuse_devicehub.resources.enums import SessionType
-from ereuse_devicehub.resources.hash_reports import ReportHash, insert_hash, verify_hash
+from ereuse_devicehub.resources.hash_reports import (
+    ReportHash,
+    hash_exists,
+    insert_hash,
+    verify_hash,
+)
 from ereuse_devicehub.resources.lot import LotView
 from ereuse_devicehub.resources.lot.models import Lot
 from ereuse_devicehub.resources.user.models import Session
@@ -45,6 +50,8 @@ class Format(enum.Enum):
 
 
 class DocumentView(DeviceView):
+    decorators = [read_replica]
+
     class FindArgs(DeviceView.FindArgs):
         format = ereuse_devicehub.teal.marshmallow.EnumField(Format, missing=None)
 
@@ -123,17 +130,23 @@ class DocumentView(DeviceView):
     @staticmethod
     def erasure(query: db.Query):
         def erasures():
+            # The last erasures of the data storages, like ``privacy``,
+            # are read at once from the latest erasures
+            computers, storages = [], []
             for model in query:
                 if isinstance(model, devs.Computer):
-                    for erasure in model.privacy:
-                        yield erasure
+                    computers.append(model.id)
                 elif isinstance(model, devs.DataStorage):
-                    erasure = model.privacy
-                    if erasure:
-                        yield erasure
+                    storages.append(model.id)
                 else:
                     assert isinstance(model, evs.EraseBasic)
                     yield model
+            if computers:
+                components = evs.LatestErasure.storages_of(computers)
+                storages.extend(id for id, in db.session.execute(components))
+            if storages:
+                last = evs.LatestErasure.erasures(storages, twins=False)
+                yield from last.order_by(evs.EraseBasic.created)
 
         url_pdf = boltons.urlutils.URL(flask.request.url)
         url_pdf.query_params['format'] = 'PDF'
@@ -146,6 +159,8 @@ class DocumentView(DeviceView):
 
 
 class DevicesDocumentView(DeviceView):
+    decorators = [read_replica]
+
     @cache(datetime.timedelta(minutes=1))
     def find(self, args: dict):
         query = self.query(args)
@@ -189,6 +204,8 @@ class DevicesDocumentView(DeviceView):
 
 
 class ActionsDocumentView(DeviceView):
+    decorators = [read_replica]
+
     @cache(datetime.timedelta(minutes=1))
     def find(self, args: dict):
         filters = json.loads(request.args.get('filter', {}))
@@ -247,6 +264,8 @@ class ActionsDocumentView(DeviceView):
 
 
 class LotsDocumentView(LotView):
+    decorators = [read_replica]
+
     def find(self, args: dict):
         query = (x for x in self.query(args) if x.owner_id == g.user.id)
         return self.generate_lots_csv(query)
@@ -285,6 +304,8 @@ class LotRow(OrderedDict):
 
 
 class StockDocumentView(DeviceView):
+    decorators = [read_replica]
+
     # @cache(datetime.timedelta(minutes=1))
     def find(self, args: dict):
         query = (x for x in self.query(args) if x.owner_id == g.user.id)
@@ -323,7 +344,7 @@ class CheckView(View):
         hash3 = qry.get('hash')
 
         result = False
-        if hash3 and ReportHash.query.filter_by(hash3=hash3).count():
+        if hash3 and hash_exists(hash3):
             result = True
         return jsonify(result)
 
@@ -369,7 +390,7 @@ class StampsView(View):
                 'application/msword',
             ]
             if file_check.mimetype in mime:
-                if verify_hash(file_check):
+                if verify_hash(file_check.stream):
                     result = ('Ok', ok)
 
         return flask.render_template(
@@ -1,14 +1,30 @@
-"""Hash implementation and save in database 
+"""Hash implementation and save in database
+
+Every report that Devicehub generates is hashed and the hash saved,
+so anyone can later check that a file comes from Devicehub unaltered.
+
+Files are hashed in chunks, so a report (or an uploaded file) is
+never copied in memory only to be hashed. The hashes of a request
+are kept in ``g`` and written together when the request finishes,
+in their own transaction, so generating a report does not commit
+the session of the request. Hashes are unique: registering an
+existing hash does nothing.
 """
 import hashlib
+from typing import Iterable, Union
+from uuid import uuid4
 
 from citext import CIText
+from flask import current_app as app
+from flask import g, has_request_context
 from sqlalchemy import Column
-from sqlalchemy.dialects.postgresql import UUID
-from uuid import uuid4
+from sqlalchemy.dialects.postgresql import UUID, insert
 
 from ereuse_devicehub.db import db
 
+CHUNK_SIZE = 64 * 1024
+"""Bytes read each time when hashing a file."""
+
 
 class ReportHash(db.Model):
     """Save the hash than is create when one report is download.
@@ -25,18 +41,82 @@ class ReportHash(db.Model):
     hash3 = db.Column(CIText(), nullable=False)
     hash3.comment = """The normalized name of the hash."""
 
+    __table_args__ = (
+        db.Index('report_hash_hash3_index', hash3, unique=True),
+    )
+
+
+def hash_file(bfile: Union[bytes, memoryview, Iterable[bytes]]) -> str:
+    """Computes the hash of a report.
+
+    :param bfile: The bytes of the report, a file-like object opened
+                  in binary mode (read from its current position) or
+                  an iterable of chunks of bytes.
+    """
+    hash3 = hashlib.sha3_256()
+    if isinstance(bfile, (bytes, bytearray, memoryview)):
+        hash3.update(bfile)
+        return hash3.hexdigest()
+    if hasattr(bfile, 'read'):
+        bfile = iter(lambda: bfile.read(CHUNK_SIZE), b'')
+    for chunk in bfile:
+        hash3.update(chunk)
+    return hash3.hexdigest()
+
 
 def insert_hash(bfile, commit=True):
-    hash3 = hashlib.sha3_256(bfile).hexdigest()
-    db_hash = ReportHash(hash3=hash3)
-    db.session.add(db_hash)
-    if commit:
-        db.session.commit()
-        db.session.flush()
+    """Hashes the report and saves the hash.
 
+    :param commit: Whether to save the hash on its own, once the
+                   request finishes. Pass ``False`` to save it
+                   with the session, when the caller commits.
+    """
+    hash3 = hash_file(bfile)
+    register_hash(hash3, commit=commit)
     return hash3
 
 
-def verify_hash(bfile):
-    hash3 = hashlib.sha3_256(bfile.read()).hexdigest()
-    return ReportHash.query.filter(ReportHash.hash3 == hash3).count()
+def register_hash(hash3: str, commit=True):
+    """Saves a hash computed elsewhere, see :func:`insert_hash`."""
+    if not commit:
+        db.session.execute(_insert_hashes(), _values(hash3))
+    elif has_request_context():
+        g.setdefault('report_hashes', []).append(hash3)
+    else:
+        _write_hashes([hash3])
+
+
+def write_pending_hashes(response):
+    """Writes the hashes of the reports of the request, at once.
+
+    Set this as an ``after_request`` function.
+    """
+    hashes = g.pop('report_hashes', None)
+    if hashes:
+        _write_hashes(hashes)
+    return response
+
+
+def verify_hash(bfile) -> bool:
+    """Whether the file is a report generated by Devicehub."""
+    return hash_exists(hash_file(bfile))
+
+
+def hash_exists(hash3: str) -> bool:
+    query = ReportHash.query.filter(ReportHash.hash3 == hash3)
+    return db.session.query(query.exists()).scalar()
+
+
+def _insert_hashes():
+    return insert(ReportHash.__table__).on_conflict_do_nothing(
+        index_elements=[ReportHash.hash3]
+    )
+
+
+def _values(hash3):
+    return {'id': uuid4(), 'hash3': hash3}
+
+
+def _write_hashes(hashes):
+    engine = db.engine.execution_options(schema_translate_map={None: app.schema})
+    engine.execute(_insert_hashes(), [_values(hash3) for hash3 in hashes])
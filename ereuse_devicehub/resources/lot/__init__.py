@@ -2,6 +2,7 @@ import pathlib
 from typing import Callable, Iterable, Tuple
 
 from ereuse_devicehub.db import db
+from ereuse_devicehub.resources.lot import summary  # noqa: F401 registers listeners
 from ereuse_devicehub.resources.lot import schemas
 from ereuse_devicehub.resources.lot.views import (
     LotBaseChildrenView,
@@ -1,17 +1,18 @@
 import uuid
 from datetime import datetime
-from typing import Union
+from typing import Iterable, Union
 
 from boltons import urlutils
 from citext import CIText
 from flask import g
 from sqlalchemy import TEXT
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy_utils import LtreeType
 from sqlalchemy_utils.types.ltree import LQUERY
 
-from ereuse_devicehub.db import create_view, db, exp, f
+from ereuse_devicehub.db import any_of, create_view, db, exp, f
 from ereuse_devicehub.resources.device.models import Component, Device
 from ereuse_devicehub.resources.enums import TransferState
 from ereuse_devicehub.resources.models import Thing
@@ -261,6 +262,14 @@ class Lot(Thing):
         return '<Lot {0.name} devices={0.devices!r}>'.format(self)
 
 
+def _lots_changed():
+    """Flags the session after changing lots through SQL, which the
+    session listeners do not see, so the lot tree and summaries are
+    outdated on commit.
+    """
+    db.session.info['lots_changed'] = True
+
+
 class LotDevice(db.Model):
     device_id = db.Column(db.BigInteger, db.ForeignKey(Device.id), primary_key=True)
     lot_id = db.Column(UUID(as_uuid=True), db.ForeignKey(Lot.id), primary_key=True)
@@ -278,6 +287,54 @@ class LotDevice(db.Model):
         primaryjoin='Device.id == LotDevice.device_id',
     )
 
+    __table_args__ = (
+        db.Index('lot_device_lot_id_index', lot_id, postgresql_using='hash'),
+    )
+
+    @classmethod
+    def add(cls, lot_id: uuid.UUID, device_ids: Iterable[int]):
+        """Puts the devices in the lot, skipping the ones already
+        in it, without loading the devices of the lot.
+
+        ``Lot.devices`` does not see the change until it is expired.
+        """
+        values = [
+            {
+                'device_id': device_id,
+                'lot_id': lot_id,
+                'created': datetime.utcnow(),
+                'author_id': g.user.id,
+            }
+            for device_id in device_ids
+        ]
+        if values:
+            insert = postgresql.insert(cls.__table__).on_conflict_do_nothing()
+            db.session.execute(insert, values)
+            _lots_changed()
+
+    @classmethod
+    def delete(cls, lot_id: uuid.UUID, device_ids: Iterable[int]):
+        """Takes the devices out of the lot."""
+        table = cls.__table__
+        db.session.execute(
+            table.delete()
+            .where(table.c.lot_id == lot_id)
+            .where(any_of(table.c.device_id, device_ids))
+        )
+        _lots_changed()
+
+    @classmethod
+    def count(cls, lot_id: uuid.UUID, device_ids: Iterable[int]) -> int:
+        """How many of the devices are in the lot."""
+        table = cls.__table__
+        query = (
+            db.session.query(db.func.count())
+            .select_from(table)
+            .filter(table.c.lot_id == lot_id)
+            .filter(any_of(table.c.device_id, device_ids))
+        )
+        return query.scalar()
+
 
 class Path(db.Model):
     id = db.Column(
@@ -317,11 +374,13 @@ class Path(db.Model):
     def add(cls, parent_id: uuid.UUID, child_id: uuid.UUID):
         """Creates an edge between parent and child."""
         db.session.execute(db.func.add_edge(str(parent_id), str(child_id)))
+        _lots_changed()
 
     @classmethod
     def delete(cls, parent_id: uuid.UUID, child_id: uuid.UUID):
         """Deletes the edge between parent and child."""
         db.session.execute(db.func.delete_edge(str(parent_id), str(child_id)))
+        _lots_changed()
 
     @classmethod
     def has_lot(cls, parent_id: uuid.UUID, child_id: uuid.UUID) -> bool:
@@ -433,3 +492,7 @@ class ShareLot(Thing):
         nullable=True,
     )
     user_to = db.relationship(User, primaryjoin=user_to_id == User.id)
+
+    __table_args__ = (
+        db.Index('share_lot_user_to_id_index', user_to_id, postgresql_using='hash'),
+    )
@@ -0,0 +1,186 @@
+"""Per-user summary of the lots shown in the inventory sidebar.
+
+Every inventory page renders the lots of the user grouped as
+incoming, outgoing, temporary and shared. Computing this from the
+``Lot`` models means loading every lot with its trade and transfer
+(and one more query per lot to know if it is shared) on each page.
+
+:class:`LotSummaryCache` keeps, per inventory and user, a list of
+light :class:`LotSummary` rows built with two queries. The entries
+are tagged with the value of the ``lot_summary_seq`` sequence,
+which is increased after committing any change to lots, lot
+devices, trades, transfers or shared lots. As the sequence lives in
+the database, a change committed by a worker invalidates the caches
+of all workers.
+"""
+
+from collections import namedtuple
+from itertools import chain
+from typing import Dict, List, Tuple
+
+from flask import current_app as app
+from sqlalchemy import event
+
+from ereuse_devicehub.db import DhSession, db
+from ereuse_devicehub.inventory.models import Transfer
+from ereuse_devicehub.resources.action.models import Trade
+from ereuse_devicehub.resources.lot.models import Lot, LotDevice, Path, ShareLot
+from ereuse_devicehub.resources.visibility import visible_lot_ids
+
+LotSummary = namedtuple(
+    'LotSummary', 'id name devices incoming outgoing temporary shared owned'
+)
+"""A lot as the sidebar sees it, for a given user."""
+
+_lot = Lot.__table__
+_lot_device = LotDevice.__table__
+_trade = Trade.__table__
+_transfer = Transfer.__table__
+_share_lot = ShareLot.__table__
+
+WATCHED = (Lot, LotDevice, Path, Trade, Transfer, ShareLot)
+"""Changes to instances of these models invalidate the summaries."""
+
+
+class UserLots:
+    """The summaries of the lots of a user, grouped for the sidebar."""
+
+    def __init__(self, lots: List[LotSummary], shared: List[LotSummary]) -> None:
+        self.lots = lots
+        self.incoming = [lot for lot in lots if lot.incoming]
+        self.outgoing = [lot for lot in lots if lot.outgoing]
+        self.temporary = [lot for lot in lots if lot.temporary]
+        self.shared = shared
+
+    def owned(self) -> 'UserLots':
+        """The lots the user owns, and the ones shared with the user,
+        as the label pages list them: without the lots traded or
+        transferred to the user by someone else.
+        """
+        return UserLots([lot for lot in self.lots if lot.owned], self.shared)
+
+
+class LotSummaryCache:
+    SEQUENCE = 'lot_summary_seq'
+
+    def __init__(self) -> None:
+        self._entries = {}  # type: Dict[Tuple[str, str], Tuple[int, UserLots]]
+
+    def get(self, user_id) -> UserLots:
+        """Gets the lots of the user, computing them only if
+        something changed since the last time.
+        """
+        # Read the generation before computing, so a change committed
+        # meanwhile leaves the entry outdated instead of stale. Both
+        # from the primary, as a late replica would keep old lots
+        # under the new generation
+        with db.session().on_primary():
+            generation = self.generation()
+            key = app.schema, str(user_id)
+            entry = self._entries.get(key)
+            if entry and entry[0] == generation:
+                return entry[1]
+            user_lots = self.compute(user_id)
+        self._entries[key] = generation, user_lots
+        return user_lots
+
+    def generation(self) -> int:
+        # A new sequence has last_value 1 before and after the first nextval
+        sql = 'SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM {}.{}'
+        return db.session.execute(sql.format(app.schema, self.SEQUENCE)).scalar()
+
+    def invalidate(self, connection=None):
+        """Outdates the summaries of every user of the inventory.
+
+        Call this after committing changes done through raw SQL,
+        as those are not seen by the session listeners.
+        """
+        sql = "SELECT nextval('{}.{}')".format(app.schema, self.SEQUENCE)
+        (connection or db.engine).execute(sql)
+
+    @staticmethod
+    def compute(user_id) -> UserLots:
+        devices = (
+            db.select([db.func.count()])
+            .where(_lot_device.c.lot_id == _lot.c.id)
+            .as_scalar()
+        )
+        rows = (
+            db.session.query(
+                _lot.c.id,
+                _lot.c.name,
+                devices,
+                _lot.c.owner_id,
+                _trade.c.user_from_id,
+                _trade.c.user_to_id,
+                _transfer.c.id,
+                _transfer.c.user_from_id,
+                _transfer.c.user_to_id,
+            )
+            .select_from(_lot)
+            .outerjoin(_trade, _trade.c.lot_id == _lot.c.id)
+            .outerjoin(_transfer, _transfer.c.lot_id == _lot.c.id)
+            .filter(_lot.c.id.in_(visible_lot_ids(user_id)))
+            .order_by(_lot.c.created)
+        )
+        lots = {}
+        for row in rows:
+            lot_id, name, count, owner, t_from, t_to, transfer, tr_from, tr_to = row
+            if lot_id in lots:
+                continue
+            # Same precedence as Lot.is_incoming, is_outgoing and is_temporary
+            if t_from or t_to:
+                incoming, outgoing = t_to == user_id, t_from == user_id
+            else:
+                incoming, outgoing = tr_to == user_id, tr_from == user_id
+            temporary = not (t_from or t_to) and not transfer and owner == user_id
+            lots[lot_id] = LotSummary(
+                lot_id,
+                name,
+                count,
+                incoming,
+                outgoing,
+                temporary,
+                shared=False,
+                owned=owner == user_id,
+            )
+
+        rows = (
+            db.session.query(_lot.c.id, _lot.c.name, devices)
+            .select_from(_share_lot)
+            .join(_lot, _lot.c.id == _share_lot.c.lot_id)
+            .filter(_share_lot.c.user_to_id == user_id)
+            .order_by(_share_lot.c.created)
+        )
+        shared = [
+            LotSummary(
+                lot_id, name, count, False, False, False, shared=True, owned=False
+            )
+            for lot_id, name, count in rows
+        ]
+        return UserLots(list(lots.values()), shared)
+
+
+lot_summary_cache = LotSummaryCache()
+
+lot_summary_seq = db.Sequence(LotSummaryCache.SEQUENCE, metadata=db.metadata)
+
+
+@event.listens_for(DhSession, 'after_flush')
+def _watch_lot_changes(session, _):
+    changes = chain(session.new, session.dirty, session.deleted)
+    if any(isinstance(obj, WATCHED) for obj in changes):
+        session.info['lots_changed'] = True
+
+
+@event.listens_for(DhSession, 'after_commit')
+def _invalidate_on_commit(session):
+    # The sequence is increased once the changes are visible to the
+    # other workers; the session cannot emit SQL here
+    if session.info.pop('lots_changed', False):
+        lot_summary_cache.invalidate(session.get_bind())
+
+
+@event.listens_for(DhSession, 'after_rollback')
+def _discard_lot_changes(session):
+    session.info.pop('lots_changed', None)
@@ -0,0 +1,88 @@
+"""The tree of lots, as the ``UiTree`` format of the lot endpoint
+returns it.
+
+Lots form a directed acyclic graph: a lot can be inside several
+lots, and then it appears under each of them. Every ``Path`` goes
+from a root lot to a lot, so the tree is the merge of all of them.
+Merging them by looking for each part of a path among the siblings
+of its node, one by one, is quadratic.
+
+:class:`LotTreeCache` reads the paths of the lots the user can see
+in one query, merges them looking up the nodes in a dictionary, and
+keeps the result per inventory and user.
+Entries are tagged with the generation of
+:data:`ereuse_devicehub.resources.lot.summary.lot_summary_cache`,
+which is increased after committing changes to lots, including the
+edges that ``Path.add`` and ``Path.delete`` create and remove.
+"""
+
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from flask import current_app as app
+
+from ereuse_devicehub.db import db
+from ereuse_devicehub.resources.lot.models import Path
+from ereuse_devicehub.resources.lot.summary import lot_summary_cache
+from ereuse_devicehub.resources.visibility import visible_lot_ids
+
+_path = Path.__table__
+
+
+class LotTreeCache:
+    def __init__(self) -> None:
+        self._entries = {}  # type: Dict[Tuple[str, str], Tuple[int, List[Dict]]]
+
+    def get(self, user_id) -> List[Dict]:
+        """Gets the tree of the lots of the user, computing it only
+        if something changed since the last time.
+
+        The tree is not cached while the session has lot changes
+        that are not committed, so they are seen by the session
+        but not by other requests.
+        """
+        # From the primary, as the summaries of the lots
+        with db.session().on_primary():
+            if db.session.info.get('lots_changed'):
+                return self.compute(user_id)
+            generation = lot_summary_cache.generation()
+            key = app.schema, str(user_id)
+            entry = self._entries.get(key)
+            if entry and entry[0] == generation:
+                return entry[1]
+            tree = self.compute(user_id)
+        self._entries[key] = generation, tree
+        return tree
+
+    @staticmethod
+    def compute(user_id) -> List[Dict]:
+        """Builds the tree from the paths of the lots, in one pass.
+
+        Lots the user cannot see are left out of the paths, so their
+        visible descendants hang from the closest visible ancestor.
+        """
+        rows = (
+            db.session.query(_path.c.lot_id, _path.c.path)
+            .filter(_path.c.lot_id.in_(visible_lot_ids(user_id)))
+            .all()
+        )
+        visible = {lot_id for lot_id, _ in rows}
+        tree = []
+        # The node of a lot under a parent node (None for the roots)
+        index = {}  # type: Dict[Tuple[Optional[int], UUID], Dict]
+        for _, path in rows:
+            parent = None
+            for part in path.path.split('.'):
+                lot_id = UUID(part.replace('_', '-'))
+                if lot_id not in visible:
+                    continue
+                key = id(parent) if parent else None, lot_id
+                node = index.get(key)
+                if not node:
+                    node = index[key] = {'id': lot_id, 'nodes': []}
+                    (parent['nodes'] if parent else tree).append(node)
+                parent = node
+        return tree
+
+
+lot_tree_cache = LotTreeCache()
@@ -1,21 +1,22 @@
 import uuid
-from collections import deque
 from enum import Enum
-from typing import Dict, List, Set, Union
+from typing import Dict, List, Set
 
 import marshmallow as ma
 from flask import Response, g, jsonify, request
 from marshmallow import Schema as MarshmallowSchema
 from marshmallow import fields as f
 from sqlalchemy import or_
-from sqlalchemy.util import OrderedSet
 
-from ereuse_devicehub.db import db
+from ereuse_devicehub.db import any_of, db
 from ereuse_devicehub.inventory.models import Transfer
 from ereuse_devicehub.query import things_response
+from ereuse_devicehub.resources.action import bulk
 from ereuse_devicehub.resources.action.models import Confirm, Revoke, Trade
 from ereuse_devicehub.resources.device.models import Computer, DataStorage, Device
-from ereuse_devicehub.resources.lot.models import Lot, Path
+from ereuse_devicehub.resources.lot.models import Lot, LotDevice
+from ereuse_devicehub.resources.lot.tree import lot_tree_cache
+from ereuse_devicehub.resources.visibility import visible_lot_ids
 from ereuse_devicehub.teal.marshmallow import EnumField
 from ereuse_devicehub.teal.resource import View
 
@@ -97,7 +98,8 @@ class LotView(View):
         you can filter.
         """
         if args['format'] == LotFormat.UiTree:
-            lots = self.schema.dump(Lot.query, many=True, nested=2)
+            query = Lot.query.filter(Lot.id.in_(visible_lot_ids(g.user.id)))
+            lots = self.schema.dump(query, many=True, nested=2)
             ret = {
                 'items': {l['id']: l for l in lots},
                 'tree': self.ui_tree(),
@@ -186,29 +188,10 @@ class LotView(View):
 
     @classmethod
     def ui_tree(cls) -> List[Dict]:
-        tree = []
-        for model in Path.query:  # type: Path
-            path = deque(model.path.path.split('.'))
-            cls._p(tree, path)
-        return tree
-
-    @classmethod
-    def _p(cls, nodes: List[Dict[str, Union[uuid.UUID, List]]], path: deque):
-        """Recursively creates the nested lot structure.
-
-        Every recursive step consumes path (a deque of lot_id),
-        trying to find it as the value of id in nodes, otherwise
-        it adds itself. Then moves to the node's children.
+        """The tree of the lots the user can see, see
+        :mod:`ereuse_devicehub.resources.lot.tree`.
         """
-        lot_id = uuid.UUID(path.popleft().replace('_', '-'))
-        try:
-            # does lot_id exist already in node?
-            node = next(part for part in nodes if lot_id == part['id'])
-        except StopIteration:
-            node = {'id': lot_id, 'nodes': []}
-            nodes.append(node)
-        if path:
-            cls._p(node['nodes'], path)
+        return lot_tree_cache.get(g.user.id)
 
     def get_lot_amount(self, l: Lot):
         """Return lot amount value"""
@@ -294,48 +277,49 @@ class LotDeviceView(LotBaseChildrenView):
         id = ma.fields.List(ma.fields.Integer())
 
     def _post(self, lot: Lot, ids: Set[int]):
-        # get only new devices
-        ids -= {x.id for x in lot.devices}
-        if not ids:
-            return
-
-        devices = set(
-            Device.query.filter(Device.id.in_(ids)).filter(Device.owner == g.user)
+        # get only new devices, without loading the ones of the lot
+        in_lot = db.select([LotDevice.device_id]).where(LotDevice.lot_id == lot.id)
+        dev_qry = (
+            Device.query.filter(any_of(Device.id, ids))
+            .filter(Device.owner == g.user)
+            .filter(~Device.id.in_(in_lot))
         )
         devices = set()
-        dev_qry = Device.query.filter(Device.id.in_(ids)).filter(Device.owner == g.user)
-
         for dev in dev_qry:
             if isinstance(dev, DataStorage) and not dev.orphan:
                 continue
             devices.add(dev)
 
-        lot.devices.update(devices)
+        if not devices:
+            return
+
+        new_ids = {dev.id for dev in devices}
+        LotDevice.add(lot.id, new_ids)
+        db.session.expire(lot, ['devices'])
 
         if lot.trade:
-            lot.trade.devices = lot.devices
+            bulk.add_devices(lot.trade, new_ids)
             if g.user in [lot.trade.user_from, lot.trade.user_to]:
                 confirm = Confirm(action=lot.trade, user=g.user, devices=devices)
                 db.session.add(confirm)
 
     def _delete(self, lot: Lot, ids: Set[int]):
         # if there are some devices in ids than not exist now in the lot, then exit
-        if not ids.issubset({x.id for x in lot.devices}):
+        if LotDevice.count(lot.id, ids) < len(ids):
             return
 
         if lot.trade:
-            devices = Device.query.filter(Device.id.in_(ids)).all()
+            devices = Device.query.filter(any_of(Device.id, ids)).all()
             return delete_from_trade(lot, devices)
 
         if not g.user == lot.owner:
             txt = 'This is not your lot'
             raise ma.ValidationError(txt)
 
-        devices = set(
-            Device.query.filter(Device.id.in_(ids)).filter(Device.owner_id == g.user.id)
-        )
-
-        lot.devices.difference_update(devices)
+        owned = db.session.query(Device.id).filter(any_of(Device.id, ids))
+        owned = owned.filter(Device.owner_id == g.user.id)
+        LotDevice.delete(lot.id, [device_id for device_id, in owned])
+        db.session.expire(lot, ['devices'])
 
 
 def delete_from_trade(lot: Lot, devices: List):
@@ -376,5 +360,7 @@ def delete_from_trade(lot: Lot, devices: List):
         )
         db.session.add(phantom_revoke)
 
-    lot.devices.difference_update(OrderedSet(drop_of_lot))
+    if drop_of_lot:
+        LotDevice.delete(lot.id, {dev.id for dev in drop_of_lot})
+        db.session.expire(lot, ['devices'])
     return revoke
@@ -2,6 +2,7 @@ from contextlib import suppress
 
 from flask import g, jsonify, request
 
+from ereuse_devicehub.db import read_replica
 from ereuse_devicehub.resources.action import schemas
 from ereuse_devicehub.resources.action.models import (
     Action,
@@ -16,6 +17,8 @@ from ereuse_devicehub.teal.resource import View
 
 
 class MetricsView(View):
+    decorators = [read_replica]
+
     def find(self, args: dict):
 
         metrics = {
@@ -3,7 +3,7 @@ from typing import Set
 
 from boltons import urlutils
 from flask import g
-from sqlalchemy import BigInteger, Column, ForeignKey, Sequence, UniqueConstraint
+from sqlalchemy import BigInteger, Column, ForeignKey, Sequence, UniqueConstraint, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import backref, relationship, validates
 
@@ -78,7 +78,13 @@ class Tag(Thing):
     It has the same constraints as the main one. Only needed in special cases.
     """
 
-    __table_args__ = (db.Index('device_id_index', device_id, postgresql_using='hash'),)
+    __table_args__ = (
+        db.Index('device_id_index', device_id, postgresql_using='hash'),
+        # Trigrams for the fuzzy search of devices
+        db.Index(
+            'tag_id_trgm', text('(id::text) gin_trgm_ops'), postgresql_using='gin'
+        ),
+    )
 
     def __init__(self, id: str, **kwargs) -> None:
         super().__init__(id=id, **kwargs)
@@ -0,0 +1,105 @@
+"""Client of the tag provider, the service that gives the ids of
+new unnamed tags.
+
+:class:`TagProvider` keeps one HTTP session per tag provider and
+process, created the first time it is needed, so requests reuse
+the keep-alive connections and the ones that do not create tags do
+not pay for it. Calls have a timeout, retry with backoff when the
+provider is unreachable or fails, and a limited number of them can
+run at the same time.
+
+When ``TAG_PROVIDER_POOL`` is set, the provider reserves that many
+ids beforehand and keeps them in a local pool, which is refilled in
+the background once it is half empty. Creating tags then does not
+wait for the tag provider.
+"""
+
+import threading
+from collections import defaultdict, deque
+from typing import Deque, Dict, List, Tuple
+
+from flask import g
+
+from ereuse_devicehub.ereuse_utils.session import DevicehubClient, retry
+from ereuse_devicehub.resources.inventory.model import Inventory
+
+Key = Tuple[str, str]
+
+
+class TagProvider:
+    def __init__(self, app) -> None:
+        self.app = app
+        self._clients = {}  # type: Dict[Key, DevicehubClient]
+        self._pools = defaultdict(deque)  # type: Dict[Key, Deque[str]]
+        self._refilling = set()
+        self._lock = threading.Lock()
+        self._calls = threading.BoundedSemaphore(app.config['TAG_PROVIDER_CONNECTIONS'])
+
+    def reserve(self, num: int, inventory: Inventory = None) -> List[str]:
+        """Gets ids for ``num`` new tags, from the pool when possible.
+
+        :param inventory: The inventory whose tag provider to use.
+                          By default the one of the request.
+        """
+        inv = inventory or g.inventory
+        key = inv.tag_provider.to_text(), str(inv.tag_token)
+        pool = self._pools[key]
+        size = self.app.config['TAG_PROVIDER_POOL']
+        with self._lock:
+            ids = [pool.popleft() for _ in range(min(num, len(pool)))]
+        missing = num - len(ids)
+        if missing:
+            # Fetch the ones that we lack and fill the pool in one go
+            fetched = self._fetch(key, missing + size)
+            ids += fetched[:missing]
+            with self._lock:
+                pool.extend(fetched[missing:])
+        elif len(pool) < size / 2:
+            self._refill(key, size - len(pool))
+        return ids
+
+    def client(self, key: Key) -> DevicehubClient:
+        with self._lock:
+            if key not in self._clients:
+                url, token = key
+                client = DevicehubClient(
+                    base_url=url,
+                    token=DevicehubClient.encode_token(token),
+                    timeout=self.app.config['TAG_PROVIDER_TIMEOUT'],
+                )
+                self._clients[key] = retry(
+                    client,
+                    retries=self.app.config['TAG_PROVIDER_RETRIES'],
+                    backoff_factor=0.5,
+                    status_to_retry=(500, 502, 503, 504),
+                    pool_maxsize=self.app.config['TAG_PROVIDER_CONNECTIONS'],
+                )
+            return self._clients[key]
+
+    def _fetch(self, key: Key, num: int) -> List[str]:
+        with self._calls:
+            ids, _ = self.client(key).post('/', {}, query=[('num', num)])
+        return ids
+
+    def _refill(self, key: Key, num: int):
+        """Fetches more ids for the pool in a thread, unless another
+        thread is already doing it.
+        """
+        with self._lock:
+            if key in self._refilling:
+                return
+            self._refilling.add(key)
+
+        def refill():
+            try:
+                ids = self._fetch(key, num)
+                with self._lock:
+                    self._pools[key].extend(ids)
+            except Exception as e:
+                # The next reservation fetches the ids it lacks
+                self.app.logger.warning('Cannot refill the tag pool: %s', e)
+            finally:
+                with self._lock:
+                    self._refilling.discard(key)
+
+        threading.Thread(target=refill, name='tag-pool', daemon=True).start()
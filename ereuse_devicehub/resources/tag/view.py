@@ -52,7 +52,7 @@ class TagView(View):
         )
 
     def _create_many_regular_tags(self, num: int):
-        tags_id, _ = g.tag_provider.post('/', {}, query=[('num', num)])
+        tags_id = app.tag_provider.reserve(num)
         tags = [Tag(id=tag_id, provider=g.inventory.tag_provider) for tag_id in tags_id]
         db.session.add_all(tags)
         db.session().final_flush()
@@ -9,7 +9,7 @@ from marshmallow import ValidationError
 
 from ereuse_devicehub.db import db
 from ereuse_devicehub.resources.action.models import ConfirmDocument
-from ereuse_devicehub.resources.hash_reports import ReportHash
+from ereuse_devicehub.resources.hash_reports import register_hash
 from ereuse_devicehub.resources.tradedocument.models import TradeDocument
 from ereuse_devicehub.teal.resource import View
 
@@ -27,9 +27,7 @@ class TradeDocumentView(View):
         except ValueError as err:
             raise ValidationError(err)
 
-        hash3 = data['file_hash']
-        db_hash = ReportHash(hash3=hash3)
-        db.session.add(db_hash)
+        register_hash(data['file_hash'], commit=False)
 
         doc = TradeDocument(**data)
         trade = doc.lot.trade
@@ -0,0 +1,100 @@
+"""Devices and lots that a user can see, as SQL subqueries.
+
+A user sees the devices they own, the devices that take part in a
+trade where the user is one of the two parties and the devices inside
+the lots that other users share with them. Views used to compute parts of
+this in Python (loading every trade and its devices) and then feed
+the resulting ids back to the database through ``IN``.
+
+The functions of this module return selectables of ids to be used
+as ``Device.id.in_(visible_device_ids(user_id))``, so Postgres
+resolves the whole set in the same statement, using the indexes
+on ``trade``, ``action_device``, ``share_lot`` and ``lot_device``.
+"""
+
+from ereuse_devicehub.db import db
+from ereuse_devicehub.resources.action.models import ActionDevice, Trade
+from ereuse_devicehub.resources.device.models import Device
+from ereuse_devicehub.resources.lot.models import Lot, LotDevice, ShareLot
+
+_device = Device.__table__
+_trade = Trade.__table__
+_action_device = ActionDevice.__table__
+_lot = Lot.__table__
+_lot_device = LotDevice.__table__
+_share_lot = ShareLot.__table__
+
+
+def _is_party(user_id):
+    return (_trade.c.user_from_id == user_id) | (_trade.c.user_to_id == user_id)
+
+
+def owned_device_ids(user_id):
+    """Ids of the devices owned by the user."""
+    return db.select([_device.c.id]).where(_device.c.owner_id == user_id)
+
+
+def traded_device_ids(user_id):
+    """Ids of the devices in a trade where the user is a party."""
+    return (
+        db.select([_action_device.c.device_id])
+        .select_from(
+            _action_device.join(_trade, _trade.c.id == _action_device.c.action_id)
+        )
+        .where(_is_party(user_id))
+    )
+
+
+def shared_device_ids(user_id):
+    """Ids of the devices inside the lots shared with the user."""
+    return (
+        db.select([_lot_device.c.device_id])
+        .select_from(
+            _share_lot.join(_lot_device, _share_lot.c.lot_id == _lot_device.c.lot_id)
+        )
+        .where(_share_lot.c.user_to_id == user_id)
+    )
+
+
+def visible_device_ids(user_id, owned=True, traded=True, shared=True):
+    """Ids of the devices the user can see.
+
+    Pass ``False`` to any of the keywords to leave out that source
+    of devices.
+    """
+    sources = (
+        (owned, owned_device_ids),
+        (traded, traded_device_ids),
+        (shared, shared_device_ids),
+    )
+    selects = [ids(user_id) for active, ids in sources if active]
+    assert selects, 'At least one source of devices is required.'
+    if len(selects) == 1:
+        return selects[0]
+    return db.union(*selects)
+
+
+def visible_lot_ids(user_id, owned=True, traded=True, shared=False):
+    """Ids of the lots the user can see.
+
+    By default these are the lots the user owns and the lots of the
+    trades where the user is a party. Shared lots are opt-in as the
+    inventory lists them apart.
+    """
+    selects = []
+    if owned:
+        selects.append(db.select([_lot.c.id]).where(_lot.c.owner_id == user_id))
+    if traded:
+        selects.append(
+            db.select([_trade.c.lot_id]).where(
+                _trade.c.lot_id.isnot(None) & _is_party(user_id)
+            )
+        )
+    if shared:
+        selects.append(
+            db.select([_share_lot.c.lot_id]).where(_share_lot.c.user_to_id == user_id)
+        )
+    assert selects, 'At least one source of lots is required.'
+    if len(selects) == 1:
+        return selects[0]
+    return db.union(*selects)
@@ -1,6 +1,7 @@
 $(document).ready(() => {
    $("#type").on("change", deviceInputs2);
    $("#amount").on("change", deviceInputs2);
+   $("#manufacturer").on("input", suggestManufacturers);
    deviceInputs2()
 })
 
@@ -61,3 +62,20 @@ function amountInputs() {
         $("#Sku").show();
     };
 }
+
+let manufacturersTimeout = null;
+
+function suggestManufacturers() {
+    const input = $("#manufacturer");
+    const text = input.val().trim();
+    clearTimeout(manufacturersTimeout);
+    if (!text) {
+        return;
+    };
+    manufacturersTimeout = setTimeout(() => {
+        $.getJSON(input.data("url"), {q: text}, (names) => {
+            const list = $("#manufacturers").empty();
+            names.forEach((name) => list.append($("<option>").attr("value", name)));
+        });
+    }, 200);
+}
@@ -51,6 +51,21 @@ class Config:
     prefiex by ``API_DOC_CLASS_`` like in the example above.
     """
 
+    UPLOAD_SPOOL_SIZE = 1024 * 1024
+    """
+    Bytes of an uploaded file that are kept in memory. Bigger files
+    are written to a temporary file while the request is parsed.
+    The maximum size of a request is flask's ``MAX_CONTENT_LENGTH``.
+    """
+
+    JSON_DUMPS = None
+    """
+    Optional. A function that encodes the JSON responses of the
+    resources (see :func:`ereuse_devicehub.teal.json_util.jsonify`)
+    instead of flask's encoder; ex. one from a faster JSON library.
+    It must give the same text as flask's ``json.dumps``.
+    """
+
     CORS_ORIGINS = '*'
     CORS_EXPOSE_HEADERS = 'Authorization'
     CORS_ALLOW_HEADERS = 'Content-Type', 'Authorization'
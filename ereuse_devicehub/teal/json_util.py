@@ -1,5 +1,8 @@
 import ereuse_devicehub.ereuse_utils
+from flask import Response
+from flask import current_app as app
 from flask.json import JSONEncoder as FlaskJSONEncoder
+from flask.json import jsonify as flask_jsonify
 from sqlalchemy.ext.baked import Result
 from sqlalchemy.orm import Query
 
@@ -9,3 +12,15 @@ class TealJSONEncoder(ereuse_devicehub.ereuse_utils.JSONEncoder, FlaskJSONEncode
         if isinstance(obj, (Result, Query)):
             return tuple(obj)
         return super().default(obj)
+
+
+def jsonify(data) -> Response:
+    """Like flask's jsonify, encoding with the ``JSON_DUMPS`` function
+    of the configuration if there is one.
+    """
+    dumps = app.config.get('JSON_DUMPS')
+    if not dumps:
+        return flask_jsonify(data)
+    return app.response_class(
+        dumps(data) + '\n', mimetype=app.config['JSONIFY_MIMETYPE']
+    )
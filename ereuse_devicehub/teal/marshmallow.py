@@ -1,4 +1,6 @@
 import ipaddress
+import threading
+from collections import OrderedDict
 from distutils.version import StrictVersion
 from typing import Type, Union
 
@@ -202,6 +204,16 @@ class NestedOn(MarshmallowNested):
     NESTED_LEVEL = '_level'
     NESTED_LEVEL_MAX = '_level_max'
 
+    SCHEMAS = 'nested_schemas'
+    """The key in ``app.extensions`` of the unused schema instances
+    to load nested values, see :meth:`._load`.
+    """
+    SCHEMAS_MAX = 256
+    """How many combinations of schema and options keep instances,
+    dropping the least recently used ones.
+    """
+    _schemas_lock = threading.Lock()
+
     def __init__(
         self,
         nested,
@@ -249,15 +261,7 @@ class NestedOn(MarshmallowNested):
                     '{} is not a sub-type of {}'.format(type, parent_schema.t),
                     field_names=[attr],
                 )
-            schema = resource.SCHEMA(
-                only=self.only,
-                exclude=self.exclude,
-                context=getattr(self.parent, 'context', {}),
-                load_only=self._nested_normalized_option('load_only'),
-                dump_only=self._nested_normalized_option('dump_only'),
-            )
-            schema.ordered = getattr(self.parent, 'ordered', False)
-            value = schema.load(value)
+            value = self._load(resource.SCHEMA, value)
             model = self._model(type)(**value)
         elif self.only_query:  # todo test only_query
             model = (
@@ -272,13 +276,59 @@ class NestedOn(MarshmallowNested):
         assert isinstance(model, tealdb.Model)
         return model
 
+    def _load(self, schema_cls: Type[Schema], value: dict) -> dict:
+        """Loads the value with an instance of the schema.
+
+        Instantiating a schema deep-copies its fields, and a snapshot
+        loads one nested schema per component and action, so the
+        instances are kept per app in :attr:`.SCHEMAS` by their
+        options and reused. An instance is taken out while loading, so
+        it is never used by two loads at once (another thread, or a
+        nested field of the same type).
+        """
+        load_only = self._nested_normalized_option('load_only')
+        dump_only = self._nested_normalized_option('dump_only')
+        only = self.only
+        if only is not None and not isinstance(only, str):
+            only = frozenset(only)
+        key = (
+            schema_cls,
+            only,
+            frozenset(self.exclude),
+            frozenset(load_only),
+            frozenset(dump_only),
+        )
+        with self._schemas_lock:
+            pools = app.extensions.setdefault(self.SCHEMAS, OrderedDict())
+            pool = pools.setdefault(key, [])
+            pools.move_to_end(key)
+            while len(pools) > self.SCHEMAS_MAX:
+                pools.popitem(last=False)
+            schema = pool.pop() if pool else None
+        if schema is None:
+            schema = schema_cls(
+                only=self.only,
+                exclude=self.exclude,
+                load_only=load_only,
+                dump_only=dump_only,
+            )
+        schema.context = getattr(self.parent, 'context', {})
+        schema.ordered = getattr(self.parent, 'ordered', False)
+        try:
+            return schema.load(value)
+        finally:
+            pool.append(schema)
+
     def _model(self, type: str) -> Type[tealdb.Model]:
         """Given the type of a model it returns the model class."""
         return self.db.Model._decl_class_registry.data[type]()
 
     def serialize(self, attr: str, obj, accessor=None) -> dict:
         """See class docs."""
-        if g.get(NestedOn.NESTED_LEVEL) == g.get(NestedOn.NESTED_LEVEL_MAX):
+        # Resolve the proxy once, as this runs for every nested field
+        ctx = g._get_current_object()
+        level = getattr(ctx, NestedOn.NESTED_LEVEL, None)
+        if level == getattr(ctx, NestedOn.NESTED_LEVEL_MAX, None):
             # Idea from https://marshmallow-sqlalchemy.readthedocs.io
             # /en/latest/recipes.html#smart-nested-field
             # Gets the FK of the relationship instead of the full object
@@ -286,9 +336,9 @@ class NestedOn(MarshmallowNested):
             # In such case return None
             # todo is this the behaviour we want?
             return getattr(obj, attr + '_id', None)
-        setattr(g, NestedOn.NESTED_LEVEL, g.get(NestedOn.NESTED_LEVEL) + 1)
+        setattr(ctx, NestedOn.NESTED_LEVEL, level + 1)
         ret = super().serialize(attr, obj, accessor)
-        setattr(g, NestedOn.NESTED_LEVEL, g.get(NestedOn.NESTED_LEVEL) - 1)
+        setattr(ctx, NestedOn.NESTED_LEVEL, getattr(ctx, NestedOn.NESTED_LEVEL) - 1)
         return ret
 
 
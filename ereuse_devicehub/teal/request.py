@@ -1,3 +1,5 @@
+from tempfile import SpooledTemporaryFile
+
 from flask import Request as _Request
 from flask import current_app as app
 
@@ -26,3 +28,13 @@ class Request(_Request):
                 else app.resources[self.blueprint].schema.load(json)
             )
         return json
+
+    def _get_file_stream(
+        self, total_content_length, content_type, filename=None, content_length=None
+    ):
+        """Keeps each uploaded file in memory until it is bigger than
+        ``UPLOAD_SPOOL_SIZE`` bytes, and then in a temporary file.
+        """
+        return SpooledTemporaryFile(
+            max_size=app.config['UPLOAD_SPOOL_SIZE'], mode='rb+'
+        )
@@ -1,12 +1,12 @@
 from enum import Enum
-from typing import Callable, Iterable, Iterator, Tuple, Type, Union
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, Tuple, Type, Union
 
 import inflection
 from anytree import PreOrderIter
 from boltons.typeutils import classproperty, issubclass
 from ereuse_devicehub.ereuse_utils.naming import Naming
 from flask import Blueprint, current_app, g, request, url_for
-from flask.json import jsonify
 from flask.views import MethodView
 from marshmallow import Schema as MarshmallowSchema
 from marshmallow import SchemaOpts as MarshmallowSchemaOpts
@@ -15,6 +15,10 @@ from werkzeug.exceptions import MethodNotAllowed
 from werkzeug.routing import UnicodeConverter
 
 from ereuse_devicehub.teal import db, query
+from ereuse_devicehub.teal.json_util import jsonify
+
+
+_schema_types = {}  # type: Dict[Type[Schema], str]
 
 
 class SchemaOpts(MarshmallowSchemaOpts):
@@ -43,8 +47,12 @@ class Schema(MarshmallowSchema):
     @classproperty
     def t(cls: Type['Schema']) -> str:
         """The type for this schema, auto-computed from its name."""
-        name, *_ = cls.__name__.split('Schema')
-        return Naming.new_type(name, cls.Meta.PREFIX)
+        # Computed once per class, as it is read for every dumped model
+        t = _schema_types.get(cls)
+        if t is None:
+            name, *_ = cls.__name__.split('Schema')
+            t = _schema_types[cls] = Naming.new_type(name, cls.Meta.PREFIX)
+        return t
 
     # noinspection PyMethodParameters
     @classproperty
@@ -137,10 +145,16 @@ class Schema(MarshmallowSchema):
             if isinstance(model, dict):
                 return super().dump(model, update_fields=update_fields)
             else:
-                return [
-                    self._polymorphic_dump(o, update_fields, polymorphic_on)
-                    for o in model
-                ]
+                # Look up the schema of every type once, not per model
+                dumpers = {}
+                result = []
+                for o in model:
+                    t = getattr(o, polymorphic_on)
+                    dumper = dumpers.get(t)
+                    if dumper is None:
+                        dumper = dumpers[t] = self._dumper(t)
+                    result.append(dumper(o, False, update_fields))
+                return result
 
         else:
             if isinstance(model, dict):
@@ -149,11 +163,15 @@ class Schema(MarshmallowSchema):
                 return self._polymorphic_dump(model, update_fields, polymorphic_on)
 
     def _polymorphic_dump(self, obj: 'db.Model', update_fields, polymorphic_on='t'):
-        schema = current_app.resources[getattr(obj, polymorphic_on)].schema
+        dumper = self._dumper(getattr(obj, polymorphic_on))
+        return dumper(obj, False, update_fields)
+
+    def _dumper(self, t: str) -> Callable:
+        """The marshmallow dump of the schema of the type ``t``."""
+        schema = current_app.resources[t].schema
         if schema.t != self.t:
-            return super(schema.__class__, schema).dump(obj, False, update_fields)
-        else:
-            return super().dump(obj, False, update_fields)
+            return partial(MarshmallowSchema.dump, schema)
+        return partial(MarshmallowSchema.dump, self)
 
     def jsonify(
         self,
@@ -1,13 +1,76 @@
+import logging
+import os
+import stat
+import tempfile
+
 import flask.templating
+from jinja2 import FileSystemBytecodeCache
 
 import ereuse_devicehub.resources.device.models
 
+logger = logging.getLogger(__name__)
+
+
+class BytecodeCache(FileSystemBytecodeCache):
+    """A bytecode cache in a directory that several processes share.
+
+    Every worker, and the app of every inventory, compile the same
+    templates; with the cache only the first one does it, and the
+    rest load the compiled code. Jinja checks that the code belongs
+    to the current source of the template before using it.
+
+    The compiled code is run, so the directory must be private to
+    the user of the workers, as the one jinja creates by default.
+    """
+
+    def __init__(self, directory: str) -> None:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        info = os.lstat(directory)
+        if (
+            not stat.S_ISDIR(info.st_mode)
+            or info.st_uid != os.getuid()
+            or info.st_mode & (stat.S_IRWXG | stat.S_IRWXO)
+        ):
+            raise PermissionError(
+                'The directory {} of the bytecode cache must be owned by this '
+                'user and have mode 700.'.format(directory)
+            )
+        super().__init__(directory)
+
+    def dump_bytecode(self, bucket):
+        # Write the file aside and move it, so no process reads
+        # a file that is being written
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                bucket.write_bytecode(f)
+            os.replace(tmp, self._get_cache_filename(bucket))
+        except OSError:
+            # As jinja, a cache that cannot be written is not an error
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
 
 class Environment(flask.templating.Environment):
     """As flask's environment but with some globals set"""
 
     def __init__(self, app, **options):
+        directory = app.config.get('JINJA_BYTECODE_CACHE')
+        if directory and 'bytecode_cache' not in options:
+            try:
+                options['bytecode_cache'] = BytecodeCache(directory)
+            except PermissionError as e:
+                logger.warning('Not caching the compiled templates: %s', e)
         super().__init__(app, **options)
         self.globals[isinstance.__name__] = isinstance
         self.globals[issubclass.__name__] = issubclass
         self.globals['d'] = ereuse_devicehub.resources.device.models
+
+    def compile_all(self):
+        """Compiles the HTML templates, saving them in the bytecode
+        cache, and returns their names.
+        """
+        names = self.list_templates(extensions=['html'])
+        for name in names:
+            self.get_template(name)
+        return names
@@ -5,14 +5,14 @@ from flask import current_app as app
 from flask import g
 from flask.views import View
 from flask_login import current_user, login_required, login_user, logout_user
-from sqlalchemy import or_
 
 from ereuse_devicehub import __version__, messages
 from ereuse_devicehub.db import db
 from ereuse_devicehub.forms import LoginForm, PasswordForm, SanitizationEntityForm
-from ereuse_devicehub.resources.action.models import Trade
 from ereuse_devicehub.resources.lot.models import Lot, ShareLot
+from ereuse_devicehub.resources.lot.summary import lot_summary_cache
 from ereuse_devicehub.resources.user.models import User
+from ereuse_devicehub.resources.visibility import visible_lot_ids
 from ereuse_devicehub.utils import is_safe_url
 
 core = Blueprint('core', __name__)
@@ -73,23 +73,14 @@ class GenericMixin(View):
     decorators = [login_required]
 
     def get_lots(self):
-        return (
-            Lot.query.outerjoin(Trade)
-            .filter(
-                or_(
-                    Trade.user_from == g.user,
-                    Trade.user_to == g.user,
-                    Lot.owner_id == g.user.id,
-                )
-            )
-            .distinct()
-        )
+        return Lot.query.filter(Lot.id.in_(visible_lot_ids(g.user.id)))
 
     def get_context(self):
         self.context = {
             'lots': self.get_lots(),
             'version': __version__,
             'share_lots': ShareLot.query.filter_by(user_to=g.user),
+            'user_lots': lot_summary_cache.get(g.user.id),
         }
 
         return self.context
@@ -3,6 +3,7 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, validators
 
 from ereuse_devicehub.db import db
+from ereuse_devicehub.resources import baked
 from ereuse_devicehub.resources.device.models import Placeholder
 
 
@@ -23,11 +24,7 @@ class KangarooForm(FlaskForm):
             return False
 
         if not self.placeholder:
-            self.placeholder = (
-                Placeholder.query.filter(Placeholder.phid == self.phid.data)
-                .filter(Placeholder.owner_id == g.user.id)
-                .first()
-            )
+            self.placeholder = baked.placeholder(self.phid.data, g.user.id).first()
             if self.placeholder:
                 if self.placeholder.status not in ['Snapshot', 'Twin']:
                     self.placeholder = None
@@ -0,0 +1,66 @@
+"""Times performing an action to many devices, through the ORM and
+in bulk.
+
+Usage: DB_SCHEMA=dbtest python scripts/bench_bulk_action.py email 1000 10000 50000
+
+Uses the devices of the user, up to each number of devices. The
+actions are rolled back, so the inventory is not modified.
+"""
+
+import sys
+import time
+
+from decouple import config
+from flask import g
+
+from ereuse_devicehub.db import db
+from ereuse_devicehub.devicehub import Devicehub
+from ereuse_devicehub.resources.action import bulk
+from ereuse_devicehub.resources.action.models import ToPrepare
+from ereuse_devicehub.resources.device.models import Device
+from ereuse_devicehub.resources.user.models import User
+
+
+def timed(fun):
+    start = time.perf_counter()
+    fun()
+    db.session.flush()
+    elapsed = time.perf_counter() - start
+    db.session.rollback()
+    return elapsed
+
+
+def main():
+    schema = config('DB_SCHEMA')
+    app = Devicehub(inventory=schema)
+    app.app_context().push()
+    email = sys.argv[1]
+    sizes = [int(size) for size in sys.argv[2:]]
+    g.user = User.query.filter_by(email=email).one()
+    ids = [
+        device_id
+        for device_id, in db.session.query(Device.id)
+        .filter_by(owner_id=g.user.id)
+        .order_by(Device.id)
+        .limit(max(sizes))
+    ]
+
+    for size in sizes:
+        selected = ids[:size]
+
+        def orm():
+            devices = Device.query.filter(Device.id.in_(selected)).all()
+            db.session.add(ToPrepare(devices=set(devices)))
+
+        def in_bulk():
+            bulk.perform(ToPrepare(), selected)
+
+        print(
+            '{} devices: orm {:.2f}s, bulk {:.2f}s'.format(
+                len(selected), timed(orm), timed(in_bulk)
+            )
+        )
+
+
+if __name__ == '__main__':
+    main()
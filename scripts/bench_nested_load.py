@@ -0,0 +1,81 @@
+"""Times loading the snapshots of the tests with the schema of the
+snapshots, reusing the schemas of the nested values and creating one
+for every value, as NestedOn did before.
+
+Usage: DB_SCHEMA=dbtest python scripts/bench_nested_load.py [rounds]
+
+Nothing is saved; the models the schemas create are rolled back.
+"""
+
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import yaml
+from decouple import config
+
+from ereuse_devicehub.db import db
+from ereuse_devicehub.devicehub import Devicehub
+from ereuse_devicehub.teal.marshmallow import NestedOn
+
+FILES = Path(__file__).parent.parent.joinpath('tests', 'files')
+
+
+class NoReuse(OrderedDict):
+    """Gives an empty pool every time, so every load creates its schema."""
+
+    def setdefault(self, key, default=None):
+        return []
+
+    def move_to_end(self, key, last=True):
+        pass
+
+
+def timed(schema, snapshots, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for snapshot in snapshots:
+            schema.load(snapshot)
+            db.session.rollback()
+    return time.perf_counter() - start
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    app = Devicehub(inventory=config('DB_SCHEMA'))
+    app.test_request_context().push()
+    snapshots = []
+    for path in sorted(FILES.glob('*.snapshot*.yaml')):
+        with path.open() as f:
+            snapshot = yaml.safe_load(f)
+        if isinstance(snapshot, dict) and snapshot.get('type') == 'Snapshot':
+            snapshots.append(snapshot)
+    schema = app.resources['Snapshot'].schema
+
+    # Warm up, and check that the snapshots load
+    loadable = []
+    for snapshot in snapshots:
+        try:
+            schema.load(snapshot)
+            loadable.append(snapshot)
+        except Exception:
+            pass
+        db.session.rollback()
+
+    reused = timed(schema, loadable, rounds)
+    schemas = app.extensions[NestedOn.SCHEMAS]
+    app.extensions[NestedOn.SCHEMAS] = NoReuse()
+    try:
+        created = timed(schema, loadable, rounds)
+    finally:
+        app.extensions[NestedOn.SCHEMAS] = schemas
+    print(
+        '{} snapshots x {}: new schemas {:.2f}s, reused schemas {:.2f}s'.format(
+            len(loadable), rounds, created, reused
+        )
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Times parsing the snapshots of Workbench Lite of the tests and of
+the examples: the whole parser of the API, and the parser of the
+computer from lshw and hwinfo.
+
+Usage: DB_SCHEMA=dbtest python scripts/bench_parser.py [rounds]
+
+Nothing is saved; the logs of the errors of the parser are rolled back.
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+from decouple import config
+
+from ereuse_devicehub.db import db
+from ereuse_devicehub.devicehub import Devicehub
+from ereuse_devicehub.parser.computer import Computer
+from ereuse_devicehub.parser.parser import ParseSnapshot
+from ereuse_devicehub.parser.schemas import Snapshot_lite
+
+ROOT = Path(__file__).parent.parent
+FOLDERS = ROOT.joinpath('tests', 'files'), ROOT.joinpath('examples', 'snapshots')
+
+
+def snapshots():
+    for folder in FOLDERS:
+        for path in sorted(folder.glob('**/*.json')):
+            try:
+                snapshot = json.loads(path.read_text())
+            except ValueError:
+                continue
+            if isinstance(snapshot, dict) and 'schema_api' in snapshot:
+                yield path.name, snapshot
+
+
+def timed(parse, snapshots, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for snapshot in snapshots:
+            parse(snapshot)
+    db.session.rollback()
+    return time.perf_counter() - start
+
+
+def computer(snapshot):
+    hwmd = snapshot['hwmd']
+    lshw = hwmd['lshw']
+    if isinstance(lshw, str):
+        lshw = json.loads(lshw)
+    Computer.run(lshw, hwmd['hwinfo'])
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    app = Devicehub(inventory=config('DB_SCHEMA'))
+    app.test_request_context().push()
+    schema = Snapshot_lite()
+
+    # Keep the snapshots that parse
+    loaded = []
+    for name, snapshot in snapshots():
+        try:
+            snapshot = schema.load(snapshot)
+            ParseSnapshot(snapshot)
+            loaded.append(snapshot)
+        except Exception as err:
+            print('Skipping {}: {!r}'.format(name, err))
+    db.session.rollback()
+
+    parsed = timed(ParseSnapshot, loaded, rounds)
+    computers = timed(computer, loaded, rounds)
+    print(
+        '{} snapshots x {}: parser {:.2f}s ({:.1f}ms each), '
+        'computer from lshw {:.2f}s ({:.1f}ms each)'.format(
+            len(loaded),
+            rounds,
+            parsed,
+            parsed * 1000 / max(1, len(loaded) * rounds),
+            computers,
+            computers * 1000 / max(1, len(loaded) * rounds),
+        )
+    )
+
+
+if __name__ == '__main__':
+    main()
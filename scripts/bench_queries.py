@@ -0,0 +1,66 @@
+"""Times the lookups of ereuse_devicehub.resources.baked against the
+same queries built every time, per call.
+
+Usage: DB_SCHEMA=dbtest python scripts/bench_queries.py email [calls]
+
+Looks for a device of the user by its Devicehub ID and for the user
+by its token. The objects stay in the session, so the times are of
+building, compiling and running the queries, not of loading the rows.
+"""
+
+import sys
+import time
+
+from decouple import config
+
+from ereuse_devicehub.db import db
+from ereuse_devicehub.devicehub import Devicehub
+from ereuse_devicehub.resources import baked
+from ereuse_devicehub.resources.device.models import Device
+from ereuse_devicehub.resources.user.models import User
+
+
+def per_call(fun, calls):
+    fun()  # Warm up, and bake the query
+    start = time.perf_counter()
+    for _ in range(calls):
+        fun()
+    return (time.perf_counter() - start) / calls * 1000
+
+
+def main():
+    app = Devicehub(inventory=config('DB_SCHEMA'))
+    app.app_context().push()
+    email = sys.argv[1]
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    user = User.query.filter_by(email=email).one()
+    dhid = (
+        db.session.query(Device.devicehub_id)
+        .filter_by(owner_id=user.id)
+        .order_by(Device.id)
+        .limit(1)
+        .scalar()
+    )
+
+    lookups = {
+        'device by dhid': (
+            lambda: Device.query.filter(Device.owner_id == user.id)
+            .filter(Device.devicehub_id == dhid)
+            .one(),
+            lambda: baked.one(baked.device(dhid, user.id), Device),
+        ),
+        'user by token': (
+            lambda: User.query.filter_by(token=user.token).first(),
+            lambda: baked.user_by_token(user.token).first(),
+        ),
+    }
+    for name, (query, baked_query) in lookups.items():
+        print(
+            '{} x {}: query {:.3f}ms, baked {:.3f}ms per call'.format(
+                name, calls, per_call(query, calls), per_call(baked_query, calls)
+            )
+        )
+
+
+if __name__ == '__main__':
+    main()
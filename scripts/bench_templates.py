@@ -0,0 +1,51 @@
+"""Times getting the templates of the first requests in a new worker,
+compiling them and loading them from the bytecode cache.
+
+Usage: DB_SCHEMA=dbtest python scripts/bench_templates.py
+
+Uses an empty temporary directory as bytecode cache.
+"""
+
+import tempfile
+import time
+
+from decouple import config
+
+from ereuse_devicehub.config import DevicehubConfig
+from ereuse_devicehub.devicehub import Devicehub
+
+TEMPLATES = (
+    'inventory/device_list.html',
+    'inventory/device_detail.html',
+    'inventory/erasure.html',
+    'labels/print_labels.html',
+    'devices/layout.html',
+)
+
+
+def first_requests(cache: str) -> float:
+    """Gets the templates in a new app, as a new worker would."""
+
+    class Config(DevicehubConfig):
+        JINJA_BYTECODE_CACHE = cache
+
+    app = Devicehub(inventory=config('DB_SCHEMA'), config=Config())
+    start = time.perf_counter()
+    for name in TEMPLATES:
+        app.jinja_env.get_template(name)
+    return time.perf_counter() - start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as cache:
+        compiled = first_requests(cache)
+        cached = first_requests(cache)
+    print(
+        '{} templates: compiled {:.3f}s, from the cache {:.3f}s'.format(
+            len(TEMPLATES), compiled, cached
+        )
+    )
+
+
+if __name__ == '__main__':
+    main()
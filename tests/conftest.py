@@ -23,6 +23,7 @@ from ereuse_devicehub.inventory.views import devices
 from ereuse_devicehub.labels.views import labels
 from ereuse_devicehub.mail.flask_mail import Mail
 from ereuse_devicehub.resources.agent.models import Person
+from ereuse_devicehub.resources.documents import batch
 from ereuse_devicehub.resources.enums import SessionType
 from ereuse_devicehub.resources.tag import Tag
 from ereuse_devicehub.resources.user.models import Session, User
@@ -195,6 +196,16 @@ def auth_app_context(app: Devicehub):
         yield app
 
 
+@pytest.fixture()
+def render_pool():
+    """Shuts down the processes the test started to render documents,
+    so later tests do not run with them.
+    """
+    yield
+    if batch._pool:
+        batch._discard_pool(batch._pool)
+
+
 def json_encode(dev: str) -> dict:
     """Encode json."""
     data = {"type": "Snapshot"}
@@ -30,6 +30,12 @@ from ereuse_devicehub.resources.device.models import (
     RamModule,
     SolidStateDrive,
 )
+from ereuse_devicehub.resources.device.trading import (
+    STATUS,
+    DeviceTradeState,
+    replay,
+    status_for,
+)
 from ereuse_devicehub.resources.enums import (
     ComputerChassis,
     Severity,
@@ -2752,6 +2758,75 @@ def test_trade_case14(user: UserClient, user2: UserClient):
     assert device.actions[-5].author == trade.user_to
 
 
+@pytest.mark.mvp
+@pytest.mark.usefixtures(conftest.app_context.__name__)
+def test_trade_state_saved(user: UserClient, user2: UserClient):
+    """Checks that the trading state is saved when confirming and
+    revoking, and that it matches replaying the confirmations.
+    """
+    lot, _ = user.post({'name': 'MyLot'}, res=Lot)
+    snap, _ = user.post(file('basic.snapshot'), res=models.Snapshot)
+    devices = [('id', snap['device']['id'])]
+    lot, _ = user.post({}, res=Lot, item='{}/devices'.format(lot['id']), query=devices)
+    request_post = {
+        'type': 'Trade',
+        'devices': [],
+        'userFromEmail': user2.email,
+        'userToEmail': user.email,
+        'price': 10,
+        'date': "2020-12-01T02:00:00+00:00",
+        'lot': lot['id'],
+        'confirms': True,
+    }
+    user.post(res=models.Action, data=request_post)
+    trade = models.Trade.query.one()
+    device = trade.devices[0]
+    state = DeviceTradeState.query.filter_by(device=device, trade=trade).one()
+    assert STATUS[state.status] == 'Confirm'
+    assert state.last_user_id == trade.user_to_id
+    assert state.get_status(simple=True) == 'NeedConfirmation'
+
+    request_confirm = {'type': 'Confirm', 'action': trade.id, 'devices': [device.id]}
+    user2.post(res=models.Action, data=request_confirm)
+    db.session.refresh(state)
+    assert STATUS[state.status] == 'TradeConfirmed'
+    assert state.last_user_id == trade.user_from_id
+
+    request_revoke = {'type': 'Revoke', 'action': trade.id, 'devices': [device.id]}
+    user2.post(res=models.Action, data=request_revoke)
+    db.session.refresh(state)
+    assert STATUS[state.status] == 'Revoke'
+    # The other party has to confirm the revoke
+    assert (
+        status_for(
+            state.status,
+            state.last_user_id,
+            trade.user_from_id,
+            trade.user_to_id,
+            trade.user_to_id,
+        )
+        == 5
+    )
+    assert (
+        status_for(
+            state.status,
+            state.last_user_id,
+            trade.user_from_id,
+            trade.user_to_id,
+            trade.user_from_id,
+        )
+        == 4
+    )
+
+    confirms = [
+        (ac.t, ac.user)
+        for ac in device.actions
+        if ac.t in ('Confirm', 'Revoke') and ac.action == trade
+    ]
+    status, last_user = replay(confirms, trade.user_from, trade.user_to)
+    assert (status, last_user.id) == (state.status, state.last_user_id)
+
+
 @pytest.mark.mvp
 @pytest.mark.usefixtures(conftest.app_context.__name__)
 def test_action_web_erase(user: UserClient, client: Client):
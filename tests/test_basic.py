@@ -126,3 +126,39 @@ def test_api_docs(client: Client):
         'name': 'Authorization',
     }
     assert len(docs['definitions']) == 136
+
+
+@pytest.mark.mvp
+def test_compile_templates(app: Devicehub, tmp_path, monkeypatch):
+    """Tests that the templates are saved in the bytecode cache and
+    loaded from it by other environments.
+    """
+    monkeypatch.setitem(app.config, 'JINJA_BYTECODE_CACHE', str(tmp_path))
+    names = app.create_jinja_environment().compile_all()
+    assert 'inventory/device_list.html' in names
+    assert len(list(tmp_path.iterdir())) == len(names)
+
+    env = app.create_jinja_environment()
+    with app.app_context():
+        source, filename, _ = env.loader.get_source(env, 'inventory/device_list.html')
+        bucket = env.bytecode_cache.get_bucket(
+            env, 'inventory/device_list.html', filename, source
+        )
+    assert bucket.code is not None
+
+
+@pytest.mark.mvp
+def test_compile_templates_shared_directory(app: Devicehub, tmp_path, monkeypatch):
+    """Tests that a bytecode cache that other users can write is not
+    used, and that the directory is created private.
+    """
+    shared = tmp_path / 'shared'
+    shared.mkdir()
+    shared.chmod(0o777)
+    monkeypatch.setitem(app.config, 'JINJA_BYTECODE_CACHE', str(shared))
+    assert app.create_jinja_environment().bytecode_cache is None
+
+    private = tmp_path / 'private'
+    monkeypatch.setitem(app.config, 'JINJA_BYTECODE_CACHE', str(private))
+    assert app.create_jinja_environment().bytecode_cache is not None
+    assert private.stat().st_mode & 0o777 == 0o700
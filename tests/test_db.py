@@ -1,8 +1,12 @@
 import datetime
 from uuid import UUID
 
+import flask
 import pytest
 
+from ereuse_devicehub.db import LAST_WRITE, REPLICA, db, read_replica
+from ereuse_devicehub.devicehub import Devicehub
+from ereuse_devicehub.resources.device.models import Device
 from ereuse_devicehub.teal.db import UniqueViolation
 
 
@@ -32,3 +36,41 @@ def test_unique_violation():
     assert u.constraint == 'snapshot_uuid_key'
     assert u.field_name == 'uuid'
     assert u.field_value == UUID('f5efd26e-8754-46bc-87bf-fbccc39d60d9')
+
+
+@pytest.mark.mvp
+def test_read_replica(app: Devicehub, monkeypatch):
+    """Tests that the views marked to read from the replica run their
+    selects there, until they write, and that the user of the cookie
+    session reads from the primary right after writing.
+
+    The replica is the test database itself.
+    """
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    monkeypatch.setitem(app.config, 'SQLALCHEMY_BINDS', {REPLICA: uri})
+    with app.test_request_context():
+        primary = db.get_engine(app)
+        replica = db.get_engine(app, bind=REPLICA)
+        select = Device.query.statement
+        update = Device.__table__.update().values(model='foo')
+        assert db.session.get_bind(clause=select) is primary
+        read_replica(lambda: None)()
+        assert db.session.get_bind(clause=select) is replica
+        with db.session().on_primary():
+            assert db.session.get_bind(clause=select) is primary
+        assert Device.query.count() == 0
+
+        # A token is not tracked
+        assert db.session.get_bind(clause=update) is primary
+        assert db.session.get_bind(clause=select) is primary
+        db.session.commit()
+        assert LAST_WRITE not in flask.session
+        assert db.session.get_bind(clause=select) is replica
+
+        flask.session['_user_id'] = '1'
+        db.session.get_bind(clause=update)
+        db.session.commit()
+        assert LAST_WRITE in flask.session
+        assert db.session.get_bind(clause=select) is primary
+        flask.session[LAST_WRITE] -= app.config['REPLICA_MAX_LAG'] + 1
+        assert db.session.get_bind(clause=select) is replica
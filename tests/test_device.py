@@ -1,6 +1,8 @@
 import datetime
+from functools import partial
 from uuid import UUID
 
+import flask
 import pytest
 from colour import Color
 from flask import g
@@ -10,10 +12,19 @@ from ereuse_devicehub.client import Client, UserClient
 from ereuse_devicehub.db import db
 from ereuse_devicehub.devicehub import Devicehub
 from ereuse_devicehub.ereuse_utils.test import ANY
+from ereuse_devicehub.resources import baked
 from ereuse_devicehub.resources.action import models as m
 from ereuse_devicehub.resources.action.models import Remove, TestConnectivity
 from ereuse_devicehub.resources.agent.models import Person
 from ereuse_devicehub.resources.device import models as d
+from ereuse_devicehub.resources.device.manufacturers import (
+    ManufacturerEntry,
+    ManufacturerIndex,
+    manufacturers,
+    name_key,
+    reset,
+)
+from ereuse_devicehub.resources.device.public import public_page_cache
 from ereuse_devicehub.resources.device.schemas import Device as DeviceS
 from ereuse_devicehub.resources.device.sync import Sync
 from ereuse_devicehub.resources.enums import (
@@ -25,6 +36,7 @@ from ereuse_devicehub.resources.enums import (
 )
 from ereuse_devicehub.resources.tag.model import Tag
 from ereuse_devicehub.resources.user import User
+from ereuse_devicehub.teal.db import ResourceNotFound
 from ereuse_devicehub.teal.enums import Layouts
 from tests import conftest
 from tests.conftest import file, yaml2json
@@ -486,6 +498,37 @@ def test_computer_monitor():
     db.session.commit()
 
 
+@pytest.mark.mvp
+@pytest.mark.usefixtures(conftest.auth_app_context.__name__)
+def test_device_timeline():
+    """Tests that the sorted actions of a device are kept until
+    an action is added to it.
+    """
+    pc = d.Desktop(
+        model='p1mo',
+        manufacturer='p1ma',
+        serial_number='p1s',
+        chassis=ComputerChassis.Tower,
+    )
+    db.session.add(pc)
+    db.session.commit()
+    timeline = pc.timeline
+    assert pc.timeline is timeline
+    assert pc.physical_status() is None
+
+    to_prepare = m.ToPrepare(devices=OrderedSet([pc]))
+    assert pc.timeline is not timeline
+    assert pc.physical_status() == to_prepare
+    db.session.add(to_prepare)
+    db.session.commit()
+    assert pc.actions == [to_prepare]
+    assert pc.physical_status() == to_prepare
+    assert pc.physical_status(closed=to_prepare.created) is None
+    assert pc.last_action_of(m.ToPrepare) == to_prepare
+    with pytest.raises(LookupError):
+        pc.last_action_of(m.Ready)
+
+
 @pytest.mark.mvp
 def test_manufacturer(user: UserClient):
     m, r = user.get(res='Manufacturer', query=[('search', 'asus')])
@@ -496,6 +539,41 @@ def test_manufacturer(user: UserClient):
     assert r.expires.timestamp() > datetime.datetime.now().timestamp()
 
 
+@pytest.mark.mvp
+def test_manufacturer_index():
+    """Tests finding the manufacturers by the start of their name and
+    normalizing the ways devices write them.
+    """
+    index = ManufacturerIndex(
+        [
+            ManufacturerEntry('Hewlett-Packard', None, None),
+            ManufacturerEntry('Dell', None, None),
+            ManufacturerEntry('Asus', 'https://en.wikipedia.org/wiki/Asus', None),
+            ManufacturerEntry('HP', None, None),
+        ]
+    )
+    assert name_key('DELL INC.') == 'dell'
+    assert name_key('Hewlett Packard Company') == 'hewlettpackard'
+    assert [m.name for m in index.starting_with('h')] == ['Hewlett-Packard', 'HP']
+    assert [m.name for m in index.starting_with('H', limit=1)] == ['Hewlett-Packard']
+    assert index.starting_with('x') == []
+    assert index.normalize('DELL INC.') == 'Dell'
+    assert index.normalize('hewlett packard') == 'Hewlett-Packard'
+    assert index.normalize('ASUSTeK Computer Inc.') is None
+    assert index.normalize(None) is None
+
+
+@pytest.mark.mvp
+def test_manufacturer_index_db(app: Devicehub):
+    """Tests that the index reads the manufacturers of the table."""
+    with app.app_context():
+        reset()
+        asus = manufacturers().starting_with('asus')
+        assert [(m.name, m.url) for m in asus] == [
+            ('Asus', 'https://en.wikipedia.org/wiki/Asus')
+        ]
+
+
 @pytest.mark.mvp
 @pytest.mark.xfail(reason='Develop functionality')
 def test_manufacturer_enforced():
@@ -504,6 +582,26 @@ def test_manufacturer_enforced():
     """
 
 
+@pytest.mark.mvp
+def test_baked_lookups(app: Devicehub, user: UserClient, user2: UserClient):
+    """Tests the lookups of devices, snapshots and users by their
+    identifiers, as baked queries.
+    """
+    s, _ = user.post(file('asus-eee-1000h.snapshot.11'), res=m.Snapshot)
+    dhid = s['device']['devicehubID']
+    with app.app_context():
+        pc = d.Device.query.filter_by(devicehub_id=dhid).one()
+        assert baked.one(baked.device(dhid, user.user['id']), d.Device) == pc
+        assert baked.device(dhid, active=True).all() == [pc]
+        assert baked.device(dhid, active=False).first() is None
+        with pytest.raises(ResourceNotFound):
+            baked.one(baked.device(dhid, user2.user['id']), d.Device)
+        assert baked.snapshot_exists(s['uuid'])
+        assert not baked.snapshot_exists('e7fa4a2f-5c7e-4f3d-9a6a-1f3a7c2d9b10')
+        owner = User.query.filter_by(id=user.user['id']).one()
+        assert baked.user_by_token(owner.token).first() == owner
+
+
 @pytest.mark.mvp
 def test_device_properties_format(app: Devicehub, user: UserClient):
     user.post(file('asus-eee-1000h.snapshot.11'), res=m.Snapshot)
@@ -542,6 +640,59 @@ def test_device_public(user: UserClient, client: Client):
     assert 'intel atom cpu n270 @ 1.60ghz' in html
 
 
+@pytest.mark.mvp
+def test_device_list_json_dumps(app: Devicehub, user: UserClient, monkeypatch):
+    """A JSON_DUMPS that encodes as flask gives the same response."""
+    s, _ = user.post(file('asus-eee-1000h.snapshot.11'), res=m.Snapshot)
+    user.post(file('basic.snapshot'), res=m.Snapshot)
+    dhid = s['device']['devicehubID']
+    _, res_list = user.get(res=d.Device)
+    _, res_one = user.get(res=d.Device, item=dhid)
+    dumps = partial(flask.json.dumps, separators=(',', ':'))
+    monkeypatch.setitem(app.config, 'JSON_DUMPS', dumps)
+    _, res = user.get(res=d.Device)
+    assert res.data == res_list.data
+    assert res.content_type == res_list.content_type
+    _, res = user.get(res=d.Device, item=dhid)
+    assert res.data == res_one.data
+
+
+@pytest.fixture()
+def public_pages():
+    """Empties the cache of public pages after the test, as the
+    devices it keeps are from a database that is dropped.
+    """
+    yield public_page_cache
+    public_page_cache.clear()
+
+
+@pytest.mark.mvp
+@pytest.mark.usefixtures(public_pages.__name__)
+def test_device_public_not_modified(
+    app: Devicehub, user: UserClient, client: Client, monkeypatch
+):
+    monkeypatch.setitem(app.config, 'PUBLIC_PAGE_CACHE_SIZE', 10)
+    s, _ = user.post(file('asus-eee-1000h.snapshot.11'), res=m.Snapshot)
+    dhid = s['device']['devicehubID']
+    _, res = client.get(res=d.Device, item=dhid, accept=ANY)
+    etag = res.headers['ETag']
+    # Deleting rows can keep the last update time, so only the ETag validates
+    assert 'Last-Modified' not in res.headers
+    future = {'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'}
+    client.get(res=d.Device, item=dhid, accept=ANY, headers=future, status=200)
+
+    headers = {'If-None-Match': etag}
+    client.get(res=d.Device, item=dhid, accept=ANY, headers=headers, status=304)
+
+    with app.app_context():
+        device = d.Device.query.filter_by(devicehub_id=dhid).one()
+        device.model = 'foo model'
+        db.session.commit()
+    html, res = client.get(res=d.Device, item=dhid, accept=ANY, headers=headers)
+    assert res.headers['ETag'] != etag
+    assert 'foo model' in html
+
+
 @pytest.mark.mvp
 @pytest.mark.usefixtures(conftest.app_context.__name__)
 def test_computer_accessory_model(user: UserClient):
@@ -1,12 +1,18 @@
 import uuid
 
+import inflection
 import pytest
+from sqlalchemy.orm import aliased
 
 from ereuse_devicehub.client import UserClient
 from ereuse_devicehub.db import db
 from ereuse_devicehub.devicehub import Devicehub
-from ereuse_devicehub.resources.action.models import Snapshot
+from ereuse_devicehub.resources import search
+from ereuse_devicehub.resources.action.models import Action, Snapshot
+from ereuse_devicehub.resources.agent.models import Organization
 from ereuse_devicehub.resources.device.models import (
+    Component,
+    Computer,
     Desktop,
     Device,
     GraphicCard,
@@ -17,7 +23,9 @@ from ereuse_devicehub.resources.device.models import (
 from ereuse_devicehub.resources.device.search import DeviceSearch
 from ereuse_devicehub.resources.device.views import Filters, Sorting
 from ereuse_devicehub.resources.enums import ComputerChassis
-from ereuse_devicehub.resources.lot.models import Lot
+from ereuse_devicehub.resources.lot.models import Lot, ShareLot
+from ereuse_devicehub.resources.tag.model import Tag
+from ereuse_devicehub.resources.visibility import visible_device_ids, visible_lot_ids
 from ereuse_devicehub.teal.utils import compiled
 from tests import conftest
 from tests.conftest import file, json_encode, yaml2json
@@ -321,3 +329,148 @@ def test_device_query_search_synonyms_intel(user: UserClient):
     assert 1 == len(i['items'])
     i, _ = user.get(res=Device, query=[('search', 'h.p')])
     assert 1 == len(i['items'])
+
+
+def _former_properties(device: Device) -> str:
+    """The properties document of the device as the search computed it
+    before, with three queries per device and the synonyms in the code.
+    """
+    tokens = [
+        (str(device.id), search.Weight.A),
+        (inflection.humanize(device.type), search.Weight.B),
+        (Device.model, search.Weight.B),
+        (Device.manufacturer, search.Weight.C),
+        (Device.serial_number, search.Weight.A),
+    ]
+    manufacturer = (device.manufacturer or '').lower()
+    if 'asus' in manufacturer:
+        tokens.append(('asus', search.Weight.B))
+    if 'hewlett' in manufacturer or 'hp' in manufacturer or 'h.p' in manufacturer:
+        tokens.append(('hp', search.Weight.B))
+        tokens.append(('h.p', search.Weight.C))
+        tokens.append(('hewlett', search.Weight.C))
+        tokens.append(('packard', search.Weight.C))
+    if isinstance(device, Computer):
+        Comp = aliased(Component)
+        tokens.extend(
+            (
+                (db.func.string_agg(db.cast(Comp.id, db.TEXT), ' '), search.Weight.D),
+                (db.func.string_agg(Comp.model, ' '), search.Weight.C),
+                (db.func.string_agg(Comp.manufacturer, ' '), search.Weight.D),
+                (db.func.string_agg(Comp.serial_number, ' '), search.Weight.B),
+                (db.func.string_agg(Comp.type, ' '), search.Weight.B),
+                ('Computer', search.Weight.C),
+                ('PC', search.Weight.C),
+            )
+        )
+    query = db.session.query(search.Search.vectorize(*tokens))
+    query = query.filter(Device.id == device.id)
+    if isinstance(device, Computer):
+        query = query.outerjoin(Comp, Computer.components).group_by(Device.id)
+    return query.scalar()
+
+
+def _words(document: str) -> set:
+    """The words of a tsvector and their weights, without positions,
+    which depend on the order in which the components are joined.
+    """
+    sql = 'SELECT lexeme, weights FROM unnest(CAST(:document AS tsvector))'
+    rows = db.session.execute(sql, {'document': document})
+    return {(lexeme, tuple(weights)) for lexeme, weights in rows}
+
+
+@pytest.mark.mvp
+@pytest.mark.usefixtures(conftest.app_context.__name__)
+def test_device_search_documents_parity(user: UserClient):
+    """Checks that the documents computed at once for many devices are
+    the ones that were computed for each device.
+    """
+    user.post(file('basic.snapshot'), res=Snapshot)
+    user.post(file('computer-monitor.snapshot'), res=Snapshot)
+    user.post(file('real-eee-1001pxd.snapshot.11'), res=Snapshot)
+    s = yaml2json('real-hp.snapshot.11')
+    s['device']['model'] = 'foo'
+    user.post(json_encode(s), res=Snapshot)
+
+    DeviceSearch.regenerate_search_table(db.session)
+    documents = DeviceSearch.query.all()
+    devices = Device.query.filter(Device.id.in_([d.device_id for d in documents]))
+    manufacturers = {(device.manufacturer or '').lower() for device in devices}
+    assert any('asus' in m for m in manufacturers)
+    assert any('hewlett' in m or 'hp' in m for m in manufacturers)
+
+    for document in documents:
+        device = document.device
+        assert not isinstance(device, Component)
+        former = _former_properties(device)
+        assert _words(document.properties) == _words(former)
+        if not isinstance(device, Computer):
+            assert document.properties == former
+        tags = db.session.query(
+            search.Search.vectorize(
+                (db.func.string_agg(Tag.id, ' '), search.Weight.A),
+                (db.func.string_agg(Tag.secondary, ' '), search.Weight.A),
+                (db.func.string_agg(Organization.name, ' '), search.Weight.B),
+            )
+        )
+        tags = tags.filter(Tag.device_id == device.id).join(Tag.org).scalar()
+        assert document.tags == tags
+        devicehub_ids = db.session.query(
+            search.Search.vectorize(
+                (db.func.string_agg(Device.devicehub_id, ' '), search.Weight.A),
+            )
+        )
+        devicehub_ids = devicehub_ids.filter(
+            Device.devicehub_id == device.devicehub_id
+        ).scalar()
+        assert document.devicehub_ids == devicehub_ids
+
+
+@pytest.mark.mvp
+@pytest.mark.usefixtures(conftest.app_context.__name__)
+def test_visible_device_ids(user: UserClient, user2: UserClient):
+    """Checks that owned, traded and shared devices are resolved
+    by the database, without loading the trades in Python.
+    """
+    snap1, _ = user.post(file('basic.snapshot'), res=Snapshot)
+    snap2, _ = user.post(file('acer.happy.battery.snapshot'), res=Snapshot)
+    dev1, dev2 = snap1['device']['id'], snap2['device']['id']
+    lot, _ = user.post({'name': 'MyLot'}, res=Lot)
+    user.post({}, res=Lot, item='{}/devices'.format(lot['id']), query=[('id', dev1)])
+    shared, _ = user.post({'name': 'Shared'}, res=Lot)
+    user.post({}, res=Lot, item='{}/devices'.format(shared['id']), query=[('id', dev2)])
+    user2_id = uuid.UUID(user2.user['id'])
+
+    def visible(**kwargs):
+        query = [Device.id.in_(visible_device_ids(user2_id, **kwargs))]
+        ids = {d.id for d in Device.query.filter(*query)}
+        return ids, compiled(Device, query)[1]
+
+    ids, params = visible()
+    assert not ids
+
+    request_post = {
+        'type': 'Trade',
+        'devices': [],
+        'userFromEmail': user2.email,
+        'userToEmail': user.email,
+        'price': 10,
+        'date': "2020-12-01T02:00:00+00:00",
+        'lot': lot['id'],
+        'confirms': True,
+    }
+    user.post(res=Action, data=request_post)
+    db.session.add(ShareLot(id=uuid.uuid4(), lot_id=shared['id'], user_to_id=user2_id))
+    db.session.commit()
+
+    ids, params_after = visible()
+    assert ids == {dev1, dev2}
+    # The statement does not grow with the amount of traded devices
+    assert params_after == params
+    assert visible(shared=False)[0] == {dev1}
+    assert visible(traded=False)[0] == {dev2}
+
+    lots = Lot.query.filter(Lot.id.in_(visible_lot_ids(user2_id)))
+    assert [str(x.id) for x in lots] == [lot['id']]
+    lots = Lot.query.filter(Lot.id.in_(visible_lot_ids(user2_id, shared=True)))
+    assert {str(x.id) for x in lots} == {lot['id'], shared['id']}
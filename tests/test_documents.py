@@ -13,9 +13,13 @@ from ereuse_devicehub.devicehub import Devicehub
 from ereuse_devicehub.ereuse_utils.test import ANY
 from ereuse_devicehub.resources.action.models import Allocate, Live, Snapshot
 from ereuse_devicehub.resources.device import models as d
-from ereuse_devicehub.resources.documents import documents
+from ereuse_devicehub.resources.documents import batch, documents
 from ereuse_devicehub.resources.enums import SessionType
-from ereuse_devicehub.resources.hash_reports import ReportHash
+from ereuse_devicehub.resources.hash_reports import (
+    ReportHash,
+    insert_hash,
+    verify_hash,
+)
 from ereuse_devicehub.resources.lot.models import Lot
 from ereuse_devicehub.resources.tradedocument.models import TradeDocument
 from ereuse_devicehub.resources.user.models import Session
@@ -576,6 +580,22 @@ def test_get_document_lots(user: UserClient, user2: UserClient):
     assert export2_csv[1][3] == 'comments,lot3,testcomment-lot3,'
 
 
+@pytest.mark.mvp
+@pytest.mark.usefixtures(conftest.app_context.__name__)
+def test_insert_hash_once():
+    """Tests that generating the same report twice saves one hash,
+    and that files are verified by reading them in chunks.
+    """
+    report = b'a,b,c\n' * 100000
+    hash3 = insert_hash(report)
+    assert insert_hash(BytesIO(report)) == hash3
+    assert hash3 == hashlib.sha3_256(report).hexdigest()
+    assert ReportHash.query.filter_by(hash3=hash3).count() == 1
+
+    assert verify_hash(BytesIO(report))
+    assert not verify_hash(BytesIO(report + b'd'))
+
+
 @pytest.mark.mvp
 def test_verify_stamp(user: UserClient, client: Client):
     """Test verify stamp of one export device information in a csv file."""
@@ -836,3 +856,25 @@ def test_trade_documents_with_weight(user: UserClient):
     }
     doc, _ = user.post(res=TradeDocument, data=request_post)
     assert doc['weight'] == request_post['weight']
+
+
+@pytest.mark.mvp
+@pytest.mark.usefixtures(conftest.render_pool.__name__)
+def test_batch_render_pool():
+    """Tests that the documents are rendered in the pool of the worker,
+    which is kept for the next renders, and in the worker with 0
+    processes.
+    """
+    documents = [
+        batch.Document('{}.pdf'.format(i), '<p>{}</p>'.format(i)) for i in range(3)
+    ]
+    rendered = batch.render(documents, 'http://localhost/', 2)
+    assert [name for name, _, _ in rendered] == ['0.pdf', '1.pdf', '2.pdf']
+    assert all(pdf.startswith(b'%PDF') for _, pdf, _ in rendered)
+    pool = batch._pool
+    assert pool
+    batch.render(documents, 'http://localhost/', 2)
+    assert batch._pool is pool
+
+    rendered = batch.render(documents[:1], 'http://localhost/', 0)
+    assert rendered[0][1].startswith(b'%PDF')
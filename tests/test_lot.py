@@ -353,6 +353,33 @@ def test_lot_post_add_children_view_ui_tree_normal(user: UserClient):
     assert lots[0]['name'] == 'Parent'
 
 
+@pytest.mark.mvp
+def test_lot_ui_tree_cache(user: UserClient, user2: UserClient):
+    """Tests that the tree of lots changes after adding and removing
+    children, and that users only see their lots.
+    """
+    parent, _ = user.post(({'name': 'Parent'}), res=Lot)
+    child, _ = user.post(({'name': 'Child'}), res=Lot)
+    nodes = user.get(res=Lot, query=[('format', 'UiTree')])[0]['tree']
+    assert [node['id'] for node in nodes] == [parent['id'], child['id']]
+
+    user.post({}, res=Lot, item='{}/children'.format(parent['id']),
+              query=[('id', child['id'])])
+    nodes = user.get(res=Lot, query=[('format', 'UiTree')])[0]['tree']
+    assert len(nodes) == 1
+    assert nodes[0]['nodes'][0]['id'] == child['id']
+
+    user.delete({}, res=Lot, item='{}/children'.format(parent['id']),
+                query=[('id', child['id'])], status=200)
+    nodes = user.get(res=Lot, query=[('format', 'UiTree')])[0]['tree']
+    assert [node['id'] for node in nodes] == [parent['id'], child['id']]
+    assert nodes[0]['nodes'] == []
+
+    r = user2.get(res=Lot, query=[('format', 'UiTree')])[0]
+    assert r['tree'] == []
+    assert r['items'] == {}
+
+
 @pytest.mark.mvp
 @pytest.mark.usefixtures(conftest.app_context.__name__)
 def test_lot_post_add_remove_device_view(user: UserClient):
@@ -390,6 +417,42 @@ def test_lot_post_add_remove_device_view(user: UserClient):
     assert not len(lot.devices)
 
 
+@pytest.mark.mvp
+@pytest.mark.usefixtures(conftest.app_context.__name__)
+def test_lot_add_remove_devices_delta(user: UserClient):
+    """Tests that adding devices only adds the new ones and that
+    removing devices keeps the rest.
+    """
+    g.user = User.query.one()
+    devices = [
+        Desktop(serial_number='foo{}'.format(i),
+                model='bar',
+                manufacturer='foobar',
+                chassis=ComputerChassis.Lunchbox,
+                owner_id=user.user['id'])
+        for i in range(3)
+    ]
+    db.session.add_all(devices)
+    db.session.commit()
+    ids = [('id', device.id) for device in devices]
+    lot, _ = user.post({'name': 'lot'}, res=Lot)
+    item = '{}/devices'.format(lot['id'])
+    user.post({}, res=Lot, item=item, query=ids[:2])
+    user.post({}, res=Lot, item=item, query=ids[1:])
+    lot = Lot.query.filter_by(id=lot['id']).one()
+    assert {device.id for device in lot.devices} == {id for _, id in ids}
+    assert LotDevice.query.filter_by(lot_id=lot.id).count() == 3
+
+    user.delete(res=Lot, item=item, query=ids[:1], status=200)
+    db.session.expire(lot)
+    assert {device.id for device in lot.devices} == {id for _, id in ids[1:]}
+
+    # Removing devices that are not in the lot does nothing
+    user.delete(res=Lot, item=item, query=ids[:2], status=200)
+    db.session.expire(lot)
+    assert len(lot.devices) == 2
+
+
 @pytest.mark.mvp
 @pytest.mark.usefixtures(conftest.app_context.__name__)
 def test_lot_error_add_device_from_other_user(user: UserClient):
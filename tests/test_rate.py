@@ -6,11 +6,14 @@ import pytest
 from ereuse_devicehub.client import UserClient
 from ereuse_devicehub.db import db
 from ereuse_devicehub.resources.action.models import Action, BenchmarkDataStorage, \
-    BenchmarkProcessor, RateComputer, Snapshot, VisualTest
+    BenchmarkProcessor, BenchmarkProcessorSysbench, RateComputer, Snapshot, VisualTest
+from ereuse_devicehub.resources.action.rate.batch import BatchRateAlgorithm
+from ereuse_devicehub.resources.action.rate.v1_0 import RateAlgorithm
 from ereuse_devicehub.resources.device.models import Computer, Desktop, Device, HardDrive, \
     Processor, RamModule, SolidStateDrive
 from ereuse_devicehub.resources.enums import AppearanceRange, ComputerChassis, \
     FunctionalityRange
+from ereuse_devicehub.resources.user.models import User
 from tests import conftest
 from tests.conftest import file, yaml2json, json_encode
 
@@ -200,3 +203,99 @@ def test_multiple_rates(user: UserClient):
     assert rate2.rating == 3.93
 
     assert price2.price == Decimal('78.6001')
+
+
+@pytest.mark.mvp
+@pytest.mark.usefixtures(conftest.auth_app_context.__name__)
+def test_batch_rate_same_as_rate_algorithm():
+    """Tests that re-rating all computers at once gives the same
+    rates than rating them one by one, and that computers without
+    the needed benchmarks are not rated.
+    """
+    pc1 = Desktop(chassis=ComputerChassis.Tower)
+    hdd = HardDrive(size=476940)
+    hdd.actions_one.add(BenchmarkDataStorage(read_speed=126, write_speed=29.8))
+    cpu = Processor(cores=2, speed=3.4)
+    cpu.actions_one.add(BenchmarkProcessor(rate=27136.44))
+    cpu.actions_one.add(BenchmarkProcessorSysbench(rate=1.5))
+    pc1.components |= {
+        hdd,
+        RamModule(size=4096, speed=1600),
+        RamModule(size=2048, speed=1067),
+        cpu,
+    }
+
+    # Unknown processor and RAM speeds, and two data storage units
+    pc2 = Desktop(chassis=ComputerChassis.Tower)
+    hdd = HardDrive(size=76319)
+    hdd.actions_one.add(BenchmarkDataStorage(read_speed=72.2, write_speed=24.3))
+    ssd = SolidStateDrive(size=None)
+    ssd.actions_one.add(BenchmarkDataStorage(read_speed=222, write_speed=111))
+    cpu = Processor()
+    cpu.actions_one.add(BenchmarkProcessor(rate=6000))
+    pc2.components |= {hdd, ssd, RamModule(size=1024), cpu}
+
+    # Only a processor
+    pc3 = Desktop(chassis=ComputerChassis.Tower)
+    cpu = Processor(cores=4, speed=1.2)
+    cpu.actions_one.add(BenchmarkProcessor(rate=0))
+    pc3.components.add(cpu)
+
+    # Neither of these can be rated
+    pc4 = Desktop(chassis=ComputerChassis.Tower)
+    pc4.components.add(Processor(cores=2, speed=3.4))
+    pc5 = Desktop(chassis=ComputerChassis.Tower)
+    cpu = Processor(cores=2, speed=3.4)
+    cpu.actions_one.add(BenchmarkProcessor(rate=27136.44))
+    pc5.components |= {cpu, HardDrive(size=476940)}
+
+    db.session.add_all((pc1, pc2, pc3, pc4, pc5))
+    db.session.commit()
+
+    assert BatchRateAlgorithm().run() == 3
+    db.session.commit()
+
+    assert not RateComputer.query.filter(
+        RateComputer.device_id.in_((pc4.id, pc5.id))
+    ).all()
+    for pc in pc1, pc2, pc3:
+        rate = RateComputer.query.filter_by(device_id=pc.id).one()
+        expected = RateAlgorithm().compute(pc)
+        assert rate.processor == expected.processor
+        assert rate.ram == expected.ram
+        assert rate.data_storage == expected.data_storage
+        assert rate.rating == expected.rating
+
+
+@pytest.mark.mvp
+@pytest.mark.usefixtures(conftest.auth_app_context.__name__)
+def test_batch_rate_owner_without_individual():
+    """Tests that the computers of an owner without individual are
+    not rated, instead of failing the whole batch.
+    """
+
+    def computer():
+        pc = Desktop(chassis=ComputerChassis.Tower)
+        cpu = Processor(cores=2, speed=3.4)
+        cpu.actions_one.add(BenchmarkProcessor(rate=27136.44))
+        pc.components.add(cpu)
+        return pc
+
+    pc1 = computer()
+    pc2 = computer()
+    db.session.add_all((pc1, pc2))
+    db.session.flush()
+    owner = User(email='noindividual@foo.com', password='foo')
+    db.session.add(owner)
+    db.session.flush()
+    pc2.owner_id = owner.id
+    for component in pc2.components:
+        component.owner_id = owner.id
+    db.session.commit()
+
+    assert BatchRateAlgorithm().run() == 1
+    db.session.commit()
+
+    rate = RateComputer.query.filter_by(device_id=pc1.id).one()
+    assert rate.agent_id == pc1.owner.individual.id
+    assert not RateComputer.query.filter_by(device_id=pc2.id).all()
@@ -1,5 +1,6 @@
 import datetime
 import json
+import zipfile
 from io import BytesIO
 from pathlib import Path
 from uuid import UUID
@@ -12,9 +13,15 @@ from flask_wtf.csrf import generate_csrf
 from ereuse_devicehub.client import UserClient, UserClientFlask
 from ereuse_devicehub.db import db
 from ereuse_devicehub.devicehub import Devicehub
-from ereuse_devicehub.resources.action.models import Snapshot
+from ereuse_devicehub.resources.action.models import EraseBasic, LatestErasure, Snapshot
+from ereuse_devicehub.resources.device.fuzzy import fuzzy_search
 from ereuse_devicehub.resources.device.models import Device, Placeholder
 from ereuse_devicehub.resources.lot.models import Lot
+from ereuse_devicehub.resources.lot.summary import (
+    LotSummary,
+    UserLots,
+    lot_summary_cache,
+)
 from ereuse_devicehub.resources.user.models import User
 from tests import conftest
 
@@ -149,6 +156,49 @@ def test_update_lot(user3: UserClientFlask):
     assert "lot2" in body
 
 
+@pytest.mark.mvp
+@pytest.mark.usefixtures(conftest.app_context.__name__)
+def test_lot_summary_cache(user3: UserClientFlask):
+    user3.get('/inventory/lot/add/')
+    user_id = User.query.one().id
+    generation = lot_summary_cache.generation()
+    assert not lot_summary_cache.get(user_id).lots
+
+    # Without changes the cached summary is reused
+    assert lot_summary_cache.get(user_id) is lot_summary_cache.get(user_id)
+
+    data = {
+        'name': "lot1",
+        'csrf_token': generate_csrf(),
+    }
+    body, status = user3.post('/inventory/lot/add/', data=data)
+    assert "lot1" in body
+    assert lot_summary_cache.generation() > generation
+
+    user_lots = lot_summary_cache.get(user_id)
+    lot = Lot.query.one()
+    assert [x.name for x in user_lots.temporary] == ["lot1"]
+    assert user_lots.temporary[0].id == lot.id
+    assert user_lots.temporary[0].devices == 0
+    assert not user_lots.incoming and not user_lots.outgoing
+    assert not user_lots.shared
+
+
+@pytest.mark.mvp
+def test_user_lots_owned():
+    """The label pages only list the lots the user owns and the
+    ones shared with them, as before the summaries.
+    """
+    own = LotSummary(1, 'own', 0, False, True, False, shared=False, owned=True)
+    traded = LotSummary(2, 'traded', 0, True, False, False, shared=False, owned=False)
+    shared = LotSummary(3, 'shared', 0, False, False, False, shared=True, owned=False)
+    user_lots = UserLots([own, traded], [shared]).owned()
+    assert user_lots.lots == [own]
+    assert user_lots.outgoing == [own]
+    assert not user_lots.incoming
+    assert user_lots.shared == [shared]
+
+
 @pytest.mark.mvp
 @pytest.mark.usefixtures(conftest.app_context.__name__)
 def test_upload_snapshot(user3: UserClientFlask):
@@ -181,6 +231,55 @@ def test_upload_snapshot(user3: UserClientFlask):
     assert len(dev.components) == 9
 
 
+@pytest.mark.mvp
+@pytest.mark.usefixtures(conftest.app_context.__name__)
+def test_upload_snapshot_too_big(app: Devicehub, user3: UserClientFlask, monkeypatch):
+    """Tests that snapshots bigger than ``SNAPSHOT_MAX_SIZE`` are not
+    parsed, and that the others of the upload are.
+    """
+    uri = '/inventory/upload-snapshot/'
+    user3.get(uri)
+    file_name = 'real-eee-1001pxd.snapshot.12.json'
+    snapshot = conftest.yaml2json(file_name.split(".json")[0])
+    b_snapshot = bytes(json.dumps(snapshot), 'utf-8')
+    monkeypatch.setitem(app.config, 'SNAPSHOT_MAX_SIZE', len(b_snapshot) - 1)
+
+    data = {
+        'snapshot': [(BytesIO(b_snapshot), file_name), (BytesIO(b''), 'empty.json')],
+        'csrf_token': generate_csrf(),
+    }
+    body, status = user3.post(uri, data=data, content_type="multipart/form-data")
+    assert status == '200 OK'
+    assert f"{file_name}: Error, this snapshot is too big" in body
+    assert "empty.json: Error, this snapshot is empty" in body
+    assert not Snapshot.query.all()
+
+    monkeypatch.setitem(app.config, 'SNAPSHOT_MAX_SIZE', len(b_snapshot))
+    data['snapshot'] = (BytesIO(b_snapshot), file_name)
+    data['csrf_token'] = generate_csrf()
+    body, status = user3.post(uri, data=data, content_type="multipart/form-data")
+    assert f"{file_name}: Ok" in body
+    assert str(Snapshot.query.one().uuid) == snapshot['uuid']
+
+
+@pytest.mark.mvp
+@pytest.mark.usefixtures(conftest.app_context.__name__)
+def test_upload_snapshot_utf16(user3: UserClientFlask):
+    """Tests uploading a snapshot encoded in UTF-16, with its BOM."""
+    uri = '/inventory/upload-snapshot/'
+    user3.get(uri)
+    file_name = 'real-eee-1001pxd.snapshot.12.json'
+    snapshot = conftest.yaml2json(file_name.split(".json")[0])
+    b_snapshot = json.dumps(snapshot).encode('utf-16')
+    data = {
+        'snapshot': (BytesIO(b_snapshot), file_name),
+        'csrf_token': generate_csrf(),
+    }
+    body, status = user3.post(uri, data=data, content_type="multipart/form-data")
+    assert f"{file_name}: Ok" in body
+    assert str(Snapshot.query.one().uuid) == snapshot['uuid']
+
+
 @pytest.mark.mvp
 @pytest.mark.usefixtures(conftest.app_context.__name__)
 def test_upload_snapshot_to_lot(user3: UserClientFlask):
@@ -323,6 +422,37 @@ def test_export_certificates(user3: UserClientFlask):
     assert 'e2024242cv86mm'.upper() in body
 
 
+@pytest.mark.mvp
+@pytest.mark.usefixtures(conftest.app_context.__name__, conftest.render_pool.__name__)
+def test_export_lots_certificates(user3: UserClientFlask):
+    snap = create_device(user3, 'real-eee-1001pxd.snapshot.12.json')
+    user3.get('/inventory/lot/add/')
+    for name in ['lot1', 'lot2']:
+        data = {'name': name, 'csrf_token': generate_csrf()}
+        user3.post('/inventory/lot/add/', data=data)
+    lot1 = Lot.query.filter_by(name='lot1').one()
+    lot2 = Lot.query.filter_by(name='lot2').one()
+    lot1.devices.add(snap.device)
+    db.session.commit()
+
+    uri = "/inventory/export/lots_certificates/?ids={},{},foo".format(lot1.id, lot2.id)
+    body, status = user3.get(uri, decode=False)
+    assert status == '200 OK'
+    with zipfile.ZipFile(BytesIO(b''.join(body))) as zf:
+        names = zf.namelist()
+        assert names == [
+            'erasure-certificate-lot1-{}.pdf'.format(lot1.id),
+            'erasure-certificate-lot2-{}.pdf'.format(lot2.id),
+            'timing.csv',
+        ]
+        pdf = str(zf.read(names[0]))
+        assert "PDF-1.5" in pdf
+        assert 'e2024242cv86mm'.upper() in pdf
+        timing = zf.read('timing.csv').decode().splitlines()
+        assert timing[0] == 'Document;Seconds'
+        assert len(timing) == 3
+
+
 @pytest.mark.mvp
 @pytest.mark.usefixtures(conftest.app_context.__name__)
 def test_export_actions_erasure(user3: UserClientFlask):
@@ -337,6 +467,67 @@ def test_export_actions_erasure(user3: UserClientFlask):
     assert "WD-WCAV29008961" in body
 
 
+@pytest.mark.mvp
+@pytest.mark.usefixtures(conftest.app_context.__name__)
+def test_latest_erasure(user3: UserClientFlask):
+    """Tests that the latest erasures follow the erasures that are
+    saved and deleted, and that they are the ones of the certificate.
+    """
+    snap = create_device(user3, 'erase-sectors-2-hdd.snapshot')
+    erasures = [ac for ac in snap.actions if ac.type == 'EraseBasic']
+    hdds = {ac.device for ac in erasures}
+    assert len(hdds) == 2
+
+    rows = LatestErasure.query.filter(
+        LatestErasure.device_id.in_([hdd.id for hdd in hdds])
+    ).all()
+    assert {row.erasure for row in rows} == {hdd.privacy for hdd in hdds}
+    assert all(row.host_id == snap.device.id for row in rows)
+
+    storages = LatestErasure.storages_of([snap.device.id])
+    assert set(LatestErasure.erasures(storages)) == snap.device.last_erase_action
+
+    hdd = next(iter(hdds))
+    for ac in hdd.actions:
+        if isinstance(ac, EraseBasic):
+            db.session.delete(ac)
+    db.session.commit()
+    assert LatestErasure.query.get(hdd.id) is None
+    assert len(LatestErasure.erasures(storages).all()) == 1
+
+
+@pytest.mark.mvp
+@pytest.mark.usefixtures(conftest.app_context.__name__)
+def test_latest_erasure_binding(user3: UserClientFlask):
+    """Tests that binding an erased data storage to a placeholder
+    moves its latest erasure to the device of the placeholder.
+    """
+    uri = '/inventory/device/add/'
+    user3.get(uri)
+    data = {
+        'csrf_token': generate_csrf(),
+        'type': "HardDrive",
+        'serial_number': "AAAAC",
+        'model': "foo",
+        'manufacturer': "bar",
+        'id_device_supplier': "b3",
+    }
+    user3.post(uri, data=data)
+    real = Device.query.filter_by(type='HardDrive').one()
+
+    snap = create_device(user3, 'erase-sectors-2-hdd.snapshot')
+    hdd = next(ac.device for ac in snap.actions if ac.type == 'EraseBasic')
+    hdd_id, erasure = hdd.id, hdd.privacy
+    assert LatestErasure.query.get(hdd_id).erasure == erasure
+
+    uri = '/inventory/binding/{}/{}/'.format(hdd.dhid, real.placeholder.phid)
+    body, status = user3.post(uri, data={})
+    assert status == '200 OK'
+    assert LatestErasure.query.get(hdd_id) is None
+    assert LatestErasure.query.get(real.id).erasure == erasure
+    assert LatestErasure.erasures([real.id], twins=False).all() == [erasure]
+
+
 @pytest.mark.mvp
 @pytest.mark.usefixtures(conftest.app_context.__name__)
 def test_labels(user3: UserClientFlask):
@@ -1068,6 +1259,58 @@ def test_action_deallocate(user3: UserClientFlask):
     assert dev.binding.device.devicehub_id in body
 
 
+@pytest.mark.mvp
+@pytest.mark.usefixtures(conftest.app_context.__name__)
+def test_action_bulk_devices_and_components(user3: UserClientFlask):
+    snap = create_device(user3, 'real-eee-1001pxd.snapshot.12.json')
+    device = snap.device.binding.device
+    uri = '/inventory/device/'
+    user3.get(uri)
+
+    data = {
+        'csrf_token': generate_csrf(),
+        'type': "Ready",
+        'severity': "Info",
+        'devices': "{}".format(device.id),
+    }
+
+    uri = '/inventory/action/add/'
+    body, status = user3.post(uri, data=data)
+    assert status == '200 OK'
+    action = device.actions[-1]
+    assert action.type == 'Ready'
+    assert action.author == device.owner
+    assert list(action.devices) == [device]
+    assert set(action.components) == set(device.components)
+
+    data = {
+        'csrf_token': generate_csrf(),
+        'type': "Allocate",
+        'severity': "Info",
+        'devices': "{}".format(device.id),
+        'start_time': '2000-01-01',
+        'end_time': '2000-06-01',
+        'end_users': 2,
+    }
+
+    uri = '/inventory/action/allocate/add/'
+    user3.post(uri, data=data)
+    assert device.allocated
+    # Cannot be allocated again until it is deallocated
+    data['csrf_token'] = generate_csrf()
+    body, status = user3.post(uri, data=data)
+    assert 'You need to deallocate before allocating this device again' in body
+    assert [x.type for x in device.actions].count('Allocate') == 1
+
+    data['csrf_token'] = generate_csrf()
+    data['type'] = "Deallocate"
+    user3.post(uri, data=data)
+    assert not device.allocated
+    data['csrf_token'] = generate_csrf()
+    body, status = user3.post(uri, data=data)
+    assert 'Error, some of these devices are actually deallocated' in body
+
+
 @pytest.mark.mvp
 @pytest.mark.usefixtures(conftest.app_context.__name__)
 def test_action_deallocate_error(user3: UserClientFlask):
@@ -2283,6 +2526,54 @@ def test_edit_and_binding(user3: UserClientFlask):
     assert dev_wb.binding.is_abstract is True
 
 
+@pytest.mark.mvp
+@pytest.mark.usefixtures(conftest.app_context.__name__)
+def test_binding_batch(user3: UserClientFlask):
+    uri = '/inventory/device/add/'
+    user3.get(uri)
+    data = {
+        'csrf_token': generate_csrf(),
+        'type': "Laptop",
+        'serial_number': "AAAAB",
+        'model': "LC27T55",
+        'manufacturer': "Samsung",
+        'generation': 1,
+        'weight': 0.1,
+        'height': 0.1,
+        'depth': 0.1,
+        'id_device_supplier': "b2",
+    }
+    user3.post(uri, data=data)
+    dev = Device.query.one()
+
+    snap = create_device(user3, 'real-eee-1001pxd.snapshot.12.json')
+    dev_wb = snap.device
+    old_placeholder = dev_wb.binding
+    old_device_id = old_placeholder.device.id
+
+    uri = '/inventory/binding/batch/'
+    body, status = user3.get(uri)
+    assert status == '200 OK'
+    assert "Binding in batch" in body
+
+    csv_file = f'DHID;PHID\n{dev_wb.dhid};1\nNOTEXIST;2\n'.encode()
+    data = {
+        'csrf_token': generate_csrf(),
+        'binding_file': (BytesIO(csv_file), 'binding.csv'),
+    }
+    body, status = user3.post(uri, data=data, content_type="multipart/form-data")
+    assert status == '200 OK'
+    assert '1 devices bind successfully.' in body
+    assert 'Device Dhid: &#34;NOTEXIST&#34; not exist!' in body
+
+    assert dev.placeholder.binding == dev_wb
+    assert dev_wb.binding.phid == '1'
+    assert dev_wb.is_abstract() == dev.is_abstract() == 'Twin'
+    assert Placeholder.query.filter_by(id=old_placeholder.id).first() is None
+    assert Device.query.filter_by(id=old_device_id).first() is None
+    assert Placeholder.query.count() == 1
+
+
 @pytest.mark.mvp
 @pytest.mark.usefixtures(conftest.app_context.__name__)
 def test_unbinding(user3: UserClientFlask):
@@ -2880,3 +3171,26 @@ def test_delete_device_document(user3: UserClientFlask):
     uri = '/inventory/device/{}/document/del/{}'.format(device.dhid, doc_id)
     user3.get(uri)
     assert len(device.documents) == 0
+
+
+@pytest.mark.mvp
+@pytest.mark.usefixtures(conftest.app_context.__name__)
+def test_fuzzy_search(user3: UserClientFlask):
+    snap = create_device(user3, 'real-eee-1001pxd.snapshot.12.json')
+    dhid = snap.device.devicehub_id
+    owner_id = snap.device.owner_id
+
+    # A mistyped serial number of the computer
+    body, status = user3.get('/inventory/search/?q=B8OAAS048258&fuzzy=y')
+    assert status == '200 OK'
+    assert dhid in body
+    assert 'name="fuzzy"' in body
+
+    # Part of the serial number of its hard drive, without asking for it
+    body, status = user3.get('/inventory/search/?q=E2024242CV86')
+    assert status == '200 OK'
+    assert dhid in body
+
+    devices = fuzzy_search('B8OAAS04828', owner_id)
+    assert devices.first().serial_number == 'b8oaas048285'
+    assert not fuzzy_search('B8', owner_id).count()
@@ -14,7 +14,12 @@ from boltons import urlutils
 from ereuse_devicehub.client import Client, UserClient
 from ereuse_devicehub.db import db
 from ereuse_devicehub.devicehub import Devicehub
+from ereuse_devicehub.ereuse_utils.nested_lookup import (
+    get_nested_dicts_with_key_containing_value,
+    get_nested_dicts_with_key_value,
+)
 from ereuse_devicehub.ereuse_utils.test import ANY
+from ereuse_devicehub.parser.index import LshwIndex
 from ereuse_devicehub.parser.models import SnapshotsLog
 from ereuse_devicehub.resources.action.models import (
     Action,
@@ -33,7 +38,7 @@ from ereuse_devicehub.resources.documents import documents
 from ereuse_devicehub.resources.enums import ComputerChassis, SnapshotSoftware
 from ereuse_devicehub.resources.tag import Tag
 from ereuse_devicehub.resources.user.models import User
-from ereuse_devicehub.teal.marshmallow import ValidationError
+from ereuse_devicehub.teal.marshmallow import NestedOn, ValidationError
 from tests import conftest
 from tests.conftest import file, file_json, json_encode, yaml2json
 
@@ -82,6 +87,35 @@ def test_snapshot_schema(app: Devicehub):
         app.resources['Snapshot'].schema.load(s)
 
 
+@pytest.mark.mvp
+def test_snapshot_schema_reuses_nested_schemas(app: Devicehub):
+    """Nested schemas are reused across loads, and the models they
+    create are not shared.
+    """
+    with app.app_context():
+        schema = app.resources['Snapshot'].schema
+        s = yaml2json('basic.snapshot')
+        first = schema.load(s)
+        schemas = app.extensions[NestedOn.SCHEMAS]
+        pools = {key: list(pool) for key, pool in schemas.items()}
+        second = schema.load(s)
+        assert {key: list(pool) for key, pool in schemas.items()} == pools
+        assert first['device'] is not second['device']
+        assert first['device'].serial_number == second['device'].serial_number
+        assert len(first['components']) == len(second['components'])
+
+
+@pytest.mark.mvp
+def test_nested_schemas_bounded(app: Devicehub, monkeypatch):
+    """The unused nested schemas are kept per app, and only for the
+    most recently used combinations of schema and options.
+    """
+    monkeypatch.setattr(NestedOn, 'SCHEMAS_MAX', 1)
+    with app.app_context():
+        app.resources['Snapshot'].schema.load(yaml2json('basic.snapshot'))
+        assert len(app.extensions[NestedOn.SCHEMAS]) == 1
+
+
 @pytest.mark.mvp
 @pytest.mark.usefixtures(conftest.app_context.__name__)
 def test_snapshot_post(user: UserClient):
@@ -1399,3 +1433,58 @@ def test_settings_version(user: UserClient):
 
     assert log.get_version() == "14.0 (BM)"
     assert snapshot.settings_version == "Basic Metadata"
+
+
+@pytest.mark.mvp
+@pytest.mark.usefixtures(conftest.app_context.__name__)
+def test_snapshots_log_denormalized(app: Devicehub, user: UserClient):
+    """Tests that the log keeps what the log pages show of the
+    snapshot, and that the backfill computes it for old logs."""
+    s = file_json("2022-03-31_17h18m51s_ZQMPKKX51K67R68VO2X9RNZL08JPL_snapshot.json")
+    body, res = user.post(s, uri="/api/inventory/")
+    log = SnapshotsLog.query.one()
+    device = log.snapshot.device
+    assert log.display_version == "14.0 (BM)"
+    assert log.dhid == body['dhid']
+    assert log.original_dhid == body['dhid']
+    assert log.placeholder_status == 'Snapshot'
+    assert log.new_device == 'New Device'
+    assert log.system_uuid == device.system_uuid
+    assert log.get_device() == body['dhid']
+    assert log.get_type_device() == 'Snapshot'
+
+    # Logs saved before the values were stored
+    SnapshotsLog.query.update({'display_version': None, 'dhid': None})
+    db.session.commit()
+    app.snapshots_log_backfill.run()
+    log = SnapshotsLog.query.one()
+    assert log.display_version == "14.0 (BM)"
+    assert log.dhid == body['dhid']
+
+    log.detach_snapshot()
+    assert log.get_device() == ''
+    assert log.get_status() == ''
+    assert log.get_version() == log.version
+
+
+@pytest.mark.mvp
+def test_lshw_index():
+    """Tests that the index of lshw finds the nodes that walking the
+    tree finds, in the same order."""
+    lshw = file_json('system_uuid2.json')['data']['lshw']
+    index = LshwIndex(lshw)
+    for cls in 'processor', 'memory', 'display', 'network', 'multimedia':
+        nodes = list(get_nested_dicts_with_key_value(lshw, 'class', cls))
+        assert nodes
+        assert index.by_class(cls) == nodes
+    assert index.by_id('firmware') == list(
+        get_nested_dicts_with_key_value(lshw, 'id', 'firmware')
+    )
+    assert index.by_class('foo') == []
+
+    motherboard = index.by_description('Motherboard')[0]
+    for interface in 'usb', 'firewire', 'serial', 'pcmcia':
+        nodes = get_nested_dicts_with_key_containing_value(motherboard, 'id', interface)
+        assert len(list(index.containing(motherboard, 'id', interface))) == len(
+            list(nodes)
+        )
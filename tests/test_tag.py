@@ -1,4 +1,5 @@
 import pathlib
+import uuid
 
 import pytest
 import requests_mock
@@ -13,6 +14,7 @@ from ereuse_devicehub.ereuse_utils.session import DevicehubClient
 from ereuse_devicehub.resources.agent.models import Organization
 from ereuse_devicehub.resources.device.models import Desktop, Device
 from ereuse_devicehub.resources.enums import ComputerChassis
+from ereuse_devicehub.resources.inventory.model import Inventory
 from ereuse_devicehub.resources.tag import Tag
 from ereuse_devicehub.resources.tag.view import (
     CannotCreateETag,
@@ -396,6 +398,31 @@ def test_create_num_regular_tags(
     assert data['items'][1]['printable']
 
 
+@pytest.mark.mvp
+def test_tag_provider_pool(app: Devicehub, requests_mock: requests_mock.mocker.Mocker):
+    """Tests that, with TAG_PROVIDER_POOL, tag ids are reserved
+    beforehand and tags are created without calling the tag provider.
+    """
+    ids = iter(range(100))
+
+    def tag_ids(request, context):
+        context.status_code = 201
+        return ['tag{}'.format(next(ids)) for _ in range(int(request.qs['num'][0]))]
+
+    requests_mock.post('https://pool.example.com/', json=tag_ids)
+    app.config['TAG_PROVIDER_POOL'] = 4
+    try:
+        with app.app_context():
+            inv = Inventory(
+                tag_provider=URL('https://pool.example.com'), tag_token=uuid.uuid4()
+            )
+            assert app.tag_provider.reserve(2, inv) == ['tag0', 'tag1']
+            assert app.tag_provider.reserve(2, inv) == ['tag2', 'tag3']
+    finally:
+        app.config['TAG_PROVIDER_POOL'] = 0
+    assert requests_mock.call_count == 1
+
+
 @pytest.mark.mvp
 def test_get_tags_endpoint(
     user: UserClient, app: Devicehub, requests_mock: requests_mock.mocker.Mocker